@@ -0,0 +1,76 @@
+import argparse
+import sys
+import time
+
+import jdatetime
+import requests
+
+from calendar_core import EVENTS_BUNDLE_FILE
+from event_store import STATUS_OK, write_cache_file
+from events_api import EventsApiError, fetch_year_events
+
+# Precomputes the read-only events bundle that build_exe.py packs into the
+# executable. Each year comes from the same ?year= endpoint the widget uses, and
+# the result is written in the events cache format. At runtime the bundle is
+# layered under the user's cache (see EventStore), so a fresh install or an
+# offline machine has these years without a single request.
+#
+#   python build_events_bundle.py                 # last year through four years ahead
+#   python build_events_bundle.py --years 1400-1410
+
+DEFAULT_YEARS_BEFORE = 1 # Jalali years bundled before the current one
+DEFAULT_YEARS_AFTER = 4  # ... and after it
+
+
+def default_years():
+    this_year = jdatetime.date.today().year
+    return list(range(this_year - DEFAULT_YEARS_BEFORE, this_year + DEFAULT_YEARS_AFTER + 1))
+
+
+def parse_years(text):
+    """Parses "1403" or "1400-1410" to a list of years."""
+    first, _, last = text.partition('-')
+    first = int(first)
+    last = int(last) if last else first
+    if last < first:
+        raise argparse.ArgumentTypeError(f"empty year range {text!r}")
+    return list(range(first, last + 1))
+
+
+def build_bundle(years, output=EVENTS_BUNDLE_FILE):
+    """
+    Fetches the events of `years` and writes them to `output`. Years that fail
+    to download are reported and left out. Returns the number of days written;
+    nothing is written (and 0 returned) if no year could be fetched.
+    """
+    fetched_at = time.time()
+    entries = {}
+    for year in years:
+        try:
+            year_events = fetch_year_events(year)
+        except (requests.exceptions.RequestException, ValueError, EventsApiError) as e:
+            print(f"✗ {year}: {e}")
+            continue
+        print(f"✓ {year}: {len(year_events)} days")
+        for key, events_list in year_events.items():
+            entries[key] = {"status": STATUS_OK, "events": events_list, "fetched_at": fetched_at}
+    if entries:
+        write_cache_file(output, entries)
+    return len(entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download several years of calendar events into the bundle shipped with the executable.")
+    parser.add_argument("--years", type=parse_years, help="Jalali year or range, e.g. 1400-1410 (default: last year to four years ahead)")
+    parser.add_argument("-o", "--output", default=EVENTS_BUNDLE_FILE, help=f"file to write (default: {EVENTS_BUNDLE_FILE})")
+    args = parser.parse_args(argv)
+    days = build_bundle(args.years or default_years(), args.output)
+    if not days:
+        print("No events could be downloaded; the bundle was not written.")
+        return 1
+    print(f"Wrote {days} days to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -33,6 +33,22 @@ def check_requirements():
     
     return True
 
+def build_events_bundle():
+    print_section("Building Events Bundle")
+    
+    # Several years of events are packed into the executable, so the first launch needs no network
+    from build_events_bundle import build_bundle, default_years
+    from calendar_core import EVENTS_BUNDLE_FILE
+    
+    years = default_years()
+    print(f"Downloading events for {years[0]}-{years[-1]}...")
+    if build_bundle(years, EVENTS_BUNDLE_FILE):
+        print(f"✓ Events bundle written to {EVENTS_BUNDLE_FILE}")
+    elif os.path.exists(EVENTS_BUNDLE_FILE):
+        print(f"✗ Download failed, reusing the existing {EVENTS_BUNDLE_FILE}")
+    else:
+        print("✗ Download failed, building without bundled events")
+
 def build_executable():
     print_section("Building Executable")
     
@@ -53,6 +69,10 @@ def build_executable():
         print("✓ Found quotes.json, adding to executable")
         args.append('--add-data=quotes.json;.')
     
+    if os.path.exists('events_bundle.jsonl.gz'):
+        print("✓ Found events_bundle.jsonl.gz, adding to executable")
+        args.append('--add-data=events_bundle.jsonl.gz;.')
+    
     if os.path.exists('icons'):
         print("✓ Found icons directory, adding to executable")
         args.append('--add-data=icons/*;icons/')
@@ -130,6 +150,8 @@ def main():
         print("\n✗ Requirements check failed. Please fix the issues and try again.")
         return
     
+    build_events_bundle()
+    
     if build_executable():
         create_zip()
         
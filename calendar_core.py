@@ -0,0 +1,108 @@
+import os
+import sys
+
+import numpy as np
+from hijri_converter import Gregorian
+
+import date_batch
+from event_store import EventStore
+
+# Qt-free core of the calendar: Persian names and text formatting of a day, the
+# location of the events cache, and validated conversion of date columns between
+# the Jalali, Gregorian and Hijri calendars. The widgets and calendar_cli.py both
+# build on this module; nothing here needs a display or a QApplication.
+
+EVENTS_CACHE_FILE = "events_cache.jsonl.gz"
+LEGACY_EVENTS_CACHE_FILE = "events_cache.json" # Pretty-printed JSON cache of older versions, migrated on the first write
+EVENTS_BUNDLE_FILE = "events_bundle.jsonl.gz"  # Read-only events shipped with the app, made by build_events_bundle.py
+
+WEEKDAYS_FA = ('شنبه', 'یک‌شنبه', 'دوشنبه', 'سه‌شنبه', 'چهارشنبه', 'پنج‌شنبه', 'جمعه') # jdatetime weekday() order, Saturday first
+WEEKDAY_INITIALS_FA = ('ش', 'ی', 'د', 'س', 'چ', 'پ', 'ج')
+JALALI_MONTHS_FA = ('فروردین', 'اردیبهشت', 'خرداد', 'تیر', 'مرداد', 'شهریور', 'مهر', 'آبان', 'آذر', 'دی', 'بهمن', 'اسفند')
+HIJRI_MONTHS_FA = ('محرم', 'صفر', 'ربیع‌الاول', 'ربیع‌الثانی', 'جمادی‌الاول', 'جمادی‌الثانی', 'رجب', 'شعبان', 'رمضان', 'شوال', 'ذوالقعده', 'ذوالحجه')
+GREGORIAN_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# The lookup tables the widget code has always used, keyed by strftime('%A') / strftime('%B') names
+weekday_fa = dict(zip(('Saturday', 'Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'), WEEKDAYS_FA))
+months_fa = dict(zip(('Farvardin', 'Ordibehesht', 'Khordad', 'Tir', 'Mordad', 'Shahrivar',
+                      'Mehr', 'Aban', 'Azar', 'Dey', 'Bahman', 'Esfand'), JALALI_MONTHS_FA))
+hijri_months_fa = dict(enumerate(HIJRI_MONTHS_FA, start=1))
+
+CALENDARS = ("jalali", "gregorian", "hijri")
+
+
+def _app_dir():
+    """Directory of the executable when frozen, otherwise of the source files."""
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(os.path.abspath(sys.executable))
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def events_cache_path():
+    """Path of the events cache file."""
+    return os.path.join(_app_dir(), EVENTS_CACHE_FILE)
+
+
+def legacy_events_cache_path():
+    """Path of the events cache written by older versions."""
+    return os.path.join(_app_dir(), LEGACY_EVENTS_CACHE_FILE)
+
+
+def bundled_events_path():
+    """Path of the bundled events: unpacked next to the code by PyInstaller, otherwise next to the source files."""
+    return os.path.join(getattr(sys, "_MEIPASS", _app_dir()), EVENTS_BUNDLE_FILE)
+
+
+def open_event_store(cache_file=None):
+    """
+    EventStore over `cache_file` (either format), or over the app's cache with
+    the legacy cache as fallback and the bundled events layered underneath.
+    """
+    if cache_file:
+        return EventStore(cache_file)
+    return EventStore(events_cache_path(), legacy_events_cache_path(), bundled_events_path())
+
+
+def format_day(j_date):
+    """Main date line of a day, e.g. "یک‌شنبه 26 مهر 1405"."""
+    return f"{WEEKDAYS_FA[j_date.weekday()]} {j_date.day} {JALALI_MONTHS_FA[j_date.month - 1]} {j_date.year}"
+
+
+def format_other_calendars(j_date):
+    """Gregorian and Hijri line of a day."""
+    g = j_date.togregorian()
+    h = Gregorian(g.year, g.month, g.day).to_hijri()
+    return f"میلادی: {g.strftime('%d %B %Y')}     ⬥     قمری: {h.day} {HIJRI_MONTHS_FA[h.month - 1]} {h.year}"
+
+
+def format_events(events_list):
+    return "مناسبت: " + ", ".join(events_list) if events_list else "مناسبت: ---"
+
+
+def to_ordinals(calendar, year, month, day):
+    """
+    Converts date fields of `calendar` ("jalali", "gregorian" or "hijri"; ints or int
+    arrays) to Gregorian ordinals. Returns (ordinals, valid). A date is valid if it
+    exists and lies in the conversion tables of date_batch; it is checked by
+    converting the ordinal back. Invalid dates get a placeholder ordinal.
+    """
+    if calendar == "gregorian":
+        first, last = 1, 9999
+        forward, back = date_batch.gregorian_to_ordinal, date_batch.ordinals_to_gregorian
+    elif calendar == "jalali":
+        first, last = date_batch.JALALI_TABLE_YEARS
+        forward, back = date_batch.jalali_to_ordinal, date_batch.ordinals_to_jalali
+    elif calendar == "hijri":
+        first, last = date_batch.HIJRI_TABLE_YEARS
+        forward, back = date_batch.hijri_to_ordinal, date_batch.ordinals_to_hijri
+    else:
+        raise ValueError(f"Unknown calendar {calendar!r}, expected one of {CALENDARS}")
+    year = np.asarray(year, dtype=np.int64)
+    month = np.asarray(month, dtype=np.int64)
+    day = np.asarray(day, dtype=np.int64)
+    valid = (year >= first) & (year <= last) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    # Table lookups need in-range fields; invalid rows are converted as the 1st of the first year
+    ordinals = forward(np.where(valid, year, first), np.where(valid, month, 1), np.where(valid, day, 1))
+    back_year, back_month, back_day = back(ordinals)
+    valid &= (back_year == year) & (back_month == month) & (back_day == day)
+    return ordinals, valid
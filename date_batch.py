@@ -0,0 +1,159 @@
+import datetime
+
+import jdatetime
+import numpy as np
+from hijri_converter import Hijri, ummalqura
+
+# Batch conversion of date ranges between the Jalali, Gregorian and Hijri
+# calendars. Every date is handled as a proleptic Gregorian ordinal
+# (datetime.date.toordinal()); Jalali and Hijri fields are looked up with
+# np.searchsorted in tables of year / month start ordinals that are built once
+# from jdatetime and hijri_converter, so a range of any size converts in a few
+# array operations instead of one Python call per day.
+
+JALALI_TABLE_YEARS = (1000, 2000)  # Jalali years covered by the lookup table (1621-2622 CE)
+HIJRI_TABLE_YEARS = (ummalqura.HIJRI_RANGE[0][0], ummalqura.HIJRI_RANGE[1][0]) # Umm al-Qura range of hijri_converter
+JALALI_MONTH_OFFSETS = np.array([0, 31, 62, 93, 124, 155, 186, 216, 246, 276, 306, 336], dtype=np.int64) # Day of year before each month
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal() # datetime64[D] zero
+
+_jalali_year_starts = None  # Ordinal of 1 Farvardin for every year in JALALI_TABLE_YEARS (one extra for the year end)
+_hijri_month_starts = None  # Ordinal of the 1st of every Hijri month in HIJRI_TABLE_YEARS (one extra for the last month end)
+
+
+def _jalali_table():
+    global _jalali_year_starts
+    if _jalali_year_starts is None:
+        first, last = JALALI_TABLE_YEARS
+        _jalali_year_starts = np.array([jdatetime.date(year, 1, 1).togregorian().toordinal()
+                                        for year in range(first, last + 2)], dtype=np.int64)
+    return _jalali_year_starts
+
+
+def _hijri_table():
+    global _hijri_month_starts
+    if _hijri_month_starts is None:
+        first, last = HIJRI_TABLE_YEARS
+        starts = [Hijri(year, month, 1).to_gregorian().toordinal()
+                  for year in range(first, last + 1) for month in range(1, 13)]
+        last_day = Hijri(last, 12, Hijri(last, 12, 1).month_length())
+        starts.append(last_day.to_gregorian().toordinal() + 1)
+        _hijri_month_starts = np.array(starts, dtype=np.int64)
+    return _hijri_month_starts
+
+
+def to_ordinal(value):
+    """Returns the Gregorian ordinal of a jdatetime.date, datetime.date or (already) an int ordinal."""
+    if isinstance(value, jdatetime.date):
+        return value.togregorian().toordinal()
+    if isinstance(value, datetime.date):
+        return value.toordinal()
+    return int(value)
+
+
+class DateBatch:
+    """
+    Calendar fields of a run of days as parallel int arrays, indexed like `ordinal`.
+
+    j_year/j_month/j_day, g_year/g_month/g_day and h_year/h_month/h_day hold the
+    Jalali, Gregorian and Hijri dates; weekday is the Jalali weekday (0 = Saturday,
+    6 = Friday). Hijri fields are 0 for days outside the Umm al-Qura table, and
+    Jalali fields are 0 for days outside JALALI_TABLE_YEARS.
+    """
+
+    def __init__(self, ordinal):
+        self.ordinal = ordinal
+        self.weekday = (ordinal + 1) % 7 # date.weekday() is (ordinal - 1) % 7 with Monday = 0; shift to Saturday = 0
+        self.g_year, self.g_month, self.g_day = ordinals_to_gregorian(ordinal)
+        self.j_year, self.j_month, self.j_day = ordinals_to_jalali(ordinal)
+        self.h_year, self.h_month, self.h_day = ordinals_to_hijri(ordinal)
+
+    def __len__(self):
+        return len(self.ordinal)
+
+    def date_keys(self):
+        """Returns the "YYYY-MM-DD" Jalali keys of the days (the EventStore key format)."""
+        return [f"{y:04d}-{m:02d}-{d:02d}" for y, m, d in zip(self.j_year.tolist(), self.j_month.tolist(), self.j_day.tolist())]
+
+
+def ordinals_to_gregorian(ordinals):
+    """Returns (year, month, day) arrays for an array of Gregorian ordinals."""
+    days = np.asarray(ordinals, dtype=np.int64) - _EPOCH_ORDINAL
+    dates = days.astype('datetime64[D]')
+    months = dates.astype('datetime64[M]')
+    year = months.astype('datetime64[Y]').astype(np.int64) + 1970
+    month = months.astype(np.int64) % 12 + 1
+    day = (dates - months).astype(np.int64) + 1
+    return year, month, day
+
+
+def ordinals_to_jalali(ordinals):
+    """Returns Jalali (year, month, day) arrays for an array of Gregorian ordinals."""
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    year_starts = _jalali_table()
+    year_index = np.searchsorted(year_starts, ordinals, side='right') - 1
+    valid = (year_index >= 0) & (year_index < len(year_starts) - 1)
+    year_index = np.clip(year_index, 0, len(year_starts) - 2)
+    day_of_year = ordinals - year_starts[year_index] # 0-based
+    month_index = np.searchsorted(JALALI_MONTH_OFFSETS, day_of_year, side='right') - 1
+    year = np.where(valid, year_index + JALALI_TABLE_YEARS[0], 0)
+    month = np.where(valid, month_index + 1, 0)
+    day = np.where(valid, day_of_year - JALALI_MONTH_OFFSETS[month_index] + 1, 0)
+    return year, month, day
+
+
+def ordinals_to_hijri(ordinals):
+    """Returns Hijri (year, month, day) arrays for an array of Gregorian ordinals, 0 outside the supported range."""
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    month_starts = _hijri_table()
+    month_index = np.searchsorted(month_starts, ordinals, side='right') - 1
+    valid = (month_index >= 0) & (month_index < len(month_starts) - 1)
+    month_index = np.clip(month_index, 0, len(month_starts) - 2)
+    year = np.where(valid, month_index // 12 + HIJRI_TABLE_YEARS[0], 0)
+    month = np.where(valid, month_index % 12 + 1, 0)
+    day = np.where(valid, ordinals - month_starts[month_index] + 1, 0)
+    return year, month, day
+
+
+def gregorian_to_ordinal(year, month, day):
+    """Returns ordinals for Gregorian dates (scalars or arrays). Dates are not validated."""
+    months = (np.asarray(year, dtype=np.int64) - 1970) * 12 + np.asarray(month, dtype=np.int64) - 1
+    return months.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64) + _EPOCH_ORDINAL + np.asarray(day, dtype=np.int64) - 1
+
+
+def jalali_to_ordinal(year, month, day):
+    """Returns Gregorian ordinals for Jalali dates (scalars or arrays). Dates are not validated."""
+    year = np.asarray(year, dtype=np.int64)
+    month = np.asarray(month, dtype=np.int64)
+    year_starts = _jalali_table()
+    return year_starts[year - JALALI_TABLE_YEARS[0]] + JALALI_MONTH_OFFSETS[month - 1] + np.asarray(day, dtype=np.int64) - 1
+
+
+def hijri_to_ordinal(year, month, day):
+    """Returns Gregorian ordinals for Hijri dates (scalars or arrays). Dates are not validated."""
+    month_index = (np.asarray(year, dtype=np.int64) - HIJRI_TABLE_YEARS[0]) * 12 + np.asarray(month, dtype=np.int64) - 1
+    return _hijri_table()[month_index] + np.asarray(day, dtype=np.int64) - 1
+
+
+def convert_range(start, end):
+    """
+    Converts every day in [start, end] (jdatetime.date, datetime.date or ordinal)
+    to a DateBatch.
+    """
+    return DateBatch(np.arange(to_ordinal(start), to_ordinal(end) + 1, dtype=np.int64))
+
+
+def jalali_month(year, month):
+    """Returns the DateBatch of every day of a Jalali month."""
+    first = int(jalali_to_ordinal(year, month, 1))
+    return convert_range(first, first + jalali_month_length(year, month) - 1)
+
+
+def jalali_year(year):
+    """Returns the DateBatch of every day of a Jalali year."""
+    return convert_range(int(jalali_to_ordinal(year, 1, 1)), int(jalali_to_ordinal(year + 1, 1, 1)) - 1)
+
+
+def jalali_month_length(year, month):
+    """Number of days in a Jalali month."""
+    next_year, next_month = (year, month + 1) if month < 12 else (year + 1, 1)
+    return int(jalali_to_ordinal(next_year, next_month, 1) - jalali_to_ordinal(year, month, 1))
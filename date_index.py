@@ -0,0 +1,134 @@
+import datetime
+
+import jdatetime
+import numpy as np
+
+import date_batch
+from event_store import STATUS_OK
+
+# Day-number (Gregorian ordinal) indexes for questions that used to need a
+# day-by-day loop: which cached days in a range have events, the next or previous
+# day with events, events per month, and the next official holiday.
+
+# Official holidays, encoded as month * 100 + day. Lunar ones are matched against
+# the Umm al-Qura dates of hijri_converter and can be a day off Iran's official lunar calendar.
+SOLAR_HOLIDAYS = (101, 102, 103, 104, 112, 113, 314, 315, 1122, 1229)
+LUNAR_HOLIDAYS = (109, 110, 220, 228, 308, 317, 603, 713, 727, 815, 921, 1001, 1002, 1025, 1210, 1218)
+LAST_DAY_OF_SAFAR_HOLIDAY = True # 29 or 30 Safar, whichever ends the month
+HOLIDAY_YEAR_CACHE_SIZE = 8
+
+
+def holiday_mask(batch, fridays=True):
+    """
+    Boolean array marking the official holidays (and Fridays, unless `fridays` is False) of a DateBatch.
+    The last day of the batch is never marked as the last day of Safar, since the next day is unknown.
+    """
+    holiday = batch.weekday == 6 if fridays else np.zeros(len(batch), dtype=bool)
+    holiday |= np.isin(batch.j_month * 100 + batch.j_day, SOLAR_HOLIDAYS)
+    holiday |= np.isin(batch.h_month * 100 + batch.h_day, LUNAR_HOLIDAYS)
+    if LAST_DAY_OF_SAFAR_HOLIDAY:
+        holiday[:-1] |= (batch.h_month[:-1] == 2) & (batch.h_month[1:] == 3)
+    return holiday
+
+
+_holiday_years = {} # Jalali year -> sorted ordinals of its official holidays (Fridays excluded)
+
+
+def holiday_ordinals(year):
+    """Sorted Gregorian ordinals of the official holidays of a Jalali year, not counting Fridays."""
+    ordinals = _holiday_years.get(year)
+    if ordinals is None:
+        first = int(date_batch.jalali_to_ordinal(year, 1, 1))
+        last = int(date_batch.jalali_to_ordinal(year + 1, 1, 1)) # One day past the year end, for the last day of Safar
+        batch = date_batch.convert_range(first, last)
+        ordinals = batch.ordinal[:-1][holiday_mask(batch, fridays=False)[:-1]]
+        if len(_holiday_years) >= HOLIDAY_YEAR_CACHE_SIZE:
+            _holiday_years.pop(next(iter(_holiday_years)))
+        _holiday_years[year] = ordinals
+    return ordinals
+
+
+def next_holiday(after):
+    """Returns the first official holiday (not counting Fridays) strictly after `after` (jdatetime.date) as a jdatetime.date."""
+    ordinal = date_batch.to_ordinal(after)
+    for year in (after.year, after.year + 1):
+        ordinals = holiday_ordinals(year)
+        i = np.searchsorted(ordinals, ordinal, side='right')
+        if i < len(ordinals):
+            return jdatetime.date.fromgregorian(date=datetime.date.fromordinal(int(ordinals[i])))
+    return None
+
+
+class EventDateIndex:
+    """
+    The days of an EventStore that have events, as a sorted array of Gregorian
+    ordinals with the matching "YYYY-MM-DD" keys.
+
+    It is rebuilt lazily, in one pass over the store's sorted keys, the first time
+    it is queried after the store has changed. Queries are np.searchsorted
+    lookups. Dates can be given as jdatetime.date, datetime.date, ordinals or
+    "YYYY-MM-DD" keys.
+    """
+
+    def __init__(self, event_store):
+        self.event_store = event_store
+        self._store_version = None
+        self._ordinals = np.zeros(0, dtype=np.int64)
+        self._keys = []
+        self._events = []  # Event lists, aligned with _keys
+
+    def _sync(self):
+        version = self.event_store.version
+        if version == self._store_version:
+            return
+        self._store_version = version
+        days = [(key, entry["events"]) for key, entry in sorted(self.event_store.entries())
+                if entry["status"] == STATUS_OK and entry["events"]]
+        keys = [key for key, _ in days]
+        if keys:
+            parts = np.array([key.split('-') for key in keys], dtype=np.int64)
+            self._ordinals = date_batch.jalali_to_ordinal(parts[:, 0], parts[:, 1], parts[:, 2])
+        else:
+            self._ordinals = np.zeros(0, dtype=np.int64)
+        self._keys = keys
+        self._events = [events for _, events in days]
+
+    @staticmethod
+    def _ordinal(value):
+        if isinstance(value, str):
+            return int(date_batch.jalali_to_ordinal(*(int(part) for part in value.split('-'))))
+        return date_batch.to_ordinal(value)
+
+    def _bounds(self, start, end):
+        self._sync()
+        lo = np.searchsorted(self._ordinals, self._ordinal(start), side='left')
+        hi = np.searchsorted(self._ordinals, self._ordinal(end), side='right')
+        return int(lo), int(hi)
+
+    def range(self, start, end):
+        """Returns [(date_key, events), ...] for the days in [start, end] that have events, in date order."""
+        lo, hi = self._bounds(start, end)
+        return list(zip(self._keys[lo:hi], self._events[lo:hi]))
+
+    def count(self, start, end):
+        """Number of days in [start, end] that have events."""
+        lo, hi = self._bounds(start, end)
+        return hi - lo
+
+    def next_non_empty(self, after):
+        """Key of the first day with events strictly after `after`, or None."""
+        self._sync()
+        i = int(np.searchsorted(self._ordinals, self._ordinal(after), side='right'))
+        return self._keys[i] if i < len(self._keys) else None
+
+    def previous_non_empty(self, before):
+        """Key of the last day with events strictly before `before`, or None."""
+        self._sync()
+        i = int(np.searchsorted(self._ordinals, self._ordinal(before), side='left'))
+        return self._keys[i - 1] if i > 0 else None
+
+    def month_counts(self, year):
+        """Number of days with events in each month of a Jalali year, as a list of 12 ints."""
+        self._sync()
+        starts = date_batch.jalali_to_ordinal(np.full(13, year) + (np.arange(13) == 12), np.arange(13) % 12 + 1, 1)
+        return np.diff(np.searchsorted(self._ordinals, starts, side='left')).tolist()
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+DAY_VIEW_CACHE_SIZE = 120 # About four months of days in each direction of travel
+
+EVENTS_READY = "ready"       # event_text holds the cached events
+EVENTS_MISSING = "missing"   # Not cached yet; the day should be fetched when it is shown
+EVENTS_OFFLINE = "offline"   # Fetch failed recently and is waiting for its retry
+
+
+class DayView:
+    """
+    Fully formatted text of one day as shown by the calendar widget.
+
+    The date lines depend only on the day and display mode and never go stale;
+    the event and next-holiday lines are tied to the EventStore version they were
+    built from and are rebuilt when the store has changed since.
+    """
+    __slots__ = ("date_text", "sub_text", "holiday_date", "event_text", "holiday_text", "event_state", "store_version")
+
+    def __init__(self, date_text, sub_text, holiday_date=None):
+        self.date_text = date_text
+        self.sub_text = sub_text  # None in compact mode
+        self.holiday_date = holiday_date # Next official holiday after the day (not in compact mode)
+        self.holiday_text = None  # Built with the event line, since it names the holiday's cached events
+        self.event_text = None
+        self.event_state = None
+        self.store_version = None
+
+
+class DayViewCache:
+    """LRU map of render keys (date key, compact mode, scheme, font size) to DayView objects."""
+
+    def __init__(self, max_size=DAY_VIEW_CACHE_SIZE):
+        self.max_size = max_size
+        self._views = OrderedDict()
+
+    def get(self, key):
+        view = self._views.get(key)
+        if view is not None:
+            self._views.move_to_end(key)
+        return view
+
+    def put(self, key, view):
+        self._views[key] = view
+        self._views.move_to_end(key)
+        while len(self._views) > self.max_size:
+            self._views.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._views
+
+    def __len__(self):
+        return len(self._views)
+
+    def clear(self):
+        self._views.clear()
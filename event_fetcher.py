@@ -0,0 +1,308 @@
+import heapq
+import itertools
+import threading
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from event_store import date_key
+from events_api import EVENTS_API_HOST, fetch_day_events, fetch_year_events, plan_event_requests
+from http_session import set_host_limit
+
+DEFAULT_PREFETCH_CONCURRENCY = 6   # Parallel requests to the events API
+DEFAULT_REQUESTS_PER_SECOND = 8.0  # Sustained request rate allowed towards the events API (bursts of twice that)
+MAX_PREFETCH_CONCURRENCY = 16
+
+ON_SCREEN_PRIORITY = 10 # Queue priority of the day the user is looking at, ahead of any prefetch
+PREFETCH_PRIORITY = 0
+
+
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` acquisitions per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks the calling (worker) thread until a token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+class _WorkerPool:
+    """
+    Priority job queue served by up to `max_threads` daemon threads; higher
+    priorities run first. The threads are daemons so a request still waiting on
+    a slow server never holds up application exit (a QThreadPool would be joined).
+    """
+
+    def __init__(self, max_threads=1):
+        self._queue = [] # Heap of (-priority, order, job)
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._max_threads = max_threads
+        self._threads = 0
+        self._busy = 0
+
+    def setMaxThreadCount(self, max_threads):
+        with self._condition:
+            self._max_threads = max_threads
+            self._spawn_if_needed()
+            self._condition.notify_all() # Surplus threads exit once idle
+
+    def start(self, job, priority=0):
+        with self._condition:
+            heapq.heappush(self._queue, (-priority, next(self._order), job))
+            self._spawn_if_needed()
+            self._condition.notify()
+
+    def clear(self):
+        """Drops the jobs that have not started yet."""
+        with self._condition:
+            self._queue.clear()
+
+    def _spawn_if_needed(self):
+        # Called with the condition held
+        while self._threads < self._max_threads and self._threads - self._busy < len(self._queue):
+            self._threads += 1
+            threading.Thread(target=self._work, name="EventFetcher", daemon=True).start()
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._queue and self._threads <= self._max_threads:
+                    self._condition.wait()
+                if self._threads > self._max_threads:
+                    self._threads -= 1
+                    return
+                job = heapq.heappop(self._queue)[2]
+                self._busy += 1
+            try:
+                job.run()
+            except Exception as e:
+                print(f"Event fetch job failed: {e}")
+            finally:
+                with self._condition:
+                    self._busy -= 1
+
+
+class _FetchSignals(QObject):
+    """
+    Signals the jobs report through. It has no parent and the jobs hold on to
+    it, so a job that finishes after the EventFetcher is gone still emits on a
+    live object; the fetcher's connections die with the fetcher. `closed` is set
+    on shutdown and stops the jobs from reporting at all.
+    """
+    events_fetched = pyqtSignal(object)
+    events_failed = pyqtSignal(object, str)
+    job_done = pyqtSignal(int, object, int) # Batch id, planned days, whole year (0 for day requests)
+
+    def __init__(self):
+        super().__init__()
+        self.closed = False
+
+
+class _FetchJob:
+    """
+    One API request on a worker thread: a single day, or a whole year when `day` is None.
+    The outcome is reported through the fetcher's _FetchSignals.
+    """
+
+    def __init__(self, fetcher, batch_id, date_strs, year, month=None, day=None):
+        self.signals = fetcher._signals
+        self.rate_limiter = fetcher.rate_limiter
+        self.cancelled_batches = fetcher._cancelled_batches
+        self.batch_id = batch_id
+        self.date_strs = date_strs # Days this request was planned to cover
+        self.year, self.month, self.day = year, month, day
+
+    def _cancelled(self):
+        return self.signals.closed or self.batch_id in self.cancelled_batches
+
+    def run(self):
+        # A cancelled batch's queued jobs still run, but return without touching the network
+        if not self._cancelled():
+            self.rate_limiter.acquire()
+        if self._cancelled():
+            if not self.signals.closed:
+                self.signals.job_done.emit(self.batch_id, self.date_strs, self.year if self.day is None else 0)
+            return
+        try:
+            if self.day is None:
+                events_by_date = fetch_year_events(self.year)
+            else:
+                events_by_date = {self.date_strs[0]: fetch_day_events(self.year, self.month, self.day)}
+        except Exception as e: # Network errors, HTTP errors, bad JSON, ...
+            if not self.signals.closed:
+                self.signals.events_failed.emit(self.date_strs, str(e))
+        else:
+            # Planned days a year response left out (truncated, or dropped as malformed) failed; they are retried with backoff
+            uncovered = [key for key in self.date_strs if key not in events_by_date]
+            if not self.signals.closed:
+                self.signals.events_fetched.emit(events_by_date)
+                if uncovered:
+                    self.signals.events_failed.emit(uncovered, f"year {self.year} response left out {len(uncovered)} planned day(s)")
+        if not self.signals.closed:
+            self.signals.job_done.emit(self.batch_id, self.date_strs, self.year if self.day is None else 0)
+
+
+class _Batch:
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.date_strs = [] # Days covered by the batch's jobs
+        self.years = []     # Years requested whole
+
+
+class EventFetcher(QObject):
+    """
+    Runs event API requests on a bounded pool of background threads so the GUI never blocks on the network.
+
+    Missing days are planned with plan_event_requests(): a year with many
+    missing days becomes one ?year= request, scattered gaps become per-day
+    requests. Every request goes through a shared token bucket, so requests run
+    `concurrency` at a time without exceeding the configured request rate.
+
+    Requests are submitted in batches; results arrive through events_fetched
+    ({"YYYY-MM-DD": [events]}) and events_failed, progress through
+    batch_progress (in requests), and batch_finished tells the owner when to
+    commit the batch to disk. All signals are queued onto the GUI thread. A day
+    (or year) that is already being fetched is not requested again until its
+    result has arrived.
+
+    cancel_batch() drops the jobs of a batch that have not started their
+    request yet, e.g. the on-screen fetch of a day the user has already moved
+    past. Cancelled days can be requested again right away.
+    """
+    events_fetched = pyqtSignal(object)       # {"YYYY-MM-DD": list of event titles}
+    events_failed = pyqtSignal(object, str)   # ["YYYY-MM-DD", ...] that the failed request covered, error message
+    batch_progress = pyqtSignal(int, int, int) # batch id, requests done, requests in batch
+    batch_finished = pyqtSignal(int)          # batch id
+
+    def __init__(self, parent=None, concurrency=DEFAULT_PREFETCH_CONCURRENCY, requests_per_second=DEFAULT_REQUESTS_PER_SECOND):
+        super().__init__(parent)
+        self.pool = _WorkerPool()
+        self._signals = _FetchSignals()
+        self.rate_limiter = TokenBucket(requests_per_second, capacity=2 * requests_per_second)
+        self.set_concurrency(concurrency)
+        self._in_flight = {}          # "YYYY-MM-DD" of days with a request on the way -> batch id
+        self._years_in_flight = {}    # Years with a whole-year request on the way -> batch id
+        self._batches = {}
+        self._cancelled_batches = set() # Read from pool threads; only ever changed on the GUI thread
+        self._batch_ids = itertools.count(1)
+        self._signals.events_fetched.connect(self.events_fetched)
+        self._signals.events_failed.connect(self.events_failed)
+        self._signals.job_done.connect(self._on_job_done)
+
+    def set_concurrency(self, concurrency):
+        concurrency = max(1, min(MAX_PREFETCH_CONCURRENCY, int(concurrency)))
+        self.pool.setMaxThreadCount(concurrency)
+        set_host_limit(EVENTS_API_HOST, concurrency)
+
+    def _on_job_done(self, batch_id, date_strs, whole_year):
+        self._release(date_strs, [whole_year], batch_id)
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return
+        batch.done += 1
+        self.batch_progress.emit(batch_id, batch.done, batch.total)
+        if batch.done >= batch.total:
+            del self._batches[batch_id]
+            self._cancelled_batches.discard(batch_id)
+            self.batch_finished.emit(batch_id)
+
+    def _release(self, date_strs, years, batch_id):
+        # Only the batch that registered a day (or year) may release it; a cancelled one may have been re-requested since
+        for key in date_strs:
+            if self._in_flight.get(key) == batch_id:
+                del self._in_flight[key]
+        for year in years:
+            if self._years_in_flight.get(year) == batch_id:
+                del self._years_in_flight[year]
+
+    def is_cancelled(self, batch_id):
+        return batch_id in self._cancelled_batches
+
+    def cancel_batch(self, batch_id):
+        """Cancels the jobs of a batch that have not started their request yet. Unknown or finished batches are ignored."""
+        batch = self._batches.get(batch_id)
+        if batch is None or batch_id in self._cancelled_batches:
+            return
+        self._cancelled_batches.add(batch_id)
+        self._release(batch.date_strs, batch.years, batch_id)
+
+    def is_fetching(self, j_date):
+        return date_key(j_date) in self._in_flight or j_date.year in self._years_in_flight
+
+    def is_busy(self):
+        return bool(self._batches)
+
+    def fetch_day(self, j_date):
+        """Fetches one day ahead of any queued prefetch. Returns the batch id, or 0 if it is already being fetched."""
+        return self.fetch_days([j_date], priority=ON_SCREEN_PRIORITY)
+
+    def fetch_year(self, year):
+        """Fetches a whole Shamsi year with one request. Returns the batch id, or 0 if it is already being fetched."""
+        if year in self._years_in_flight:
+            return 0
+        return self._start_batch([year], [], PREFETCH_PRIORITY)
+
+    def fetch_days(self, j_dates, priority=PREFETCH_PRIORITY):
+        """
+        Plans and queues requests covering the given (missing) days as one batch.
+        Days already in flight are skipped. Returns the batch id, or 0 if there was nothing new to fetch.
+        """
+        wanted = [j_date for j_date in j_dates if not self.is_fetching(j_date)]
+        if not wanted:
+            return 0
+        years, days = plan_event_requests(wanted)
+        return self._start_batch(years, days, priority, wanted)
+
+    def _start_batch(self, years, days, priority, planned_days=()):
+        planned_by_year = {}
+        for j_date in planned_days:
+            planned_by_year.setdefault(j_date.year, []).append(date_key(j_date))
+
+        jobs = []
+        for year in years:
+            jobs.append(_FetchJob(self, 0, planned_by_year.get(year, []), year))
+        for j_date in days:
+            jobs.append(_FetchJob(self, 0, [date_key(j_date)], j_date.year, j_date.month, j_date.day))
+        if not jobs:
+            return 0
+
+        batch_id = next(self._batch_ids)
+        batch = _Batch(len(jobs))
+        batch.years = list(years)
+        self._batches[batch_id] = batch
+        for year in years:
+            self._years_in_flight[year] = batch_id
+        for job in jobs:
+            job.batch_id = batch_id
+            batch.date_strs.extend(job.date_strs)
+            for key in job.date_strs:
+                self._in_flight[key] = batch_id
+            self.pool.start(job, priority)
+        if years:
+            print(f"Event fetch batch {batch_id}: {len(years)} whole-year request(s) {years} and {len(days)} day request(s).")
+        return batch_id
+
+    def shutdown(self):
+        """
+        Drops queued jobs and silences running ones (called on application exit).
+        Requests still in flight are not waited for; their daemon threads end with the process.
+        """
+        self._signals.closed = True
+        self.pool.clear()
@@ -0,0 +1,169 @@
+import bisect
+import re
+
+from event_store import STATUS_OK, date_key
+
+# Persian text reaches the cache in several spellings (Arabic yeh/kaf, Arabic or
+# Persian digits, optional diacritics and tatweel). Both the indexed titles and
+# the queries are folded to one spelling before tokenizing.
+_CHAR_FOLDING = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ؤ': 'و',
+    **{chr(0x06F0 + d): str(d) for d in range(10)},  # Persian digits
+    **{chr(0x0660 + d): str(d) for d in range(10)},  # Arabic-Indic digits
+    **{chr(c): None for c in range(0x064B, 0x0660)},  # Harakat, shadda, sukun...
+    '\u0670': None,  # Superscript alef
+    '\u0640': None,  # Tatweel
+    '\u200d': None,  # ZWJ
+})
+ZWNJ = '\u200c'
+_WORD_RE = re.compile(r'[\w\u200c]+')
+
+
+def normalize_text(text):
+    """Folds Arabic/Persian letter variants, digits and diacritics to one spelling and lowercases Latin text."""
+    return text.translate(_CHAR_FOLDING).lower()
+
+
+def index_tokens(text):
+    """
+    Tokens a title is indexed under. A word written with a ZWNJ (نیمه‌شعبان) is
+    indexed both joined (نیمهشعبان) and as its parts (نیمه, شعبان), so it is found
+    however the query spaces it.
+    """
+    tokens = set()
+    for word in _WORD_RE.findall(normalize_text(text)):
+        parts = [part for part in word.split(ZWNJ) if part]
+        tokens.update(parts)
+        if len(parts) > 1:
+            tokens.add(''.join(parts))
+    return tokens
+
+
+def query_tokens(query):
+    """Tokens of a search query; ZWNJ inside a word is dropped, so the joined form is looked up."""
+    return [word.replace(ZWNJ, '') for word in _WORD_RE.findall(normalize_text(query)) if word.strip(ZWNJ)]
+
+
+class EventIndex:
+    """
+    Inverted index over the event titles of an EventStore: normalized token ->
+    sorted list of "YYYY-MM-DD" keys of the days that mention it.
+
+    The index follows the store lazily. sync() (called by every query) compares
+    the store's entries with the entry objects it indexed and only re-tokenizes
+    days that were added, changed or dropped since, so it grows incrementally as
+    days are cached. Query tokens match words by prefix (عید finds عیدالفطر), all
+    tokens of a query must match, and results are cached until the store changes.
+    """
+
+    def __init__(self, event_store):
+        self.event_store = event_store
+        self._store_version = None
+        self._indexed = {}      # date key -> entry dict the day was indexed from
+        self._day_tokens = {}   # date key -> tokens of that day
+        self._postings = {}     # token -> sorted date keys
+        self._vocabulary = None # Sorted tokens for prefix lookups, rebuilt when tokens come or go
+        self._results = {}      # Normalized query -> sorted date keys
+        self._title_tokens = {} # Event title -> its tokens; most titles come back every year
+
+    def sync(self):
+        """Brings the index up to date with the store. Returns the number of re-indexed days."""
+        version = self.event_store.version
+        if version == self._store_version:
+            return 0
+        self._store_version = version
+        changed = 0
+        seen = 0
+        for key, entry in self.event_store.entries():
+            seen += 1
+            if self._indexed.get(key) is not entry:
+                self._remove_day(key)
+                self._add_day(key, entry)
+                changed += 1
+        if seen != len(self._indexed): # Days dropped by a reload from disk
+            current = {key for key, _ in self.event_store.entries()}
+            for key in [key for key in self._indexed if key not in current]:
+                self._remove_day(key)
+                del self._indexed[key]
+                changed += 1
+        if changed:
+            self._results.clear()
+        return changed
+
+    def _add_day(self, key, entry):
+        self._indexed[key] = entry
+        if entry["status"] != STATUS_OK or not entry["events"]:
+            return
+        tokens = set()
+        for title in entry["events"]:
+            title_tokens = self._title_tokens.get(title)
+            if title_tokens is None:
+                title_tokens = self._title_tokens[title] = frozenset(index_tokens(title))
+            tokens |= title_tokens
+        self._day_tokens[key] = tokens
+        for token in tokens:
+            keys = self._postings.get(token)
+            if keys is None:
+                self._postings[token] = [key]
+                self._vocabulary = None
+            else:
+                bisect.insort(keys, key)
+
+    def _remove_day(self, key):
+        for token in self._day_tokens.pop(key, ()):
+            keys = self._postings[token]
+            del keys[bisect.bisect_left(keys, key)]
+            if not keys:
+                del self._postings[token]
+                self._vocabulary = None
+
+    def _prefix_keys(self, prefix):
+        """Sorted date keys of the days that have a token starting with `prefix`."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        lo = bisect.bisect_left(self._vocabulary, prefix)
+        hi = bisect.bisect_left(self._vocabulary, prefix + '\U0010ffff')
+        if hi - lo == 1:
+            return self._postings[self._vocabulary[lo]]
+        keys = set()
+        for token in self._vocabulary[lo:hi]:
+            keys.update(self._postings[token])
+        return sorted(keys)
+
+    def search(self, query, start=None, end=None):
+        """
+        Returns the sorted date keys of the days whose events match every word of `query`,
+        optionally limited to [start, end] (jdatetime.date or "YYYY-MM-DD").
+        """
+        self.sync()
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        cache_key = ' '.join(tokens)
+        keys = self._results.get(cache_key)
+        if keys is None:
+            matches = sorted((self._prefix_keys(token) for token in tokens), key=len)
+            if len(matches) == 1:
+                keys = list(matches[0])
+            else:
+                common = set(matches[0]).intersection(*matches[1:])
+                keys = [key for key in matches[0] if key in common]
+            self._results[cache_key] = keys
+        if start is None and end is None:
+            return keys
+        lo = bisect.bisect_left(keys, date_key(start)) if start is not None else 0
+        hi = bisect.bisect_right(keys, date_key(end)) if end is not None else len(keys)
+        return keys[lo:hi]
+
+    def next_occurrence(self, query, after):
+        """First matching day strictly after `after` (jdatetime.date or key), or None."""
+        keys = self.search(query)
+        i = bisect.bisect_right(keys, date_key(after))
+        return keys[i] if i < len(keys) else None
+
+    def previous_occurrence(self, query, before):
+        """Last matching day strictly before `before`, or None."""
+        keys = self.search(query)
+        i = bisect.bisect_left(keys, date_key(before))
+        return keys[i - 1] if i > 0 else None
@@ -0,0 +1,517 @@
+import bisect
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+# A failed fetch is remembered for NEGATIVE_CACHE_BASE_TTL seconds, doubling with
+# every further failed attempt up to NEGATIVE_CACHE_MAX_TTL. Successful entries never expire.
+NEGATIVE_CACHE_BASE_TTL = 5 * 60
+NEGATIVE_CACHE_MAX_TTL = 24 * 60 * 60
+
+# On-disk format: gzip'd JSON lines. The first line is a header
+# {"format": CACHE_FORMAT, "version": CACHE_FORMAT_VERSION}, every further line
+# is one day as ["YYYY-MM-DD", entry]. Files that do not start with the gzip
+# magic are read as the legacy pretty-printed JSON object.
+CACHE_FORMAT = "shamsical-events"
+CACHE_FORMAT_VERSION = 1
+CACHE_COMPRESS_LEVEL = 6
+LOCK_TIMEOUT = 10.0     # Seconds flush() waits for another process's write before giving up (and retrying later)
+REPLACE_RETRIES = 20    # Windows refuses to replace a file while a reader has it open; retried every 50 ms
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+class CacheFormatError(Exception):
+    """A cache file that cannot be (fully) read. `entries` holds what could be recovered from it."""
+
+    def __init__(self, message, entries=None):
+        super().__init__(message)
+        self.entries = entries or {}
+
+
+class NewerCacheFormatError(CacheFormatError):
+    """A cache file written by a newer version of the app."""
+
+
+def date_key(j_date):
+    """Returns the "YYYY-MM-DD" cache key for a jdatetime.date (or passes a key string through)."""
+    if isinstance(j_date, str):
+        return j_date
+    return f"{j_date.year:04d}-{j_date.month:02d}-{j_date.day:02d}"
+
+
+def parse_date_key(key):
+    """Returns (year, month, day) ints for a "YYYY-MM-DD" cache key."""
+    year, month, day = key.split('-')
+    return int(year), int(month), int(day)
+
+
+def _normalize_entry(value):
+    """
+    Converts a stored cache value to an entry dict. Older caches stored a bare
+    list of events, which is read as a successful fetch of unknown age.
+    """
+    if isinstance(value, list):
+        return {"status": STATUS_OK, "events": value, "fetched_at": 0}
+    if isinstance(value, dict) and value.get("status") in (STATUS_OK, STATUS_ERROR):
+        return value
+    return None
+
+
+def _check_header(line):
+    header = json.loads(line or 'null')
+    if not isinstance(header, dict) or header.get("format") != CACHE_FORMAT:
+        raise CacheFormatError("not an events cache")
+    if header.get("version", 0) > CACHE_FORMAT_VERSION:
+        raise NewerCacheFormatError(f"written by a newer version (format version {header['version']})")
+
+
+_READ_ERRORS = (OSError, EOFError, zlib.error, UnicodeDecodeError, ValueError, TypeError)
+
+
+def _read_jsonl_gz(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        header_line, _, body = gzip.decompress(data).decode('utf-8').partition('\n')
+        _check_header(header_line)
+        # All days in one json.loads call; much faster than one call per line
+        return dict(json.loads('[' + body.rstrip('\n').replace('\n', ',') + ']'))
+    except CacheFormatError:
+        raise
+    except _READ_ERRORS:
+        return _recover_jsonl_gz(path)
+
+
+def _recover_jsonl_gz(path):
+    """Reads a damaged file line by line and raises CacheFormatError with every day before the damage."""
+    entries = {}
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            _check_header(f.readline())
+            for line in f:
+                key, value = json.loads(line)
+                entries[key] = value
+    except CacheFormatError:
+        raise
+    except _READ_ERRORS as e:
+        raise CacheFormatError(str(e) or type(e).__name__, entries)
+    raise CacheFormatError("damaged", entries)
+
+
+def _read_legacy_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache_data = json.load(f)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise CacheFormatError(str(e))
+    if not isinstance(cache_data, dict):
+        raise CacheFormatError("not a JSON object")
+    return cache_data
+
+
+def read_cache_file(path):
+    """
+    Reads an events cache file in either format and returns its raw {key: value} dict.
+    Raises OSError if it cannot be opened, CacheFormatError if it is damaged or unknown.
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(2)
+    if magic == _GZIP_MAGIC:
+        return _read_jsonl_gz(path)
+    return _read_legacy_json(path)
+
+
+def _new_file_mode(path):
+    """Permissions for a rewrite of `path`: those of the existing file, else what open() would give a new one."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0) # Reading the umask means setting it; put it straight back
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_cache_file(path, entries):
+    """
+    Writes `entries` ({key: entry}, written in key order) to `path` in the current format.
+    The file is written to a temporary file next to it and renamed over it, so
+    `path` always holds either the old or the new complete cache.
+    """
+    lines = [json.dumps({"format": CACHE_FORMAT, "version": CACHE_FORMAT_VERSION})]
+    lines.extend(json.dumps([key, entries[key]], ensure_ascii=False, separators=(',', ':')) for key in sorted(entries))
+    data = gzip.compress(('\n'.join(lines) + '\n').encode('utf-8'), compresslevel=CACHE_COMPRESS_LEVEL, mtime=0)
+    cache_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=cache_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, _new_file_mode(path)) # mkstemp creates the file 0600
+        for attempt in range(REPLACE_RETRIES):
+            try:
+                os.replace(temp_path, path)
+                break
+            except PermissionError:
+                if attempt == REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(0.05)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _lock_file(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+
+def _unlock_file(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def cache_write_lock(path, timeout=LOCK_TIMEOUT):
+    """
+    Exclusive cross-process lock for writing the cache file at `path`, held on
+    a `<path>.lock` file next to it. Readers do not take it: writes are atomic
+    renames, so a reader always sees a complete file. Raises TimeoutError if
+    another process holds the lock for longer than `timeout` seconds.
+    """
+    fd = os.open(path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                _lock_file(fd)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"{path} is locked by another process")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            _unlock_file(fd)
+    finally:
+        os.close(fd)
+
+
+def _merge_entry(ours, theirs):
+    """
+    The entry to keep when memory and the file both have a day: good data beats
+    a failure, otherwise the newer fetch wins (ours on a tie).
+    """
+    if theirs is None:
+        return ours
+    if ours["status"] != theirs["status"]:
+        return ours if ours["status"] == STATUS_OK else theirs
+    return theirs if theirs.get("fetched_at", 0) > ours.get("fetched_at", 0) else ours
+
+
+def retry_delay(attempts):
+    """Seconds to wait before re-fetching a day whose fetch has failed `attempts` times in a row."""
+    return min(NEGATIVE_CACHE_MAX_TTL, NEGATIVE_CACHE_BASE_TTL * (2 ** max(0, attempts - 1)))
+
+
+class EventStore:
+    """
+    In-memory view of the events cache file.
+
+    The file is parsed once and kept as a dict keyed by Jalali date string,
+    plus a sorted list of keys for range queries. The file is only re-read when
+    its modification time (or size) changes on disk, e.g. when another tool
+    rewrites it. Until the cache file exists, entries are read from
+    `legacy_file` (the old events_cache.json), and the first flush() migrates
+    them to the current format.
+
+    Writes are buffered: set(), upsert_many() and mark_failed() only touch
+    memory, and flush() writes the whole file once, atomically (see
+    write_cache_file()). The owner decides when to flush (timer, end of a bulk
+    job, shutdown). A damaged file is copied aside before anything overwrites
+    it, whatever could be read from it is kept, and a file from a newer app
+    version is never overwritten.
+
+    `bundle_file` is an optional read-only events file shipped with the app
+    (see build_events_bundle.py). Its days are layered under the cache: they
+    answer lookups until the cache has its own (newer) entry for the day, and
+    they are never copied into the cache file.
+
+    Several processes (widget instances, calendar_cli.py, batch jobs) can share
+    the file. flush() holds a cross-process lock while it re-reads the file,
+    merges it with memory and writes it, so concurrent writers add to each
+    other's days instead of overwriting them. Reads take no lock.
+
+    Each day is stored as an entry dict with a status and a fetch timestamp:
+    {"status": "ok", "events": [...], "fetched_at": ts} is permanent, while
+    {"status": "error", "error": msg, "fetched_at": ts, "attempts": n} only
+    blocks re-fetching until retry_delay(n) has passed. A failure never
+    replaces good data.
+    """
+
+    def __init__(self, cache_file, legacy_file=None, bundle_file=None):
+        self.cache_file = cache_file
+        self.legacy_file = legacy_file
+        self.bundle_file = bundle_file
+        self._bundle = None     # Entries of bundle_file, loaded on first use
+        self._events = {}       # "YYYY-MM-DD" -> entry dict (see class docstring)
+        self._sorted_keys = []  # Sorted view of self._events keys ("YYYY-MM-DD" sorts chronologically)
+        self._file_signature = None # (mtime_ns, size) of the file we last loaded or wrote
+        self._pending = {}      # Entries changed in memory since the last flush()
+        self._version = 0       # Bumped on every change to the in-memory entries
+        self._rewrite_needed = False # File must be rewritten even without pending entries (migration, recovery)
+        self._read_only = False      # File is from a newer app version; keep it as it is
+
+    def _source_file(self):
+        """The file entries are read from: the cache file, or the legacy cache while the cache file does not exist yet."""
+        if self.legacy_file and not os.path.exists(self.cache_file) and os.path.exists(self.legacy_file):
+            return self.legacy_file
+        return self.cache_file
+
+    def _current_file_signature(self):
+        path = self._source_file()
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (path, st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _load_bundle(self):
+        self._bundle = {}
+        if not self.bundle_file or not os.path.exists(self.bundle_file):
+            return
+        try:
+            bundle_data = read_cache_file(self.bundle_file)
+        except (OSError, CacheFormatError) as e:
+            print(f"Error loading bundled events {self.bundle_file}: {e}")
+            return
+        for key, value in bundle_data.items():
+            entry = _normalize_entry(value)
+            if entry is not None and entry["status"] == STATUS_OK:
+                self._bundle[key] = entry
+                self._events[key] = _merge_entry(self._events[key], entry) if key in self._events else entry
+        self._sorted_keys = sorted(self._events)
+        self._version += 1
+
+    def _refresh_if_changed(self):
+        if self._bundle is None:
+            self._load_bundle()
+        signature = self._current_file_signature()
+        if signature == self._file_signature:
+            return
+        self._file_signature = signature
+        if signature is None: # File was removed, keep what we have in memory
+            return
+        path = signature[0]
+        try:
+            cache_data = read_cache_file(path)
+        except NewerCacheFormatError as e:
+            print(f"Warning: Events cache {path} was {e}. Using it read-only in this session.")
+            self._read_only = True
+            return
+        except CacheFormatError as e:
+            backup = self._preserve_damaged_file(path)
+            print(f"Error loading events cache {path}: {e}. Kept {len(e.entries)} readable days"
+                  + (f", the damaged file was copied to {backup}." if backup else "."))
+            cache_data = e.entries
+            self._rewrite_needed = True # Write the merged cache back on the next flush
+        except OSError as e:
+            print(f"Error loading events cache {path}: {e}")
+            return
+        entries = {}
+        for key, value in cache_data.items():
+            entry = _normalize_entry(value)
+            if entry is not None:
+                entries[key] = entry
+        if path != self.cache_file:
+            self._rewrite_needed = True # Migrate the legacy file on the next flush
+        # Merge with memory: a reload never drops a day cached here, and for days on both
+        # sides good data beats a failure and the newer fetch wins (see _merge_entry())
+        for key, entry in self._events.items():
+            merged = entries[key] = _merge_entry(entry, entries.get(key))
+            if key in self._pending:
+                self._pending[key] = merged
+        self._events = entries
+        self._sorted_keys = sorted(entries)
+        self._version += 1
+
+    @staticmethod
+    def _preserve_damaged_file(path):
+        backup = f"{path}.damaged-{time.strftime('%Y%m%d-%H%M%S')}"
+        try:
+            shutil.copy2(path, backup)
+            return backup
+        except OSError as e:
+            print(f"Could not back up damaged events cache {path}: {e}")
+            return None
+
+    def get(self, j_date):
+        """Returns the cached event list for a date, or None if the date has no successful fetch cached."""
+        self._refresh_if_changed()
+        entry = self._events.get(date_key(j_date))
+        if entry is None or entry["status"] != STATUS_OK:
+            return None
+        return entry["events"]
+
+    def get_entry(self, j_date):
+        """Returns the raw entry dict for a date (successful or failed), or None if it was never fetched."""
+        self._refresh_if_changed()
+        return self._events.get(date_key(j_date))
+
+    def needs_fetch(self, j_date, now=None):
+        """True if the date has never been fetched, or its last fetch failed and the retry delay has passed."""
+        entry = self.get_entry(j_date)
+        if entry is None:
+            return True
+        if entry["status"] == STATUS_OK:
+            return False
+        now = time.time() if now is None else now
+        return now >= entry["fetched_at"] + retry_delay(entry.get("attempts", 1))
+
+    def failed_keys(self):
+        """Returns the keys of all days whose last fetch failed, in date order."""
+        self._refresh_if_changed()
+        return [key for key in self._sorted_keys if self._events[key]["status"] == STATUS_ERROR]
+
+    def next_retry_time(self):
+        """Returns the earliest wall-clock time at which a failed day becomes due for a retry, or None."""
+        self._refresh_if_changed()
+        due_times = [entry["fetched_at"] + retry_delay(entry.get("attempts", 1))
+                     for entry in self._events.values() if entry["status"] == STATUS_ERROR]
+        return min(due_times) if due_times else None
+
+    def __contains__(self, j_date):
+        """True if the date has a successful fetch cached."""
+        return self.get(j_date) is not None
+
+    def __len__(self):
+        self._refresh_if_changed()
+        return len(self._events)
+
+    def get_range(self, start_date, end_date):
+        """Returns [(date_key, events), ...] for every successfully cached day in [start_date, end_date], in date order."""
+        self._refresh_if_changed()
+        lo = bisect.bisect_left(self._sorted_keys, date_key(start_date))
+        hi = bisect.bisect_right(self._sorted_keys, date_key(end_date))
+        return [(key, self._events[key]["events"]) for key in self._sorted_keys[lo:hi]
+                if self._events[key]["status"] == STATUS_OK]
+
+    def entries(self):
+        """Returns a view of (date_key, entry dict) pairs for every cached day, successful or failed."""
+        self._refresh_if_changed()
+        return self._events.items()
+
+    @property
+    def version(self):
+        """Change counter of the stored entries (including reloads from disk), for callers that cache derived data."""
+        self._refresh_if_changed()
+        return self._version
+
+    @property
+    def has_pending_writes(self):
+        return bool(self._pending) or self._rewrite_needed
+
+    def set(self, j_date, events_list):
+        """Stores the events for a single date in memory. Call flush() to persist."""
+        self.upsert_many({date_key(j_date): events_list})
+
+    def upsert_many(self, entries):
+        """
+        Stores many successfully fetched days at once. `entries` is a dict (or iterable of pairs)
+        mapping jdatetime.date or "YYYY-MM-DD" keys to event lists. Call flush() to persist.
+        """
+        if isinstance(entries, dict):
+            entries = entries.items()
+        now = time.time()
+        self._store_entries((key, {"status": STATUS_OK, "events": events_list, "fetched_at": now})
+                            for key, events_list in entries)
+
+    def mark_failed(self, j_dates, error_message):
+        """
+        Records a failed fetch for the given days so they are retried with exponential backoff.
+        Days that already have good data keep it. Call flush() to persist.
+        """
+        self._refresh_if_changed()
+        now = time.time()
+        failed = []
+        for j_date in j_dates:
+            key = date_key(j_date)
+            previous = self._events.get(key)
+            if previous is not None and previous["status"] == STATUS_OK:
+                continue
+            attempts = previous.get("attempts", 1) + 1 if previous is not None else 1
+            failed.append((key, {"status": STATUS_ERROR, "error": error_message, "fetched_at": now, "attempts": attempts}))
+        self._store_entries(failed)
+
+    def _store_entries(self, entries):
+        self._refresh_if_changed()
+        new_keys = False
+        for j_date, entry in entries:
+            key = date_key(j_date)
+            if key not in self._events:
+                new_keys = True
+            self._events[key] = entry
+            self._pending[key] = entry
+            self._version += 1
+        if new_keys:
+            self._sorted_keys = sorted(self._events)
+
+    def flush(self):
+        """
+        Writes the cache file if there are buffered changes (or a migration). Returns True if a write happened.
+        Other processes may write the same file: under the write lock the file is re-read and merged
+        with memory first, so their days are kept along with ours.
+        """
+        self._refresh_if_changed() # Picks up a pending migration
+        if not self.has_pending_writes:
+            return False
+        try:
+            with cache_write_lock(self.cache_file):
+                self._refresh_if_changed() # Merge what other processes wrote since we last read the file
+                if not self._write():
+                    return False
+        except OSError as e:
+            print(f"Error saving to cache: {e}")
+            return False
+        self._pending.clear()
+        self._rewrite_needed = False
+        return True
+
+    def _write(self):
+        if self._read_only:
+            print(f"Not saving events cache: {self.cache_file} belongs to a newer version of the app.")
+            return False
+        try:
+            bundle = self._bundle or {}
+            write_cache_file(self.cache_file, {key: entry for key, entry in self._events.items()
+                                               if entry is not bundle.get(key)})
+        except OSError as e:
+            print(f"Error saving to cache: {e}")
+            return False
+        self._file_signature = self._current_file_signature()
+        return True
@@ -0,0 +1,133 @@
+from http_session import http_get
+
+# pnldev.com calendar API. With only ?year= it returns the whole Shamsi year,
+# with &month=&day= it returns a single day.
+EVENTS_API_HOST = "pnldev.com"
+EVENTS_API_URL = f"https://{EVENTS_API_HOST}/api/calender"
+DAY_REQUEST_TIMEOUT = (5, 10)  # (connect, read) seconds
+YEAR_REQUEST_TIMEOUT = (5, 30) # Larger response
+
+# Planner cost of one ?year= request, in single-day requests. A year is fetched
+# whole once more than this many of its days are missing from a wanted range.
+YEAR_REQUEST_COST = 5
+
+
+class EventsApiError(Exception):
+    """The API answered, but without usable data (status not true or malformed result)."""
+
+
+def _describe_api_error(data):
+    """Builds a printable status/message pair from an unsuccessful API response."""
+    if not isinstance(data, dict):
+        return "Unknown", f"API response was not a dictionary: {str(data)[:100]}"
+    status_val = str(data.get('status', 'N/A'))
+    error_msg = data.get('result', data.get('message', 'No result field or API status not true'))
+    if isinstance(error_msg, dict) and "message" in error_msg: # some APIs return error details in result.message
+        error_msg = error_msg["message"]
+    return status_val, str(error_msg)
+
+
+def parse_day_response(data, date_str):
+    """
+    Extracts the event list from a single-day API response. Raises EventsApiError if the
+    response is unsuccessful, so that a failure is never mistaken for a day without events.
+    """
+    if isinstance(data, dict) and data.get("status") is True and isinstance(data.get("result"), dict):
+        events_list = data["result"].get("event", [])
+        if not isinstance(events_list, list):
+            print(f"  Events data for {date_str} is not a list: {events_list}. Treating as no events.")
+            events_list = []
+        return events_list
+    status_val, error_msg = _describe_api_error(data)
+    raise EventsApiError(f"Failed to parse events for {date_str}. API Status: {status_val}. Message: '{error_msg}'")
+
+
+def fetch_day_events(year, month, day):
+    """
+    Fetches the events of one Shamsi day. Blocking; call it off the GUI thread.
+    Raises requests.exceptions.RequestException, ValueError (bad JSON) or EventsApiError on failure.
+    """
+    date_str = f"{year:04d}-{month:02d}-{day:02d}"
+    response = http_get(EVENTS_API_URL, params={'year': year, 'month': month, 'day': day}, timeout=DAY_REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return parse_day_response(response.json(), date_str)
+
+
+def parse_year_response(data, year):
+    """
+    Extracts {"YYYY-MM-DD": [events]} from a whole-year API response (result -> month -> day -> details).
+    Malformed months or days are skipped. Raises EventsApiError if the response is unsuccessful.
+    """
+    if not (isinstance(data, dict) and data.get("status") is True and "result" in data):
+        status_val, error_msg = _describe_api_error(data)
+        raise EventsApiError(f"Failed to parse events for year {year}. API Status: {status_val}. Message: '{error_msg}'")
+
+    year_data = data["result"]
+    if not isinstance(year_data, dict): # Ensure year_data is a dictionary (months)
+        raise EventsApiError(f"Expected year_data to be a dictionary for year {year}, got {type(year_data)}. API response: {str(year_data)[:100]}")
+
+    year_events = {}
+    for month_str, month_data in year_data.items():
+        if not isinstance(month_data, dict): # Skip if month_data is not a dictionary of days
+            print(f"  Skipping non-dict month_data for month {month_str} in year {year}. Value: {month_data}")
+            continue
+        for day_str, day_details in month_data.items():
+            if not isinstance(day_details, dict): # Skip if day_details is not a dictionary
+                print(f"  Skipping non-dict day_details for {year}-{month_str}-{day_str}. Value: {day_details}")
+                continue
+
+            # Ensure 'solar' details are present to confirm it's a valid day entry
+            solar = day_details.get("solar")
+            if not isinstance(solar, dict) or not all(k in solar for k in ["year", "month", "day"]):
+                print(f"  Skipping entry for {year}-{month_str}-{day_str} due to missing or malformed solar details. Details: {solar}")
+                continue
+
+            try:
+                api_year, api_month, api_day = int(solar["year"]), int(solar["month"]), int(solar["day"])
+                # Verify that the year, month, day from API match our iteration context
+                if api_year != year or api_month != int(month_str) or api_day != int(day_str):
+                    print(f"  Data mismatch for {year}-{month_str}-{day_str}: API reported {api_year}-{api_month}-{api_day}. Skipping.")
+                    continue
+            except (ValueError, TypeError) as e:
+                print(f"  Error processing date for {year}-{month_str}-{day_str} from solar details {solar}: {e}")
+                continue
+
+            date_str = f"{api_year:04d}-{api_month:02d}-{api_day:02d}"
+            events_list = day_details.get("event", []) # Default to empty list if "event" key is missing
+            if not isinstance(events_list, list):
+                print(f"  Events data for {date_str} is not a list: {events_list}. Treating as no events.")
+                events_list = []
+            year_events[date_str] = events_list
+    return year_events
+
+
+def fetch_year_events(year):
+    """
+    Fetches every day of a Shamsi year in one request. Blocking; call it off the GUI thread.
+    Returns {"YYYY-MM-DD": [events]}; raises like fetch_day_events on failure.
+    """
+    response = http_get(EVENTS_API_URL, params={'year': year}, timeout=YEAR_REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return parse_year_response(response.json(), year)
+
+
+def plan_event_requests(missing_days, year_request_cost=YEAR_REQUEST_COST):
+    """
+    Chooses the cheapest set of API requests covering `missing_days` (jdatetime.date objects).
+
+    Missing days are grouped by Shamsi year. A year with more than
+    `year_request_cost` missing days is fetched with a single ?year= request,
+    the rest with per-day requests. Returns (years, days): a sorted list of
+    years to fetch whole and the list of days to fetch individually.
+    """
+    days_by_year = {}
+    for j_date in missing_days:
+        days_by_year.setdefault(j_date.year, []).append(j_date)
+
+    years, days = [], []
+    for year in sorted(days_by_year):
+        if len(days_by_year[year]) > year_request_cost:
+            years.append(year)
+        else:
+            days.extend(days_by_year[year])
+    return years, days
@@ -0,0 +1,85 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared HTTP transport for every network call in the app (calendar events, RSS
+# feeds, article pages). One requests.Session keeps a keep-alive connection pool
+# per host, so consecutive requests to the same server skip the TCP+TLS handshake.
+
+DEFAULT_TIMEOUT = (5, 15)       # (connect, read) seconds
+POOL_HOSTS = 10                 # Number of per-host connection pools kept alive
+POOL_CONNECTIONS_PER_HOST = 8   # Keep-alive connections kept per host (>= the event prefetch concurrency)
+DEFAULT_HOST_CONCURRENCY = 6    # Simultaneous requests allowed towards a single host
+RETRY_TOTAL = 2                 # Transparent retries for connection errors and 429/5xx answers
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+_session = None
+_session_lock = threading.Lock()
+_host_limits = {}      # host -> configured maximum of simultaneous requests
+_host_semaphores = {}  # host -> BoundedSemaphore enforcing that maximum
+_host_lock = threading.Lock()
+
+
+def get_session():
+    """Returns the process-wide pooled session, creating it on first use. Safe to call from any thread."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=RETRY_TOTAL,
+                    backoff_factor=RETRY_BACKOFF_FACTOR,
+                    status_forcelist=RETRY_STATUS_CODES,
+                    allowed_methods=frozenset(['GET', 'HEAD']),
+                    raise_on_status=False, # Hand the last response back; callers use raise_for_status()
+                )
+                adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_CONNECTIONS_PER_HOST, max_retries=retry)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers.update(DEFAULT_HEADERS)
+                _session = session
+    return _session
+
+
+def set_host_limit(host, max_concurrent):
+    """Caps the number of simultaneous requests to `host` (e.g. "pnldev.com"). Applies to requests started afterwards."""
+    with _host_lock:
+        _host_limits[host] = max(1, int(max_concurrent))
+        _host_semaphores.pop(host, None)
+
+
+def _host_semaphore(url):
+    host = urlsplit(url).hostname or ''
+    with _host_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(_host_limits.get(host, DEFAULT_HOST_CONCURRENCY))
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+
+def http_get(url, params=None, timeout=DEFAULT_TIMEOUT, headers=None):
+    """
+    GETs `url` through the shared session, honouring the per-host concurrency limit.
+    Blocking; call it off the GUI thread. Raises requests.exceptions.RequestException on failure.
+    """
+    with _host_semaphore(url):
+        return get_session().get(url, params=params, timeout=timeout, headers=headers)
+
+
+def close_session():
+    """Closes pooled connections (called on application exit)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,223 @@
+from collections import OrderedDict
+
+from PyQt6.QtWidgets import QWidget, QSizePolicy
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPen
+from PyQt6.QtCore import Qt, QRectF, QSize, pyqtSignal
+
+import date_batch
+from date_index import holiday_mask
+from calendar_core import JALALI_MONTHS_FA, HIJRI_MONTHS_FA, GREGORIAN_MONTHS, WEEKDAY_INITIALS_FA
+
+
+GRID_ROWS = 6 # Fixed, so paging months never changes the widget size
+MONTH_TABLE_CACHE_SIZE = 24
+
+
+class MonthTable:
+    """
+    Everything needed to paint one Jalali month, built from a single batch conversion.
+    Per-day lists are indexed by day - 1. Event markers are refreshed separately with set_events().
+    """
+
+    def __init__(self, year, month):
+        self.year, self.month = year, month
+        first = int(date_batch.jalali_to_ordinal(year, month, 1))
+        days = date_batch.jalali_month_length(year, month)
+        batch = date_batch.convert_range(first, first + days) # One day past the month end, to find the last day of Safar
+        self.first_ordinal = first
+        self.first_weekday = int(batch.weekday[0])
+        self.date_keys = batch.date_keys()[:days]
+        self.gregorian_days = batch.g_day[:days].tolist()
+        self.hijri_days = batch.h_day[:days].tolist()
+
+        self.holidays = holiday_mask(batch)[:days].tolist() # Fridays and official holidays
+        self.has_events = [False] * days
+
+        self.title = f"{JALALI_MONTHS_FA[month - 1]} {year}"
+        self.subtitle = f"{self._span(batch.g_month[:days], batch.g_year[:days], GREGORIAN_MONTHS)}     ⬥     {self._span(batch.h_month[:days], batch.h_year[:days], HIJRI_MONTHS_FA)}"
+
+    @staticmethod
+    def _span(months, years, names):
+        if months[0] == 0: # Outside the conversion tables
+            return ""
+        first = f"{names[months[0] - 1]} {years[0]}"
+        last = f"{names[months[-1] - 1]} {years[-1]}"
+        if first == last:
+            return first
+        if years[0] == years[-1]:
+            return f"{names[months[0] - 1]} - {last}"
+        return f"{first} - {last}"
+
+    def set_events(self, event_range):
+        """Marks the days that have events, from EventDateIndex.range() output for this month."""
+        index_by_key = {key: i for i, key in enumerate(self.date_keys)}
+        self.has_events = [False] * len(self.date_keys)
+        for key, events in event_range:
+            if events and key in index_by_key:
+                self.has_events[index_by_key[key]] = True
+
+
+class MonthGridWidget(QWidget):
+    """
+    Month view of the calendar: every day of a Jalali month with its Gregorian and
+    Hijri day, holiday markers (Fridays and official holidays) and a dot under days
+    that have cached events.
+
+    Month tables are built with one batch conversion and one EventDateIndex range
+    query and kept in a small LRU cache, and cells are painted directly in
+    paintEvent, so paging to another month is a dict lookup plus one repaint.
+    """
+    date_clicked = pyqtSignal(int, int, int) # Jalali year, month, day
+
+    def __init__(self, date_index, parent=None):
+        super().__init__(parent)
+        self.date_index = date_index # date_index.EventDateIndex over the event store
+        self._tables = OrderedDict() # (year, month) -> MonthTable, least recently used first
+        self._table = None
+        self._selected_day = 0
+        self._today = None           # (year, month, day) of today, highlighted when visible
+        self._pressed_day = 0
+        self.text_color = QColor("white")
+        self.holiday_color = QColor(229, 115, 115)
+        self.highlight_color = QColor(0, 120, 215, 200)
+        self.set_fonts("Tahoma", 12)
+        self.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
+        self.setStyleSheet("background-color: transparent;")
+
+    def set_fonts(self, family, point_size):
+        self.day_font = QFont(family, point_size)
+        self.small_font = QFont(family, max(6, point_size * 5 // 10))
+        self.title_font = QFont(family, max(8, point_size * 8 // 10))
+        metrics = QFontMetrics(self.day_font)
+        self.cell_width = metrics.horizontalAdvance("88") * 2 + 12 # Room for the two small corner numbers
+        self.cell_height = metrics.height() + QFontMetrics(self.small_font).height() + 4
+        self.title_height = QFontMetrics(self.title_font).height() * 2 + 6
+        self.header_height = QFontMetrics(self.small_font).height() + 4
+        self.updateGeometry()
+        self.update()
+
+    def set_colors(self, text_color, highlight_color):
+        self.text_color = QColor(text_color)
+        self.highlight_color = QColor(highlight_color)
+        self.update()
+
+    def sizeHint(self):
+        return QSize(self.cell_width * 7, self.title_height + self.header_height + self.cell_height * GRID_ROWS)
+
+    def _get_table(self, year, month):
+        table = self._tables.get((year, month))
+        if table is None:
+            table = MonthTable(year, month)
+            self._tables[(year, month)] = table
+            if len(self._tables) > MONTH_TABLE_CACHE_SIZE:
+                self._tables.popitem(last=False)
+        else:
+            self._tables.move_to_end((year, month))
+        return table
+
+    def set_selected_date(self, j_date, today=None):
+        """Shows the month of `j_date` (a jdatetime.date) with that day selected."""
+        if today is not None:
+            self._today = (today.year, today.month, today.day)
+        table = self._get_table(j_date.year, j_date.month)
+        if table is not self._table:
+            self._table = table
+            self.refresh_events()
+        self._selected_day = j_date.day
+        self.update()
+
+    def displayed_month(self):
+        return (self._table.year, self._table.month) if self._table else None
+
+    def refresh_events(self):
+        """Re-reads the event markers of the displayed month (one range query)."""
+        if self._table is None:
+            return
+        self._table.set_events(self.date_index.range(self._table.first_ordinal, self._table.first_ordinal + len(self._table.date_keys) - 1))
+        self.update()
+
+    def _cell_rect(self, day):
+        index = self._table.first_weekday + day - 1
+        row, column = divmod(index, 7)
+        x = self.width() - (column + 1) * self.cell_width # Right to left, Saturday in the rightmost column
+        y = self.title_height + self.header_height + row * self.cell_height
+        return QRectF(x, y, self.cell_width, self.cell_height)
+
+    def _day_at(self, pos):
+        if self._table is None:
+            return 0
+        y = pos.y() - self.title_height - self.header_height
+        if y < 0:
+            return 0
+        column = int((self.width() - pos.x()) // self.cell_width)
+        row = int(y // self.cell_height)
+        day = row * 7 + column - self._table.first_weekday + 1
+        return day if 0 <= column < 7 and 1 <= day <= len(self._table.date_keys) else 0
+
+    def paintEvent(self, event):
+        if self._table is None:
+            return
+        table = self._table
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        dim_color = QColor(self.text_color)
+        dim_color.setAlpha(150)
+
+        painter.setFont(self.title_font)
+        painter.setPen(self.text_color)
+        title_line = self.title_height // 2
+        painter.drawText(QRectF(0, 0, self.width(), title_line), Qt.AlignmentFlag.AlignCenter, table.title)
+        painter.setFont(self.small_font)
+        painter.setPen(dim_color)
+        painter.drawText(QRectF(0, title_line, self.width(), title_line), Qt.AlignmentFlag.AlignCenter, table.subtitle)
+
+        for column, initial in enumerate(WEEKDAY_INITIALS_FA):
+            painter.setPen(self.holiday_color if column == 6 else dim_color)
+            painter.drawText(QRectF(self.width() - (column + 1) * self.cell_width, self.title_height, self.cell_width, self.header_height),
+                             Qt.AlignmentFlag.AlignCenter, initial)
+
+        is_today_month = self._today is not None and self._today[:2] == (table.year, table.month)
+        for day in range(1, len(table.date_keys) + 1):
+            rect = self._cell_rect(day)
+            i = day - 1
+            if day == self._selected_day:
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.setBrush(self.highlight_color)
+                painter.drawRoundedRect(rect.adjusted(1, 1, -1, -1), 4, 4)
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+            if is_today_month and day == self._today[2]:
+                painter.setPen(QPen(self.text_color, 1))
+                painter.drawRoundedRect(rect.adjusted(1, 1, -1, -1), 4, 4)
+
+            day_color = self.holiday_color if table.holidays[i] else self.text_color
+            day_rect = QRectF(rect.x(), rect.y() + 1, rect.width(), rect.height() - self.header_height)
+            painter.setFont(self.day_font)
+            painter.setPen(day_color)
+            painter.drawText(day_rect, Qt.AlignmentFlag.AlignCenter, str(day))
+
+            painter.setFont(self.small_font)
+            painter.setPen(dim_color)
+            bottom = QRectF(rect.x() + 5, rect.bottom() - self.header_height, rect.width() - 10, self.header_height - 2)
+            painter.drawText(bottom, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, str(table.gregorian_days[i]))
+            if table.hijri_days[i]:
+                painter.drawText(bottom, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, str(table.hijri_days[i]))
+            if table.has_events[i]:
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.setBrush(day_color)
+                painter.drawEllipse(QRectF(rect.center().x() - 2, bottom.center().y() - 2, 4, 4))
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.end()
+
+    def mousePressEvent(self, e):
+        self._pressed_day = self._day_at(e.position())
+        if self._pressed_day:
+            e.accept()
+        else:
+            e.ignore() # Let the parent window be dragged from the title area
+
+    def mouseReleaseEvent(self, e):
+        day = self._day_at(e.position())
+        if day and day == self._pressed_day:
+            self.date_clicked.emit(self._table.year, self._table.month, day)
+        self._pressed_day = 0
+        e.accept()
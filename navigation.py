@@ -0,0 +1,86 @@
+import time
+
+import jdatetime
+from PyQt6.QtCore import QObject, QTimer
+
+from date_batch import jalali_month_length
+
+NAVIGATION_FRAME_MS = 16 # Renders are coalesced to at most one per frame (~60 fps)
+
+
+class NavigationController(QObject):
+    """
+    Turns navigation input (day/month/year steps, jumps) into a single target day,
+    expressed like CalendarWidget.offset as days from today.
+
+    Requests only move the target. The first request after a quiet period is
+    rendered immediately; requests arriving within the following frame are
+    collapsed, and only the latest target is rendered when the frame ends. Key
+    repeat or rapid clicks therefore never queue more than one render per frame.
+
+    The controller also remembers the event fetches started for the day and the
+    month on screen (track_fetch()) and cancels them once the user has moved on
+    to another day or month, so skipped dates do not use up the request budget.
+    """
+
+    def __init__(self, fetcher, render, parent=None, frame_ms=NAVIGATION_FRAME_MS):
+        super().__init__(parent)
+        self.fetcher = fetcher
+        self.render = render          # Called with the target offset
+        self.target_offset = 0
+        self.rendered_offset = 0
+        self._last_render = 0.0       # time.monotonic() of the last render
+        self._view_fetches = {}       # "day" / "month" -> (key of what was on screen, fetch batch id)
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.setInterval(frame_ms)
+        self.frame_timer.timeout.connect(self._on_frame)
+
+    def target_date(self):
+        return jdatetime.date.today() + jdatetime.timedelta(days=self.target_offset)
+
+    def step_days(self, days):
+        self._request(self.target_offset + days)
+
+    def step_months(self, months):
+        """Moves the target by whole Jalali months, clamping the day to the target month's length."""
+        current = self.target_date()
+        month_index = current.month - 1 + months
+        year, month = current.year + month_index // 12, month_index % 12 + 1
+        self.go_to_date(jdatetime.date(year, month, min(current.day, jalali_month_length(year, month))))
+
+    def go_to_date(self, j_date):
+        self._request((j_date - jdatetime.date.today()).days)
+
+    def go_today(self):
+        self._request(0)
+
+    def _request(self, offset):
+        self.target_offset = offset
+        if self.frame_timer.isActive():
+            return # Rendered when the current frame ends
+        if time.monotonic() - self._last_render >= self.frame_timer.interval() / 1000:
+            self._render()
+        self.frame_timer.start()
+
+    def _on_frame(self):
+        if self.target_offset != self.rendered_offset:
+            self._render()
+            self.frame_timer.start() # Keep coalescing while input keeps coming
+
+    def _render(self):
+        self.rendered_offset = self.target_offset
+        self._last_render = time.monotonic()
+        self.render(self.target_offset)
+
+    def track_fetch(self, slot, key, batch_id):
+        """
+        Records what is on screen in `slot` ("day" or "month") and the fetch batch started for it, if any.
+        A fetch tracked for a different key is cancelled, since the user has moved past it.
+        """
+        previous = self._view_fetches.get(slot)
+        if previous is not None and previous[0] != key:
+            self.fetcher.cancel_batch(previous[1])
+            del self._view_fetches[slot]
+        if batch_id:
+            self._view_fetches[slot] = (key, batch_id)
@@ -6,6 +6,7 @@ from PyQt6.QtWidgets import (QApplication, QWidget, QTextEdit, QVBoxLayout,
 from PyQt6.QtCore import Qt, QSize, QPoint, pyqtSignal
 from PyQt6.QtGui import (QIcon, QAction, QTextCharFormat, QFont, 
                          QTextListFormat, QTextCursor, QMouseEvent, QColor)
+from theme_engine import scheme_hex, scheme_key_for, stylesheet, apply_stylesheet, ROLE_NOTE_MANAGER, ROLE_NOTE_EDITOR
 
 class ChecklistTextEdit(QTextEdit):
     UNCHECKED = "☐"
@@ -344,111 +345,36 @@ class TabbedNoteManager(QWidget):
 
     def apply_theme(self, scheme, boxed_style):
         # Note manager should always look 'boxed' as it's a floating panel.
-        bg_color = scheme['box_bg'].name(QColor.NameFormat.HexArgb)
-        border_color = scheme['box_border'].name(QColor.NameFormat.HexArgb)
-        text_color = scheme['box_text'].name(QColor.NameFormat.HexArgb)
-        hover_color = scheme['box_bg_hover'].name(QColor.NameFormat.HexArgb)
+        colors = scheme_hex(scheme_key_for(scheme))
         
         # Store the theme colors for later use
         self.current_theme = {
-            'bg_color': bg_color,
-            'border_color': border_color,
-            'text_color': text_color,
-            'hover_color': hover_color
+            'bg_color': colors['box_bg'],
+            'border_color': colors['box_border'],
+            'text_color': colors['box_text'],
+            'hover_color': colors['box_bg_hover']
         }
         
         # Make sure the background frame is visible
         self.background_frame.setVisible(True)
         
         # Apply theme to all editors in tabs
+        editor_style = stylesheet(scheme, True, ROLE_NOTE_EDITOR)
         for i in range(self.tab_widget.count()):
             editor = self.tab_widget.widget(i)
             if isinstance(editor, QTextEdit):
-                editor.setStyleSheet(f"background-color: {bg_color}; color: {text_color};")
+                apply_stylesheet(editor, editor_style)
         
-        style = f"""
-        #background_frame {{
-            background-color: {bg_color};
-            border: 1px solid {border_color};
-            border-radius: 8px;
-        }}
-        
-        /* Text edit and tab pane styling */
-        QTextEdit, QTabWidget::pane {{
-            background-color: {bg_color};
-            color: {text_color};
-            border: none;
-        }}
-        
-        /* Tab bar styling */
-        QTabBar::tab {{
-            background-color: {bg_color};
-            color: {text_color};
-            border: 1px solid {border_color};
-            border-bottom: none;
-            border-top-left-radius: 4px;
-            border-top-right-radius: 4px;
-            padding: 5px 10px;
-            margin-right: 2px;
-        }}
-        
-        QTabBar::tab:selected {{
-            background-color: {hover_color};
-            border-bottom: none;
-        }}
-        
-        QTabBar::tab:hover:!selected {{
-            background-color: {hover_color};
-        }}
-        
-        /* Toolbar styling */
-        QToolBar {{
-            background-color: transparent;
-            border: none;
-        }}
-        
-        QToolBar QToolButton {{
-            background-color: transparent;
-            border: none;
-            color: {text_color};
-            padding: 3px;
-            border-radius: 3px;
-        }}
-        
-        QToolBar QToolButton:hover {{
-            background-color: {hover_color};
-        }}
-        
-        QToolBar QToolButton:checked {{
-            background-color: {hover_color};
-            border: 1px solid {border_color};
-        }}
-        
-        /* Button styling */
-        QPushButton {{
-            color: {text_color};
-            background-color: transparent;
-            border: 1px solid {border_color};
-            padding: 4px 8px;
-            border-radius: 4px;
-        }}
-        
-        QPushButton:hover {{
-            background-color: {hover_color};
-        }}
-        """
-        
-        # Apply the stylesheet
-        self.setStyleSheet(style)
+        # Apply the stylesheet (compiled once per scheme by theme_engine)
+        apply_stylesheet(self, stylesheet(scheme, True, ROLE_NOTE_MANAGER))
         
         # Ensure the widget is visible and properly rendered
         self.update()
         
-        # Recreate shadow effect to ensure it's properly applied
-        if hasattr(self, 'shadow_effect'):
-            self.shadow_effect.deleteLater()
-        self.shadow_effect = self.shadow()
-        self.setGraphicsEffect(self.shadow_effect)
+        # The shadow does not depend on the scheme; create it once
+        if not hasattr(self, 'shadow_effect'):
+            self.shadow_effect = self.shadow()
+            self.setGraphicsEffect(self.shadow_effect)
 
     def shadow(self): # Utility for shadow effect
         s = QGraphicsDropShadowEffect()
@@ -0,0 +1,199 @@
+import json
+import mmap
+import os
+import random
+import sys
+
+import numpy as np
+
+# Quote collections read straight from a file instead of a list kept in QSettings.
+# QuoteFile maps the file and indexes where each quote starts in one numpy pass,
+# so a quote is read and parsed only when it is shown. ShuffleCursor walks the
+# indexes in a seeded pseudo-random order without building it, so picking the
+# next quote is O(1) and no quote comes back before all others have been shown.
+
+QUOTES_FILE = "quotes.json"
+BUNDLED_QUOTES = ":bundled" # Setting value naming the bundled quotes file, whose path changes between runs of the executable
+
+
+def bundled_quotes_path():
+    """Path of the quotes file shipped with the app (see build_exe.py), or None if there is none."""
+    if getattr(sys, "frozen", False):
+        base_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(sys.executable)))
+    else:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+    path = os.path.join(base_dir, QUOTES_FILE)
+    return path if os.path.exists(path) else None
+
+
+def _quote_text(value):
+    """Quote text of a decoded JSON value (a string, or an object with "text" / "quote" and optional "author"), or None."""
+    if isinstance(value, dict):
+        text = value.get("text") or value.get("quote")
+        if not isinstance(text, str) or not text.strip():
+            return None
+        author = value.get("author")
+        return f"{text} — {author}" if isinstance(author, str) and author else text
+    return value if isinstance(value, str) and value.strip() else None
+
+
+def _parse_line(line):
+    """
+    Quote text of one line, or None if the line holds none. A line is a JSON
+    string, a JSON object with "text" / "quote" (and optional "author"), or plain
+    text. Brackets, lone braces and trailing commas are ignored.
+    """
+    line = line.strip().rstrip(',').strip()
+    if not line or line in ('[', ']', '{', '}'):
+        return None
+    if line[0] in '"{':
+        try:
+            return _quote_text(json.loads(line))
+        except ValueError: # Not a JSON value on its own
+            return None
+    return line
+
+
+def _parse_element(text):
+    """Quote text of one element of a JSON array, or None."""
+    try:
+        return _quote_text(json.loads(text))
+    except ValueError:
+        return None
+
+
+_JSON_WHITESPACE = b' \t\r\n'
+
+
+def _index_json_array(data):
+    """
+    Byte ranges of the top-level elements of the JSON array in `data` (a uint8
+    numpy array), found in one vectorized scan: quotes not escaped by an odd run
+    of backslashes open and close strings, and brackets and braces outside
+    strings give the nesting depth, so the commas at depth 1 separate the
+    elements. Returns (starts, ends), or None if `data` is not a single array.
+    """
+    backslashes = np.flatnonzero(data == 0x5C)
+    quotes = np.flatnonzero(data == 0x22)
+    if len(backslashes) and len(quotes):
+        # Length of the run of backslashes ending at each backslash
+        run_starts = np.zeros(len(backslashes), dtype=np.int64)
+        breaks = np.flatnonzero(np.diff(backslashes) != 1) + 1
+        run_starts[breaks] = breaks
+        run_lengths = np.arange(1, len(backslashes) + 1) - np.maximum.accumulate(run_starts)
+        before = np.minimum(np.searchsorted(backslashes, quotes - 1), len(backslashes) - 1)
+        escaped = (backslashes[before] == quotes - 1) & (run_lengths[before] % 2 == 1)
+        quotes = quotes[~escaped]
+    if len(quotes) % 2:
+        return None
+
+    structural = np.flatnonzero((data == 0x5B) | (data == 0x5D) | (data == 0x7B) | (data == 0x7D) | (data == 0x2C))
+    structural = structural[np.searchsorted(quotes, structural) % 2 == 0] # Drop those inside strings
+    if not len(structural) or data[structural[0]] != 0x5B or bytes(data[:structural[0]]).strip(_JSON_WHITESPACE):
+        return None
+    chars = data[structural]
+    depth = np.cumsum(np.where((chars == 0x5B) | (chars == 0x7B), 1, np.where(chars == 0x2C, 0, -1)))
+    closed = np.flatnonzero(depth <= 0)
+    # The array must close exactly once, at the last structural character, with only whitespace after it
+    if len(closed) != 1 or closed[0] != len(structural) - 1 or depth[-1] != 0 or chars[-1] != 0x5D:
+        return None
+    if bytes(data[structural[-1] + 1:]).strip(_JSON_WHITESPACE):
+        return None
+
+    separators = structural[(chars == 0x2C) & (depth == 1)]
+    bounds = np.concatenate(([structural[0]], separators, [structural[-1]]))
+    starts, ends = bounds[:-1] + 1, bounds[1:]
+    if len(starts) == 1 and not bytes(data[starts[0]:ends[0]]).strip(_JSON_WHITESPACE): # []
+        return starts[:0], ends[:0]
+    return starts, ends
+
+
+class QuoteFile:
+    """
+    A quotes file, indexed by quote without reading the quotes themselves. A
+    JSON array (any layout: one line, one quote per line, or indented objects)
+    is indexed by element; any other file (JSON lines or plain text) by line.
+    Both indexes are built in one numpy pass over the mapped file, and
+    quote_file[i] parses quote i on demand, returning None where there is no
+    quote (blanks, bad JSON).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.size = size = os.fstat(f.fileno()).st_size
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        data = np.frombuffer(self._map, dtype=np.uint8) if size else np.zeros(0, dtype=np.uint8)
+        bom = 3 if bytes(data[:3]) == b'\xef\xbb\xbf' else 0
+        elements = _index_json_array(data[bom:]) if bytes(data[bom:bom + 64]).lstrip(_JSON_WHITESPACE).startswith(b'[') else None
+        if elements is not None:
+            self._starts, self._ends = elements[0] + bom, elements[1] + bom
+            self._parse = _parse_element
+        else:
+            newlines = np.flatnonzero(data == 0x0A)
+            self._starts = np.concatenate(([0], newlines + 1))
+            self._ends = np.concatenate((newlines, [size]))
+            if len(self._starts) > 1 and self._starts[-1] == size: # No line after a final newline
+                self._starts, self._ends = self._starts[:-1], self._ends[:-1]
+            self._parse = _parse_line
+        del data # The map cannot be closed while a numpy view of it is alive
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __getitem__(self, index):
+        raw = self._map[int(self._starts[index]):int(self._ends[index])]
+        return self._parse(raw.decode('utf-8', errors='replace').lstrip('\ufeff'))
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+
+class ShuffleCursor:
+    """
+    Visits every index in range(size) once, in an order fixed by `seed`, then
+    starts over with a new seed. The order is a keyed Feistel permutation over
+    the next power of four with cycle walking, so the cursor's whole state is
+    (seed, position) and nothing of size `size` is ever built.
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, size, seed=None, position=0):
+        self.size = size
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.position = position if 0 <= position <= size else 0
+        self._half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self._half_mask = (1 << self._half_bits) - 1
+
+    def _round(self, value, round_index):
+        h = (value * 0x9E3779B1 + self.seed + round_index * 0x85EBCA77) & 0xFFFFFFFF
+        h ^= h >> 15
+        h = (h * 0x2C1B3C6D) & 0xFFFFFFFF
+        h ^= h >> 12
+        return h & self._half_mask
+
+    def _permute(self, value):
+        left, right = value >> self._half_bits, value & self._half_mask
+        for round_index in range(self.ROUNDS):
+            left, right = right, left ^ self._round(right, round_index)
+        return (left << self._half_bits) | right
+
+    def index_at(self, position):
+        """Index visited at `position` of the current round."""
+        value = self._permute(position)
+        while value >= self.size: # Cycle walking: at most a few steps, the domain is under 4 * size
+            value = self._permute(value)
+        return value
+
+    def next(self):
+        """Next index, or None if size is 0."""
+        if not self.size:
+            return None
+        if self.position >= self.size:
+            self.seed = random.getrandbits(32)
+            self.position = 0
+        index = self.index_at(self.position)
+        self.position += 1
+        return index
@@ -3,27 +3,12 @@ from PyQt6.QtWidgets import (
     QLineEdit, QListWidget, QListWidgetItem, QDialogButtonBox, QDialog, QApplication, QComboBox,
     QTextEdit, QMessageBox, QInputDialog
 )
-# For DeepSeek API - ensure you have 'openai' installed: pip install openai
-from openai import OpenAI
 import requests
-from newspaper import Article, ArticleException
-import newspaper.extractors
-
-# Monkey-patch for a known bug in newspaper3k where a directory name is misspelled ('recources').
-# This can cause a FileNotFoundError when the library tries to access this directory.
-# See: https://github.com/codelucas/newspaper/issues/805
-try:
-    if hasattr(newspaper.extractors, 'RESOURCES_DIR') and 'recources' in newspaper.extractors.RESOURCES_DIR:
-        newspaper.extractors.RESOURCES_DIR = newspaper.extractors.RESOURCES_DIR.replace('recources', 'resources')
-except (AttributeError, ImportError):
-    # If the attribute or module doesn't exist, we assume it's not needed (e.g., fixed version).
-    pass
+from http_session import http_get
+from theme_engine import stylesheet, apply_stylesheet, ROLE_TEXT
 from PyQt6.QtGui import QFont, QColor, QDesktopServices, QAction, QPainter, QBrush, QPen
 from PyQt6.QtCore import Qt, QPoint, QSettings, QTimer, QUrl
-import feedparser
 import webbrowser
-import types
-from bs4 import BeautifulSoup
 
 # Assuming color_schemes and DEFAULT_FONT_FAMILY are accessible 
 # or will be passed/imported appropriately from the main widget.
@@ -31,6 +16,34 @@ from bs4 import BeautifulSoup
 
 DEFAULT_RSS_BOX_WIDTH_KEY = "متوسط"
 RSS_BOX_WIDTHS = {"باریک": 250, "متوسط": 350, "عریض": 450} # Width in pixels
+FEED_REQUEST_TIMEOUT = (5, 15)    # (connect, read) seconds
+ARTICLE_REQUEST_TIMEOUT = (5, 15)
+
+# feedparser, newspaper3k (with lxml), bs4 and openai take about a second to import
+# and the reader is hidden by default, so they are imported on first use: the first
+# feed fetch, the first summarize click. Python caches them after that.
+_article_tools = None
+
+
+def _load_article_tools():
+    """Returns (Article, ArticleException, BeautifulSoup), importing newspaper3k and bs4 on first call."""
+    global _article_tools
+    if _article_tools is None:
+        from newspaper import Article, ArticleException
+        import newspaper.extractors
+        from bs4 import BeautifulSoup
+
+        # Monkey-patch for a known bug in newspaper3k where a directory name is misspelled ('recources').
+        # This can cause a FileNotFoundError when the library tries to access this directory.
+        # See: https://github.com/codelucas/newspaper/issues/805
+        try:
+            if hasattr(newspaper.extractors, 'RESOURCES_DIR') and 'recources' in newspaper.extractors.RESOURCES_DIR:
+                newspaper.extractors.RESOURCES_DIR = newspaper.extractors.RESOURCES_DIR.replace('recources', 'resources')
+        except (AttributeError, ImportError):
+            # If the attribute or module doesn't exist, we assume it's not needed (e.g., fixed version).
+            pass
+        _article_tools = (Article, ArticleException, BeautifulSoup)
+    return _article_tools
 
 class RSSReaderWidget(QWidget):
     def __init__(self, parent_widget, settings, initial_font_pt, initial_boxed_style):
@@ -53,6 +66,7 @@ class RSSReaderWidget(QWidget):
         self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
         self.setMouseTracking(True)
         self.togetherai_api_token = self.settings.value("togetherai/api_token", "")
+        self._initial_fetch_pending = False # Saved feeds are refetched when the reader is first shown
 
         self._init_ui()
         self._load_rss_settings_and_feeds()
@@ -140,15 +154,15 @@ class RSSReaderWidget(QWidget):
         self.main_layout.addWidget(self.title_label)
         self.main_layout.addWidget(self.content_scroll_area, 1) # Stretch factor for content
 
-        # Only apply shadows if we're not in boxed mode
-        if not self.boxed_style and hasattr(self.parent_widget, 'shadow'):
+        # Shadows are created once and only enabled outside boxed mode (see apply_theme)
+        if hasattr(self.parent_widget, 'shadow'):
             for widget in [self.title_label, self.content_label, self.feed_source_label]:
                 widget.setGraphicsEffect(self.parent_widget.shadow())
         
         self.setLayout(self.main_layout)
 
     def _load_rss_settings_and_feeds(self):
-        loaded_feeds = self.settings.value("rss_widget/feeds_list", [])
+        loaded_feeds = self.settings.value("rss_widget/feeds_list", []) or [] # An empty list reads back as None from INI-backed settings
         self.feeds_data = []
         for feed in loaded_feeds:
             if not isinstance(feed, dict):
@@ -170,9 +184,22 @@ class RSSReaderWidget(QWidget):
         if not 0 <= self.current_feed_index < len(self.feeds_data):
             self.current_feed_index = 0
         
-        self.fetch_feed(self.current_feed_index, on_load=True)
+        # Show the items saved last session; the refetch waits until the reader is shown,
+        # so a hidden reader never loads the feed libraries during startup
+        self._initial_fetch_pending = True
+        self._update_display()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._initial_fetch_pending:
+            QTimer.singleShot(0, self._run_initial_fetch) # After the calendar has painted
+
+    def _run_initial_fetch(self):
+        if self._initial_fetch_pending:
+            self.fetch_feed(self.current_feed_index, on_load=True)
 
     def fetch_feed(self, feed_index, on_load=False):
+        self._initial_fetch_pending = False
         if not (0 <= feed_index < len(self.feeds_data)):
             self._update_display() # Show empty state
             return
@@ -190,7 +217,14 @@ class RSSReaderWidget(QWidget):
         QApplication.processEvents() # Ensure UI updates
 
         try:
-            parsed_feed = feedparser.parse(url)
+            import feedparser # Imported on the first fetch, see _load_article_tools
+            # Downloaded through the shared keep-alive session, feedparser only parses the bytes
+            response = http_get(url, timeout=FEED_REQUEST_TIMEOUT)
+            response.raise_for_status()
+            parsed_feed = feedparser.parse(response.content, response_headers={
+                'content-location': response.url,
+                'content-type': response.headers.get('Content-Type', ''),
+            })
             feed_info['items'] = []
             for entry in parsed_feed.entries:
                 title = entry.get('title', 'بدون عنوان')
@@ -371,46 +405,24 @@ class RSSReaderWidget(QWidget):
         self.save_settings()
 
     def apply_theme(self):
+        """Restyles the widget in place; feeds, items and the current position are kept."""
         if not self.parent_widget: return
-        # Assuming parent_widget has active_scheme_key and color_schemes
-        scheme = self.parent_widget.get_current_color_scheme()
-        was_visible = self.isVisible()
-        if was_visible: self.hide()
+        # Label shadows only outside boxed mode, and never in the calendar's low-cost mode
+        live_shadows = not self.boxed_style and not getattr(self.parent_widget, 'low_cost_rendering', False)
+        for widget in [self.feed_source_label, self.title_label, self.content_label]:
+            effect = widget.graphicsEffect()
+            if effect is not None:
+                effect.setEnabled(live_shadows)
 
-        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground, True)
-        self.setStyleSheet("") # Clear existing stylesheet
-
-        # Override paintEvent for background
-        def paintEvent(self, event):
-            painter = QPainter(self)
-            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-            if self.boxed_style:
-                bg_color = QColor(scheme.get('box_bg', scheme['widget_bg']))
-                border_color = QColor(scheme.get('box_border', scheme['menu_border']))
-                painter.setBrush(QBrush(bg_color))
-                painter.setPen(QPen(border_color, 1))
-                painter.drawRoundedRect(self.rect(), 6, 6)
-            else:
-                pass # Transparent in non-boxed
-            super(RSSReaderWidget, self).paintEvent(event)
-        self.paintEvent = types.MethodType(paintEvent, self)
-        
         # Style UI elements
-        text_color = scheme.get('box_text' if self.boxed_style else 'widget_text', scheme['widget_text'])
-        
-        # Style labels based on boxed mode
-        if self.boxed_style:
-            # In boxed mode, make all content containers and labels transparent
-            for widget in [self.feed_source_label, self.title_label, self.content_label]:
-                widget.setStyleSheet(f"color: {text_color.name(QColor.NameFormat.HexArgb)}; background-color: transparent; border: none; padding: 0px;")
-        else:
-            # In non-boxed mode, ensure labels have transparent backgrounds
-            for widget in [self.feed_source_label, self.title_label, self.content_label]:
-                widget.setStyleSheet(f"color: {text_color.name(QColor.NameFormat.HexArgb)}; background-color: transparent; border: none;")
+        # Labels are transparent in both modes; the text color follows the box style
+        label_style = stylesheet(self.parent_widget.active_scheme_key, self.boxed_style, ROLE_TEXT)
+        for widget in [self.feed_source_label, self.title_label, self.content_label]:
+            apply_stylesheet(widget, label_style)
         
         # Always make scroll areas transparent
-        self.content_scroll_area.setStyleSheet("background-color: transparent; border: none;")
-        self.content_scroll_area.viewport().setStyleSheet("background-color: transparent;")
+        apply_stylesheet(self.content_scroll_area, "background-color: transparent; border: none;")
+        apply_stylesheet(self.content_scroll_area.viewport(), "background-color: transparent;")
         
         # Apply font sizes
         font_size_title = self.font_pt
@@ -425,14 +437,23 @@ class RSSReaderWidget(QWidget):
         if hasattr(self.parent_widget, 'get_element_style'):
             btn_style = self.parent_widget.get_element_style(element_should_have_own_box=self.boxed_style, is_button=True)
             for btn in [self.refresh_button, self.prev_button, self.next_button, self.open_link_button, self.prev_feed_button, self.next_feed_button]:
-                btn.setStyleSheet(btn_style)
+                apply_stylesheet(btn, btn_style)
     
-        self.update()
-        self.repaint()
-        QApplication.processEvents()
-        if was_visible: self.show(); self.raise_()
+        self.update() # paintEvent draws the box
         self._ensure_proper_size()
 
+    def paintEvent(self, event):
+        if self.boxed_style and self.parent_widget:
+            scheme = self.parent_widget.get_current_color_scheme()
+            painter = QPainter(self)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setBrush(QBrush(QColor(scheme.get('box_bg', scheme['widget_bg']))))
+            painter.setPen(QPen(QColor(scheme.get('box_border', scheme['menu_border'])), 1))
+            painter.drawRoundedRect(self.rect(), 6, 6)
+            painter.end()
+        # Transparent in non-boxed mode
+        super().paintEvent(event)
+
     def update_display_settings(self, font_pt=None, boxed_style=None, width_key=None):
         if font_pt is not None:
             self.font_pt = font_pt
@@ -506,13 +527,20 @@ class RSSReaderWidget(QWidget):
         super().closeEvent(event)
 
     def _fetch_and_extract_article_text(self, url):
+        Article, ArticleException, BeautifulSoup = _load_article_tools()
         try:
-            # Configure the article object, disable memoization for fresh fetches if needed
-            # Newspaper3k uses requests internally, so User-Agent might be set by its defaults
-            # or can be configured if necessary.
+            # The page is downloaded once through the shared keep-alive session and handed to
+            # newspaper3k as input_html; the BeautifulSoup fallback reuses the same HTML.
+            response = http_get(url, timeout=ARTICLE_REQUEST_TIMEOUT)
+            response.raise_for_status()
+            try:
+                html_content = response.content.decode('utf-8')
+            except UnicodeDecodeError:
+                html_content = response.text
+
             # Disable article caching to prevent potential path errors with the cache.
             article = Article(url, language='en', memoize_articles=False) # Specify language, disable caching
-            article.download()
+            article.download(input_html=html_content)
             article.parse()
             
             # article.nlp() # Uncomment this if you want to use NLP features like keywords (requires nltk data)
@@ -522,15 +550,6 @@ class RSSReaderWidget(QWidget):
             if not article.text or article.text.strip() == "":
                 # Fallback to basic BeautifulSoup extraction if newspaper3k fails to get text
                 print(f"Newspaper3k failed to extract text from {url}. Falling back to manual parsing.")
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-                response = requests.get(url, headers=headers, timeout=15)
-                response.raise_for_status()
-                try:
-                    html_content = response.content.decode('utf-8')
-                except UnicodeDecodeError:
-                    html_content = response.text
                 soup = BeautifulSoup(html_content, 'html.parser')
                 for script_or_style in soup(['script', 'style']):
                     script_or_style.decompose()
@@ -641,6 +660,7 @@ class RSSReaderWidget(QWidget):
             return None, "کلید API برای Together.AI تنظیم نشده یا نامعتبر است."
         
         try:
+            from openai import OpenAI # Imported on the first summarize, see _load_article_tools
             client = OpenAI(api_key=self.togetherai_api_token, base_url="https://api.together.xyz/v1")
             response = client.chat.completions.create(
                 model="meta-llama/Llama-3.3-70B-Instruct-Turbo-Free", # Free model from Meta
@@ -0,0 +1,83 @@
+import datetime
+import time
+
+from PyQt6.QtCore import QCoreApplication, QObject, QTimer, Qt, pyqtSignal
+
+# Timers for wall-clock deadlines (the next quote change, the next local
+# midnight) instead of polling every minute. A QTimer counts monotonic time, which
+# on some systems stops during sleep and never follows clock changes, so a wait is
+# armed in chunks of at most MAX_WAIT_MS and the deadline is recomputed from the
+# wall clock on every wake-up and whenever the application becomes active again.
+
+MAX_WAIT_MS = 15 * 60 * 1000 # Longest single wait; bounds how late a deadline can fire after sleep or a clock change
+
+
+def next_local_midnight(now=None):
+    """Epoch seconds of the next local midnight after `now` (default: the current time)."""
+    today = datetime.date.fromtimestamp(time.time() if now is None else now)
+    return datetime.datetime.combine(today + datetime.timedelta(days=1), datetime.time()).timestamp()
+
+
+class WallClockTimer(QObject):
+    """
+    Single-shot timer for a wall-clock deadline. `deadline_func` returns the due
+    time in epoch seconds (or None for "nothing to wait for") and is called again
+    on every wake-up, so it can follow settings and clock changes. start() arms
+    the timer; once it has fired it stays idle until start() is called again.
+    """
+
+    timeout = pyqtSignal()
+
+    def __init__(self, deadline_func, parent=None):
+        super().__init__(parent)
+        self.deadline_func = deadline_func
+        self._active = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_wake)
+        app = QCoreApplication.instance()
+        if app is not None and hasattr(app, 'applicationStateChanged'):
+            app.applicationStateChanged.connect(self._on_application_state_changed)
+
+    def start(self):
+        self._active = True
+        self._arm()
+
+    def stop(self):
+        self._active = False
+        self._timer.stop()
+
+    def isActive(self):
+        return self._active
+
+    def remaining_seconds(self):
+        """Seconds until the deadline, or None if the timer is not armed."""
+        if not self._active:
+            return None
+        deadline = self.deadline_func()
+        return None if deadline is None else max(0.0, deadline - time.time())
+
+    def _arm(self):
+        remaining = self.remaining_seconds()
+        if remaining is None:
+            self._timer.stop()
+            return
+        wait_ms = min(int(remaining * 1000), MAX_WAIT_MS)
+        # Long waits only need to be roughly on time; the last stretch is timed precisely
+        self._timer.setTimerType(Qt.TimerType.VeryCoarseTimer if wait_ms >= 60 * 1000 else Qt.TimerType.PreciseTimer)
+        self._timer.start(wait_ms)
+
+    def _on_wake(self):
+        if not self._active:
+            return
+        deadline = self.deadline_func()
+        if deadline is not None and time.time() >= deadline:
+            self._active = False
+            self.timeout.emit()
+        else:
+            self._arm()
+
+    def _on_application_state_changed(self, state):
+        # Waking from sleep usually reactivates the app; check the deadline right away
+        if self._active and state == Qt.ApplicationState.ApplicationActive:
+            self._on_wake()
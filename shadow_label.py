@@ -0,0 +1,74 @@
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtGui import QColor, QImage, QPainter, QPixmap
+from PyQt6.QtCore import Qt, QPoint, QRectF
+
+SHADOW_COLOR = QColor(0, 0, 0, 100)  # Same look as CalendarWidget.shadow()
+SHADOW_OFFSET = QPoint(1, 1)
+SHADOW_SPREAD = 2                     # Pixels of the cheap box blur around each glyph
+
+
+class ShadowTextLabel(QLabel):
+    """
+    QLabel that can draw its own drop shadow from a cached pixmap.
+
+    QGraphicsDropShadowEffect re-renders the label offscreen and blurs it on
+    every repaint. Here the text is drawn once in the shadow color and softened
+    with a small box blur; the pixmap is kept until the text, font, size or
+    stylesheet change, so a repaint costs one drawPixmap on top of the normal
+    label painting. Meant for plain-text labels.
+    """
+
+    def __init__(self, text="", parent=None):
+        super().__init__(text, parent)
+        self._cached_shadow = False
+        self._shadow_pixmap = None
+        self._shadow_key = None
+
+    def set_cached_shadow(self, enabled):
+        if enabled != self._cached_shadow:
+            self._cached_shadow = enabled
+            self._shadow_pixmap = None
+            self._shadow_key = None
+            self.update()
+
+    def _current_shadow_key(self):
+        return (self.text(), self.width(), self.height(), self.font().key(), self.styleSheet(), self.devicePixelRatioF())
+
+    def _build_shadow(self):
+        dpr = self.devicePixelRatioF()
+        # Glyph coverage of the label's text, laid out the way QLabel lays out plain text
+        source = QImage(int(self.width() * dpr), int(self.height() * dpr), QImage.Format.Format_ARGB32_Premultiplied)
+        source.setDevicePixelRatio(dpr)
+        source.fill(Qt.GlobalColor.transparent)
+        flags = self.alignment()
+        if self.wordWrap():
+            flags |= Qt.AlignmentFlag(Qt.TextFlag.TextWordWrap.value)
+        painter = QPainter(source)
+        painter.setFont(self.font())
+        painter.setPen(QColor(SHADOW_COLOR.red(), SHADOW_COLOR.green(), SHADOW_COLOR.blue()))
+        painter.drawText(QRectF(self.contentsRect()), flags, self.text())
+        painter.end()
+
+        # Cheap box blur: the coverage drawn at every offset within SHADOW_SPREAD, at low opacity
+        shadow = QPixmap(source.size())
+        shadow.setDevicePixelRatio(dpr)
+        shadow.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(shadow)
+        taps = (2 * SHADOW_SPREAD + 1) ** 2
+        painter.setOpacity(min(1.0, SHADOW_COLOR.alphaF() * 3 / taps))
+        for dx in range(-SHADOW_SPREAD, SHADOW_SPREAD + 1):
+            for dy in range(-SHADOW_SPREAD, SHADOW_SPREAD + 1):
+                painter.drawImage(QPoint(dx, dy), source)
+        painter.end()
+        return shadow
+
+    def paintEvent(self, event):
+        if self._cached_shadow:
+            key = self._current_shadow_key()
+            if key != self._shadow_key:
+                self._shadow_pixmap = self._build_shadow()
+                self._shadow_key = key
+            painter = QPainter(self)
+            painter.drawPixmap(SHADOW_OFFSET, self._shadow_pixmap)
+            painter.end()
+        super().paintEvent(event)
@@ -1,80 +1,46 @@
+import startup_profiler # First, so the imports below are on the startup timeline
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QVBoxLayout, QHBoxLayout,
     QPushButton, QMenu, QGraphicsDropShadowEffect, QInputDialog,
     QDialog, QListWidget, QLineEdit, QDialogButtonBox, QListWidgetItem,
-    QSizePolicy, QStyle, QTextEdit
+    QSizePolicy, QStyle, QTextEdit, QFileDialog, QMessageBox
 )
 from PyQt6.QtGui import QFont, QIcon, QAction, QColor, QActionGroup, QPainter, QBrush, QPen, QMouseEvent, QContextMenuEvent, QPaintEvent
 from PyQt6.QtCore import Qt, QPoint, QSettings, QTimer, QDateTime # Removed QSize as it's not used
 import jdatetime
-import random
 import time
-import requests
-from hijri_converter import Gregorian
 from rss_reader_widget import RSSReaderWidget, RSS_BOX_WIDTHS, DEFAULT_RSS_BOX_WIDTH_KEY, ManageRSSFeedsDialog
 from note_widget import TabbedNoteManager
+from event_store import date_key, parse_date_key
+from calendar_core import weekday_fa, months_fa, open_event_store, format_day, format_other_calendars, format_events
+from event_search import EventIndex
+from date_index import EventDateIndex, next_holiday
+from event_fetcher import EventFetcher, DEFAULT_PREFETCH_CONCURRENCY, DEFAULT_REQUESTS_PER_SECOND, ON_SCREEN_PRIORITY, PREFETCH_PRIORITY
+from http_session import close_session
+from month_grid_widget import MonthGridWidget
+from date_batch import jalali_month_length
+from day_views import DayView, DayViewCache, EVENTS_READY, EVENTS_MISSING, EVENTS_OFFLINE
+from navigation import NavigationController
+from shadow_label import ShadowTextLabel
+from scheduler import WallClockTimer, next_local_midnight
+from quote_corpus import QuoteFile, ShuffleCursor, bundled_quotes_path, BUNDLED_QUOTES
+from theme_engine import (color_schemes, stylesheet, element_role, apply_stylesheet, apply_application_theme,
+                          ROLE_WINDOW, ROLE_TEXT)
 
 import sys
-import json
-import os
-import types
+import bisect
+import zlib
 
 DEFAULT_FONT_FAMILY = "DanaFaNum"
-EVENTS_CACHE_FILE = "events_cache.json"
-
-weekday_fa = {'Saturday':'شنبه','Sunday':'یک‌شنبه','Monday':'دوشنبه','Tuesday':'سه‌شنبه','Wednesday':'چهارشنبه','Thursday':'پنج‌شنبه','Friday':'جمعه'}
-months_fa = {'Farvardin':'فروردین','Ordibehesht':'اردیبهشت','Khordad':'خرداد','Tir':'تیر','Mordad':'مرداد','Shahrivar':'شهریور','Mehr':'مهر','Aban':'آبان','Azar':'آذر','Dey':'دی','Bahman':'بهمن','Esfand':'اسفند'}
-hijri_months_fa = {1:'محرم',2:'صفر',3:'ربیع‌الاول',4:'ربیع‌الثانی',5:'جمادی‌الاول',6:'جمادی‌الثانی',7:'رجب',8:'شعبان',9:'رمضان',10:'شوال',11:'ذوالقعده',12:'ذوالحجه'}
-
-color_schemes = {
-    'Dark': {
-        'name_fa': 'تیره', 'widget_bg': QColor(30,30,30,210), 'widget_text': QColor("white"),
-        'box_bg': QColor(50,50,50,200), 'box_text': QColor(220,220,220), 'box_border': QColor(80,80,80),
-        'box_bg_hover': QColor(70,70,70,210), # Hover for boxed buttons
-        'flat_hover_bg': QColor(70,70,70,100), # Subtle hover for flat buttons/elements
-        'flat_element_hover_bg': QColor(80,80,80,120), # Hover for flat elements inside a boxed parent
-        'menu_bg': QColor(45,45,45,240), 'menu_text': QColor(220,220,220), 'menu_border': QColor(60,60,60), 
-        'menu_selected_bg': QColor(0, 120, 215, 200), 'menu_selected_text': QColor("white"),
-    },
-    'Light': {
-        'name_fa': 'روشن', 'widget_bg': QColor(245,245,245,220), 'widget_text': QColor(0,0,0), # Pure black text for contrast
-        'box_bg': QColor(220,220,220,200), 'box_text': QColor(0,0,0), # Pure black text for contrast
-        'box_border': QColor(180,180,180),
-        'box_bg_hover': QColor(200,200,200,210), # Darker hover for better visibility
-        'flat_hover_bg': QColor(200,200,200,100),
-        'flat_element_hover_bg': QColor(190,190,190,120), # Hover for flat elements inside a boxed parent
-        'menu_bg': QColor(240,240,240,240), 'menu_text': QColor(0,0,0), # Pure black text for contrast
-        'menu_border': QColor(200,200,200),
-        'menu_selected_bg': QColor(0, 120, 215, 200), 'menu_selected_text': QColor("white"),
-    },
-    'Nordic Blue': {
-        'name_fa':'آبی نوردیک','widget_bg':QColor(46,52,64,225),'widget_text':QColor(216,222,233),
-        'box_bg':QColor(59,66,82,210),'box_text':QColor(229,233,240),'box_border':QColor(76,86,106),
-        'box_bg_hover':QColor(76,86,106,220),
-        'flat_hover_bg':QColor(70,80,100,100),
-        'flat_element_hover_bg': QColor(80,90,110,120), # Hover for flat elements inside a boxed parent
-        'menu_bg':QColor(59,66,82,245),'menu_text':QColor(216,222,233),'menu_border':QColor(76,86,106),
-        'menu_selected_bg':QColor(94,129,172,200),'menu_selected_text':QColor(230,230,230),
-    },
-    'Forest Green': {
-        'name_fa':'سبز جنگلی','widget_bg':QColor(42,72,46,225),'widget_text':QColor(210,203,185),
-        'box_bg':QColor(52,82,56,210),'box_text':QColor(210,203,185),'box_border':QColor(80,110,80),
-        'box_bg_hover':QColor(62,92,66,220),
-        'flat_hover_bg':QColor(60,90,80,100),
-        'flat_element_hover_bg': QColor(70,100,90,120), # Hover for flat elements inside a boxed parent
-        'menu_bg':QColor(52,82,56,245),'menu_text':QColor(210,203,185),'menu_border':QColor(80,110,80),
-        'menu_selected_bg':QColor(100,130,100,200),'menu_selected_text':QColor(230,230,230),
-    },
-    'Warm Amber': {
-        'name_fa':'کهربایی گرم','widget_bg':QColor(70,40,0,225),'widget_text':QColor(255,210,150),
-        'box_bg':QColor(80,50,10,210),'box_text':QColor(255,220,180),'box_border':QColor(120,80,40),
-        'box_bg_hover':QColor(100,70,30,220),
-        'flat_hover_bg':QColor(90,60,30,100),
-        'flat_element_hover_bg': QColor(110,80,50,120), # Hover for flat elements inside a boxed parent
-        'menu_bg':QColor(80,50,10,245),'menu_text':QColor(255,210,150),'menu_border':QColor(120,80,40),
-        'menu_selected_bg':QColor(200,120,50,200),'menu_selected_text':QColor(255,230,200),
-    }
-}
+CACHE_FLUSH_DELAY_MS = 3000 # Buffered event cache writes are flushed this long after the first change
+EVENT_RETRY_MIN_INTERVAL_MS = 30 * 1000 # Failed event fetches are retried at most this often
+DAY_VIEW_PRERENDER_AHEAD = 7  # Days formatted ahead of the displayed one (in the direction of travel) while idle
+DAY_VIEW_PRERENDER_BEHIND = 2
+EVENT_SEARCH_MAX_RESULTS = 500   # Rows listed by the event search dialog
+EVENT_SEARCH_RESULTS_BEFORE = 20 # Earlier matches listed above the next occurrence
+QUOTE_PICK_ATTEMPTS = 16 # Lines of a quotes file tried in a row before giving up on finding a quote
+
+
 font_sizes = {'خیلی کوچک':8,'کوچک':10,'متوسط':15,'بزرگ':20,'خیلی بزرگ':24}
 quote_box_widths = {"باریک": 200, "متوسط": 280, "عریض": 360} # Width in pixels
 DEFAULT_QUOTE_BOX_WIDTH_KEY = "متوسط"
@@ -128,8 +94,11 @@ class QuoteWidget(QWidget):
         self.quote_update_frequency = "daily" # Default: daily, hourly, weekly
         self.last_quote_update_timestamp = 0 # Store as timestamp
         self.current_quote_index = self.settings.value("quote_widget/current_quote_index", 0, type=int)
+        self.quote_corpus = None # QuoteFile in use instead of quotes_list, if any
+        self.corpus_file = "" # quote_widget/corpus_file of quote_corpus: a path, BUNDLED_QUOTES, or "" for quotes_list
+        self.quote_cursor = None # ShuffleCursor over quote_source, created on first pick
 
-        self.quote_timer = QTimer(self)
+        self.quote_timer = WallClockTimer(self._next_quote_due, self) # Fires at the next quote change, no polling
         self.quote_timer.timeout.connect(self._check_and_update_quote)
         
         self._load_quote_settings_and_start_timer()
@@ -176,6 +145,11 @@ class QuoteWidget(QWidget):
         self.settings.setValue("quote_widget/width_key", self.quote_box_width_key)
         self.settings.setValue("quote_widget/last_update_timestamp", self.last_quote_update_timestamp)
         self.settings.setValue("quote_widget/current_quote_index", self.current_quote_index)
+        if self.quote_cursor is not None:
+            self.settings.setValue("quote_widget/shuffle_source", self._quote_source_id())
+            self.settings.setValue("quote_widget/shuffle_size", self.quote_cursor.size)
+            self.settings.setValue("quote_widget/shuffle_seed", self.quote_cursor.seed)
+            self.settings.setValue("quote_widget/shuffle_position", self.quote_cursor.position)
 
     def _load_quote_settings_and_start_timer(self):
         default_quotes = [
@@ -191,11 +165,17 @@ class QuoteWidget(QWidget):
 
         self.quote_update_frequency = self.settings.value("quote_widget/frequency", "daily")
         self.last_quote_update_timestamp = self.settings.value("quote_widget/last_update_timestamp", 0, type=float)
+        # A quotes file, if chosen ("" means the list above). The quotes.json shipped with the app
+        # is only the default for users who never saved a list of their own; the choice is saved
+        # right away, since save_settings() writes quotes_list on every exit.
+        corpus_file = self.settings.value("quote_widget/corpus_file", None)
+        if corpus_file is None:
+            corpus_file = "" if self.settings.contains("quote_widget/quotes_list") or not bundled_quotes_path() else BUNDLED_QUOTES
+            self.settings.setValue("quote_widget/corpus_file", corpus_file)
+        self._open_quote_corpus(corpus_file)
         
         self._update_quote_text_display(initial_load=True) # Set initial quote
-        
-        self.quote_timer.start(60 * 1000) # Check every minute
-        self._check_and_update_quote() # Perform an initial check/update if needed
+        self._check_and_update_quote() # Arms quote_timer for the next change
 
     def _get_interval_seconds(self):
         if self.quote_update_frequency == "hourly":
@@ -216,47 +196,110 @@ class QuoteWidget(QWidget):
         # Force update after all events are processed
         self.repaint()
 
+    @property
+    def quote_source(self):
+        """The quotes in use: the quotes file if one is open, otherwise quotes_list."""
+        return self.quote_corpus if self.quote_corpus is not None else self.quotes_list
+
+    def _open_quote_corpus(self, corpus_file):
+        """
+        Switches to the quotes file `corpus_file` (a path or BUNDLED_QUOTES; None or "" switches back
+        to quotes_list). Returns False if it cannot be read.
+        """
+        corpus = None
+        path = bundled_quotes_path() if corpus_file == BUNDLED_QUOTES else corpus_file
+        if path:
+            try:
+                corpus = QuoteFile(path)
+            except (OSError, ValueError) as e:
+                print(f"[QuoteWidget] Could not open quotes file {path}: {e}")
+                return False
+        if self.quote_corpus is not None:
+            self.quote_corpus.close()
+        self.quote_corpus = corpus
+        self.corpus_file = corpus_file if corpus is not None else ""
+        self.quote_cursor = None
+        return True
+
+    def _quote_source_id(self):
+        """Identifies the quotes the shuffle cursor walks, so a saved cursor only resumes over the same quotes."""
+        if self.quote_corpus is not None:
+            return f"file:{self.corpus_file}:{self.quote_corpus.size}"
+        text = "\n".join(self.quotes_list)
+        return f"list:{zlib.crc32(text.encode('utf-8'))}"
+
+    def _ensure_quote_cursor(self):
+        size = len(self.quote_source)
+        if self.quote_cursor is not None and self.quote_cursor.size == size:
+            return
+        if (self.quote_cursor is None and self.settings.value("quote_widget/shuffle_size", -1, type=int) == size
+                and self.settings.value("quote_widget/shuffle_source", "") == self._quote_source_id()):
+            # Resume the saved shuffle, so a restart does not bring shown quotes back early
+            self.quote_cursor = ShuffleCursor(size, self.settings.value("quote_widget/shuffle_seed", 0, type=int),
+                                              self.settings.value("quote_widget/shuffle_position", 0, type=int))
+        else:
+            self.quote_cursor = ShuffleCursor(size)
+
+    def _pick_next_quote_index(self):
+        """Index of the next quote in shuffle order, skipping the one on display; None if there is no quote."""
+        quotes = self.quote_source
+        self._ensure_quote_cursor()
+        for _ in range(QUOTE_PICK_ATTEMPTS):
+            index = self.quote_cursor.next()
+            if index is None:
+                return None
+            if quotes[index] is not None and (index != self.current_quote_index or len(quotes) == 1):
+                return index
+        return None
+
+    def _next_quote_due(self):
+        if not len(self.quote_source):
+            return None # Nothing to rotate until quotes are set
+        return self.last_quote_update_timestamp + self._get_interval_seconds()
+
     def _check_and_update_quote(self):
         current_time = time.time()
-        time_since_last_update = current_time - self.last_quote_update_timestamp
-
-        if time_since_last_update >= self._get_interval_seconds(): 
+        if self.last_quote_update_timestamp > current_time: # Clock was set back; count the interval from now
+            self.last_quote_update_timestamp = current_time
+        due = self._next_quote_due()
+        if due is not None and current_time >= due:
             self._update_quote_text_display()
-            QApplication.processEvents() # Process events to ensure UI updates
+        self.quote_timer.start() # Re-armed for the next change
 
     def _update_quote_text_display(self, initial_load=False):
         current_timestamp = time.time()
         actual_quote_to_display = "(لیست نقل قول خالی است)"
 
-        if not self.quotes_list:
+        quotes = self.quote_source
+        if not len(quotes):
             actual_quote_to_display = "(لیست نقل قول خالی است)"
         else:
             # Determine if we need to update or can use existing displayed quote
             # This logic simplifies: always pick a quote based on timer or if forced by initial_load/settings change
-            if not initial_load and (current_timestamp - self.last_quote_update_timestamp) < self._get_interval_seconds():
-                # Not enough time passed, keep current quote if available in label
-                # This part can be tricky if the label text isn't perfectly synced with quotes_list[current_quote_index]
-                # For robustness, let's re-fetch from quotes_list using current_quote_index
-                if 0 <= self.current_quote_index < len(self.quotes_list):
-                    actual_quote_to_display = self.quotes_list[self.current_quote_index]
-                # else, it will fall through to pick a new one / default
+            # The index on display may not exist in the quotes any more (list edited, file switched)
+            current_valid = 0 <= self.current_quote_index < len(quotes) and quotes[self.current_quote_index] is not None
+            if current_valid and not initial_load and (current_timestamp - self.last_quote_update_timestamp) < self._get_interval_seconds():
+                # Not enough time passed, keep current quote
+                # Re-fetched from quotes using current_quote_index, in case the label isn't in sync
+                actual_quote_to_display = quotes[self.current_quote_index]
             else:
-                # Time to pick a new quote
-                if len(self.quotes_list) > 1:
-                    new_indices = [i for i, _ in enumerate(self.quotes_list) if i != self.current_quote_index]
-                    self.current_quote_index = random.choice(new_indices) if new_indices else 0
-                elif self.quotes_list: # Only one quote
-                    self.current_quote_index = 0
-                # If list became empty somehow and wasn't caught above, default_quote will be used
+                # Time to pick a new quote: O(1) through the shuffle cursor, however large the collection
+                next_index = self._pick_next_quote_index()
+                if next_index is not None:
+                    self.current_quote_index = next_index
                 
-                if 0 <= self.current_quote_index < len(self.quotes_list):
-                    actual_quote_to_display = self.quotes_list[self.current_quote_index]
+                if 0 <= self.current_quote_index < len(quotes):
+                    actual_quote_to_display = quotes[self.current_quote_index] or actual_quote_to_display
                 
                 self.last_quote_update_timestamp = current_timestamp
                 # self.settings.setValue("quote_widget/last_update_timestamp", self.last_quote_update_timestamp) # Saved by save_settings
                 # self.settings.setValue("quote_widget/current_quote_index", self.current_quote_index) # Saved by save_settings
 
-        # Set fixed width before setting text to ensure proper height calculation for wrapped text
+        self.quote_label.setText(actual_quote_to_display)
+        self._layout_quote_label()
+
+    def _layout_quote_label(self):
+        # Set fixed width before measuring to ensure proper height calculation for wrapped text
         self.setFixedWidth(self.quote_box_width_val)
         
         # Configure label for proper text wrapping
@@ -264,9 +307,6 @@ class QuoteWidget(QWidget):
         self.quote_label.setMinimumWidth(self.quote_box_width_val - 30)  # Account for margins
         self.quote_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
-        # Set text and force proper sizing
-        self.quote_label.setText(actual_quote_to_display)
-        
         # Using sizeHint() to determine proper height
         text_height = self.quote_label.sizeHint().height()
         self.quote_label.setMinimumHeight(text_height)
@@ -278,6 +318,9 @@ class QuoteWidget(QWidget):
         if quotes is not None:
             self.quotes_list = quotes if quotes else []
             self.settings.setValue("quote_widget/quotes_list", self.quotes_list)
+            # An edited list is used from now on, instead of any quotes file
+            self._open_quote_corpus(None)
+            self.settings.setValue("quote_widget/corpus_file", "")
         
         if frequency is not None:
             self.quote_update_frequency = frequency
@@ -288,63 +331,46 @@ class QuoteWidget(QWidget):
         # Restart timer with potentially new interval logic (though timer interval is fixed, the check logic changes)
         self._check_and_update_quote() 
 
+    def set_quote_corpus(self, path):
+        """Shows quotes from the file at `path` from now on. Returns False if the file cannot be read."""
+        if not self._open_quote_corpus(path):
+            return False
+        self.settings.setValue("quote_widget/corpus_file", path)
+        self._update_quote_text_display(initial_load=True) # A quote from the new file right away
+        self._check_and_update_quote()
+        return True
+
     def apply_theme(self):
+        """Restyles the widget in place; the quote on display and its rotation state are kept."""
         if not self.parent_widget: return
         print(f"[QuoteWidget] apply_theme: Applying theme with boxed_style = {self.boxed_style}") # Debug
-        scheme = color_schemes[self.parent_widget.active_scheme_key]
 
-        # Store current visibility state
-        was_visible = self.isVisible()
-        if was_visible:
-            self.hide()
-
-        # Always use translucent background for proper alpha handling
-        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground, True)
-        self.setStyleSheet("")
-        
-        # Override paintEvent to handle background drawing
-        def paintEvent(self, event):
-            painter = QPainter(self)
-            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-            
-            if self.boxed_style:
-                bg_color = QColor(scheme.get('box_bg', scheme['widget_bg']))
-                border_color = QColor(scheme.get('box_border', scheme['menu_border']))
-                
-                # Draw rounded rect background with proper alpha
-                painter.setBrush(QBrush(bg_color))
-                painter.setPen(QPen(border_color, 1))
-                painter.drawRoundedRect(self.rect(), 6, 6)
-            else:
-                # Fully transparent in non-boxed mode
-                pass
-            
-            # Call the original paint event to handle children
-            super(QuoteWidget, self).paintEvent(event)
-        
-        # Replace the paintEvent method
-        self.paintEvent = types.MethodType(paintEvent, self)
-        
-        # Update label style
-        label_text_color = scheme.get('box_text', scheme['widget_text'])
-        self.quote_label.setStyleSheet(f"QLabel {{ color: {label_text_color.name(QColor.NameFormat.HexArgb)}; background-color: transparent; border: none; padding: 0px; }}")
+        # Update label style (always the box text color)
+        apply_stylesheet(self.quote_label, stylesheet(self.parent_widget.active_scheme_key, True, ROLE_TEXT))
+        effect = self.quote_label.graphicsEffect()
+        if effect is not None: # No live shadow in low-cost mode (the label is rich text, so there is no cached one either)
+            effect.setEnabled(not getattr(self.parent_widget, 'low_cost_rendering', False))
 
         # Update font
         current_label_font_size = self.font_pt - 2 if self.font_pt > 10 else self.font_pt
         current_label_font_size = max(8, current_label_font_size)
         self.quote_label.setFont(QFont(DEFAULT_FONT_FAMILY, current_label_font_size))
-        
-        # Force immediate update
-        self.update()
-        self.repaint()
-        QApplication.processEvents()
 
-        # Show widget if it was visible before
-        if was_visible:
-            self.show()
-            self.raise_()
+        self._layout_quote_label() # Re-wrap the current text for the new font / width
+        self.update() # paintEvent draws the box
 
-        self._update_quote_text_display() # Update text and apply size constraints
+    def paintEvent(self, event):
+        if self.boxed_style and self.parent_widget:
+            scheme = color_schemes[self.parent_widget.active_scheme_key]
+            painter = QPainter(self)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            # Draw rounded rect background with proper alpha
+            painter.setBrush(QBrush(QColor(scheme.get('box_bg', scheme['widget_bg']))))
+            painter.setPen(QPen(QColor(scheme.get('box_border', scheme['menu_border'])), 1))
+            painter.drawRoundedRect(self.rect(), 6, 6)
+            painter.end()
+        # Fully transparent in non-boxed mode
+        super().paintEvent(event)
 
     def update_display_settings(self, font_pt=None, boxed_style=None, width_key=None):
         changed = False
@@ -373,14 +399,9 @@ class QuoteWidget(QWidget):
                 self.setFixedWidth(self.quote_box_width_val)
                 # The label's minimum width for wrapping will be set in _update_quote_text_display
 
-            # apply_theme will handle restyling and then call _update_quote_text_display.
-            # _update_quote_text_display will use the (potentially new) self.quote_box_width_val 
-            # to set label's minimum width, set text, and adjust sizes.
+            # apply_theme restyles in place and re-wraps the current quote using the
+            # (potentially new) self.quote_box_width_val.
             self.apply_theme()
-        
-            # Process events once after all changes are applied.
-            QApplication.processEvents()
-
             self.save_settings()
 
     def mousePressEvent(self, e):
@@ -485,74 +506,159 @@ class ManageQuotesDialog(QDialog):
         return self.updated_quotes
 
 
+class EventSearchDialog(QDialog):
+    """Searches the cached events as you type; choosing a result opens that day in the calendar."""
+
+    def __init__(self, event_index, event_store, from_date, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("جستجوی مناسبت‌ها")
+        self.setMinimumWidth(450)
+        self.setLayoutDirection(Qt.LayoutDirection.RightToLeft)
+        self.event_index = event_index
+        self.event_store = event_store
+        self.from_key = date_key(from_date) # The first result on or after this day is preselected
+        self.selected_key = None
+
+        layout = QVBoxLayout(self)
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("مثلا: عید، شهادت، نیمه شعبان")
+        layout.addWidget(self.query_input)
+        self.summary_label = QLabel("فقط روزهایی که مناسبت‌هایشان ذخیره شده جستجو می‌شوند.")
+        layout.addWidget(self.summary_label)
+        self.results_list = QListWidget()
+        layout.addWidget(self.results_list)
+        self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Open | QDialogButtonBox.StandardButton.Close)
+        layout.addWidget(self.button_box)
+
+        self.query_input.textChanged.connect(self._run_search)
+        self.query_input.returnPressed.connect(self._on_accept)
+        self.results_list.itemActivated.connect(self._on_accept)
+        self.button_box.accepted.connect(self._on_accept)
+        self.button_box.rejected.connect(self.reject)
+
+    def _run_search(self, query):
+        self.results_list.clear()
+        keys = self.event_index.search(query)
+        if not keys:
+            self.summary_label.setText("نتیجه‌ای یافت نشد." if query.strip() else "")
+            return
+        # The next occurrence (or, if there is none, the last one) is preselected and long lists are cut around it
+        focus = bisect.bisect_left(keys, self.from_key)
+        next_key = keys[focus] if focus < len(keys) else None
+        focus = min(focus, len(keys) - 1)
+        start = max(0, focus - EVENT_SEARCH_RESULTS_BEFORE)
+        shown = keys[start:start + EVENT_SEARCH_MAX_RESULTS]
+        for key in shown:
+            item = QListWidgetItem(f"{key}: {'، '.join(self.event_store.get(key) or [])}")
+            item.setData(Qt.ItemDataRole.UserRole, key)
+            self.results_list.addItem(item)
+        self.results_list.setCurrentRow(focus - start)
+        self.results_list.scrollToItem(self.results_list.currentItem())
+        summary = f"{len(keys)} روز" + (f" (نمایش {len(shown)})" if len(shown) < len(keys) else "")
+        self.summary_label.setText(summary + (f" - نزدیک‌ترین: {next_key}" if next_key else " - همه در گذشته"))
+
+    def _on_accept(self):
+        item = self.results_list.currentItem()
+        if item is not None:
+            self.selected_key = item.data(Qt.ItemDataRole.UserRole)
+            self.accept()
+
+
 class CalendarWidget(QWidget):
-    def _fetch_and_cache_range_events(self, start_date, end_date):
-        if self.is_background_caching_busy:
-            print("Background event caching is already in progress. Skipping new request.")
+    def _fetch_and_cache_range_events(self, start_date, end_date, priority=PREFETCH_PRIORITY):
+        """Queues a background fetch for every day in [start_date, end_date] that is not cached yet.
+        The fetcher's planner decides between per-day and whole-year requests."""
+        missing_days = []
+        now = time.time()
+        current_processing_date = start_date
+        while current_processing_date <= end_date:
+            if self.event_store.needs_fetch(current_processing_date, now): # Never fetched, or failed and due for a retry
+                missing_days.append(current_processing_date)
+            current_processing_date += jdatetime.timedelta(days=1)
+
+        batch_id = self.event_fetcher.fetch_days(missing_days, priority)
+        if batch_id:
+            print(f"Queued {len(missing_days)} uncached days between {start_date.strftime('%Y-%m-%d')} and {end_date.strftime('%Y-%m-%d')} for background caching.")
+        return batch_id
+
+    def _on_events_fetched(self, events_by_date):
+        # Kept in memory only; the whole batch is written once in _on_fetch_batch_finished
+        self.event_store.upsert_many(events_by_date)
+        if self.month_view and hasattr(self, 'month_grid'):
+            self.month_grid.refresh_events()
+        if not self.compact_mode and hasattr(self, 'holiday_label'):
+            # The next-holiday line names that day's events, which may just have arrived
+            view = self._render_day_view(jdatetime.date(*parse_date_key(self.displayed_date_key)))
+            self.holiday_label.setText(view.holiday_text)
+        if self.displayed_date_key in events_by_date:
+            self._set_event_label_text(events_by_date[self.displayed_date_key])
+            if len(events_by_date) == 1:
+                # The day on screen came from the network on its own, so warm up the days around it as well
+                displayed_date = jdatetime.date(*parse_date_key(self.displayed_date_key))
+                print(f"Online: Triggering background cache for {self.displayed_date_key} +/- 7 days.")
+                self._fetch_and_cache_range_events(displayed_date - jdatetime.timedelta(days=7), displayed_date + jdatetime.timedelta(days=7))
+
+    def _on_fetch_batch_progress(self, batch_id, done_count, total_count):
+        if total_count > 1:
+            self.setToolTip(f"در حال ذخیره مناسبت‌ها: {done_count} از {total_count}")
+            if done_count % 10 == 0 or done_count == total_count:
+                print(f"Event prefetch batch {batch_id}: {done_count}/{total_count} requests done.")
+
+    def _on_fetch_batch_finished(self, batch_id):
+        self._flush_event_cache() # Commit the whole batch in one write
+        self.event_index.sync() # Index the new days now rather than on the next search
+        if not self.event_fetcher.is_busy():
+            self.setToolTip("")
+
+    def _on_events_failed(self, date_strs, error_message):
+        print(f"  Failed to fetch events for {len(date_strs)} day(s) {date_strs[:3]}{'...' if len(date_strs) > 3 else ''}: {error_message}")
+        # Negative-cached with backoff instead of being saved as "no events"
+        self.event_store.mark_failed(date_strs, error_message)
+        self._schedule_cache_flush()
+        self._schedule_event_retry()
+        if self.displayed_date_key in date_strs and hasattr(self, 'event_label'):
+            self.event_label.setText("مناسبت: (آفلاین - بدون اطلاعات)")
+
+    def _schedule_event_retry(self):
+        """Arms the retry timer for the earliest failed day whose backoff expires."""
+        retry_at = self.event_store.next_retry_time()
+        if retry_at is None:
+            self.event_retry_timer.stop()
             return
-        
-        self.is_background_caching_busy = True
-        try:
-            print(f"Starting to fetch and cache events from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
-            current_processing_date = start_date
-            days_processed_for_event_processing = 0
-
-            while current_processing_date <= end_date:
-                date_str = current_processing_date.strftime("%Y-%m-%d")
-                print(f"Processing {date_str}...")
-                
-                cached_events = self._load_event_from_cache(current_processing_date)
-                if cached_events is not None:
-                    print(f"  Events for {date_str} already in cache. Skipping.")
-                    current_processing_date += jdatetime.timedelta(days=1)
-                    continue
-                
-                try:
-                    # Use the new pnldev.com API
-                    url = f"https://pnldev.com/api/calender?year={current_processing_date.year}&month={current_processing_date.month}&day={current_processing_date.day}"
-                    response = requests.get(url, timeout=10)
-                    response.raise_for_status()
-                    data = response.json()
-                    events_list = [] # Default to empty list
-                    if data.get("status") is True and "result" in data and isinstance(data["result"], dict):
-                        events_list = data["result"].get("event", [])
-                        if not isinstance(events_list, list):
-                            print(f"  Events data for {date_str} is not a list: {events_list}. Treating as no events.")
-                            events_list = []
-                    else:
-                        status_val = data.get('status', 'N/A')
-                        error_msg = data.get('result', 'No result field or API status not true')
-                        if isinstance(error_msg, dict) and "message" in error_msg: # some APIs return error details in result.message
-                            error_msg = error_msg["message"]
-                        elif not isinstance(error_msg, str): # ensure error_msg is a string for logging
-                            error_msg = str(error_msg)
-                        print(f"  Failed to parse events for {date_str}. API Status: {status_val}. Message: '{error_msg}'")
-                    self._save_event_to_cache(current_processing_date, events_list)
-                    print(f"  Fetched and cached events for {date_str}: {events_list if events_list else 'No events'}")
-                except requests.exceptions.RequestException as e:
-                    print(f"  Failed to fetch events for {date_str}: {e}. Saving as no events.")
-                    self._save_event_to_cache(current_processing_date, []) # Save empty list on error
-                except json.JSONDecodeError as e:
-                    print(f"  JSON Decode Error for {date_str}: {e}. Saving as no events.")
-                    self._save_event_to_cache(current_processing_date, [])
-                except Exception as e:
-                    print(f"  Unexpected error for {date_str}: {e}. Saving as no events.")
-                
-                time.sleep(0.1) # Be polite to the API server
-                days_processed_for_event_processing += 1
-                if days_processed_for_event_processing % 5 == 0: # Process events every 5 days or so
-                    QApplication.processEvents() # Keep UI responsive
-                
-                current_processing_date += jdatetime.timedelta(days=1)
-            
-            QApplication.processEvents() # Final process events
-            print(f"Finished fetching and caching events for the specified range.")
-        finally:
-            self.is_background_caching_busy = False
-    
-    # The following line was incorrectly part of the view of this function previously
-    # end_date = today + jdatetime.timedelta(days=days_after)
-    # self._fetch_and_cache_range_events(start_date, end_date)
+        delay_ms = int((retry_at - time.time()) * 1000)
+        self.event_retry_timer.start(max(EVENT_RETRY_MIN_INTERVAL_MS, delay_ms))
+
+    def _retry_failed_event_fetches(self):
+        now = time.time()
+        due_days = [jdatetime.date(*parse_date_key(key)) for key in self.event_store.failed_keys()
+                    if self.event_store.needs_fetch(key, now)]
+        if due_days and self.event_fetcher.fetch_days(due_days):
+            print(f"Retrying {len(due_days)} day(s) whose event fetch failed earlier.")
+        self._schedule_event_retry()
+
+    def _format_events_text(self, events_list):
+        return format_events(events_list)
+
+    def _format_next_holiday_text(self, j_date, holiday_date):
+        if holiday_date is None:
+            return ""
+        text = (f"تعطیلی بعدی: {weekday_fa[holiday_date.strftime('%A')]} {holiday_date.day} {months_fa[holiday_date.strftime('%B')]}"
+                f" ({(holiday_date - j_date).days} روز دیگر)")
+        holiday_events = self.event_store.get(holiday_date) # Named only when that day is cached
+        return f"{text} - {holiday_events[0]}" if holiday_events else text
+
+    def _set_event_label_text(self, events_list):
+        if hasattr(self, 'event_label'):
+            self.event_label.setText(self._format_events_text(events_list))
+
+    def _handle_cache_next_months(self, months=3):
+        """Cache events from the start of the current Shamsi month through the next few months."""
+        today = jdatetime.date.today()
+        start_date = jdatetime.date(today.year, today.month, 1)
+        end_month_index = today.month - 1 + months # Zero-based month index of the first month after the range
+        end_date = jdatetime.date(today.year + end_month_index // 12, end_month_index % 12 + 1, 1) - jdatetime.timedelta(days=1)
+        print(f"Manually triggered cache update for {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
+        self._fetch_and_cache_range_events(start_date, end_date)
 
     def _handle_cache_surrounding_days(self, days_before=7, days_after=7):
         """Cache events for days surrounding today (+-7 days by default)."""
@@ -562,143 +668,17 @@ class CalendarWidget(QWidget):
         print(f"Manually triggered cache update for {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
         self._fetch_and_cache_range_events(start_date, end_date)
 
-    def _fetch_and_cache_year_events(self, year):
-        print(f"Starting to fetch and cache events for Shamsi year: {year} using new API.")
-        api_url = f"https://pnldev.com/api/calender?year={year}"
-        
-        try:
-            print(f"Fetching all events for year {year} from {api_url}...")
-            response = requests.get(api_url, timeout=30) # Increased timeout for a larger response
-            response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-            data = response.json()
-
-            if data.get("status") is True and "result" in data:
-                year_data = data["result"]
-                days_processed_count = 0
-                if not isinstance(year_data, dict): # Ensure year_data is a dictionary (months)
-                    print(f"  Error: Expected year_data to be a dictionary for year {year}, got {type(year_data)}. API response: {data.get('result')}")
-                    # Save empty events for all days of the year to prevent re-fetching with bad data
-                    # This part might need more nuanced error handling depending on how often this case occurs
-                    # For now, we log and exit the processing for this year.
-                else:
-                    for month_str, month_data in year_data.items():
-                        if not isinstance(month_data, dict): # Skip if month_data is not a dictionary of days
-                            print(f"  Skipping non-dict month_data for month {month_str} in year {year}. Value: {month_data}")
-                            continue
-                        for day_str, day_details in month_data.items():
-                            if not isinstance(day_details, dict): # Skip if day_details is not a dictionary
-                                print(f"  Skipping non-dict day_details for {year}-{month_str}-{day_str}. Value: {day_details}")
-                                continue
-
-                            # Ensure 'solar' details are present to confirm it's a valid day entry
-                            if "solar" not in day_details or not isinstance(day_details["solar"], dict) or not all(k in day_details["solar"] for k in ["year", "month", "day"]):
-                                print(f"  Skipping entry for {year}-{month_str}-{day_str} due to missing or malformed solar details. Details: {day_details.get('solar')}")
-                                continue
-                        
-                            try:
-                                api_year = int(day_details["solar"]["year"])
-                                api_month = int(day_details["solar"]["month"])
-                                api_day = int(day_details["solar"]["day"])
-                                
-                                # Verify that the year, month, day from API match our iteration context
-                                if api_year != year or api_month != int(month_str) or api_day != int(day_str):
-                                    print(f"  Data mismatch for {year}-{month_str}-{day_str}: API reported {api_year}-{api_month}-{api_day}. Skipping.")
-                                    continue
-
-                                actual_date = jdatetime.date(year, int(month_str), int(day_str))
-                                events_list = day_details.get("event", []) # Default to empty list if "event" key is missing
-                                
-                                if not isinstance(events_list, list):
-                                    print(f"  Events data for {actual_date.strftime('%Y-%m-%d')} is not a list: {events_list}. Treating as no events.")
-                                    events_list = []
-                                    
-                                self._save_event_to_cache(actual_date, events_list)
-                                days_processed_count +=1
-                            except (ValueError, TypeError) as ve_te:
-                                print(f"  Error processing date/event for {year}-{month_str}-{day_str} from solar details {day_details.get('solar')}: {ve_te}")
-                            except Exception as inner_e:
-                                print(f"  Unexpected error processing day {year}-{month_str}-{day_str}: {inner_e}")
-                
-                if days_processed_count > 0:
-                    print(f"  Successfully processed and cached {days_processed_count} days for year {year}.")
-                else:
-                    print(f"  No valid day data found or processed for year {year} in API response.")
-            else:
-                status = data.get('status', 'N/A')
-                error_message = "API status not true or result missing."
-                # Check if 'result' contains a string error message from the API
-                if "result" in data and isinstance(data["result"], str):
-                    error_message = data["result"]
-                elif "message" in data and isinstance(data["message"], str): # Some APIs use 'message'
-                    error_message = data["message"]
-                print(f"  Failed to parse events for year {year}. API Status: {status}. Message: '{error_message}'")
-
-        except requests.exceptions.Timeout:
-            print(f"  Timeout while fetching events for year {year} from {api_url}.")
-            # Consider saving empty events for the whole year or marking year as failed fetch
-        except requests.exceptions.RequestException as e:
-            print(f"  Failed to fetch events for year {year} from {api_url}: {e}")
-        except json.JSONDecodeError as e:
-            print(f"  JSON Decode Error for year {year} from {api_url}: {e}")
-        except Exception as e:
-            print(f"  Unexpected error while processing events for year {year}: {e}")
-    
-        QApplication.processEvents() # Process events once after attempting to fetch the whole year
-        print(f"Finished fetching and caching attempt for Shamsi year: {year} using new API.")
-
-    # _handle_cache_current_year and _handle_cache_next_year are no longer used by the menu
-    # def _handle_cache_current_year(self):
-    #     current_shamsi_year = jdatetime.date.today().year
-    #     self._fetch_and_cache_year_events(current_shamsi_year)
-
-    # def _handle_cache_next_year(self):
-    #     next_shamsi_year = jdatetime.date.today().year + 1
-    #     self._fetch_and_cache_year_events(next_shamsi_year)
-    def _get_cache_file_path(self):
-        # Place cache file in the same directory as the script
-        # sys.argv[0] is the script path. If frozen with PyInstaller, sys.executable might be better.
-        # For simplicity with .pyw files run directly, os.path.dirname(__file__) is robust.
-        try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-        except NameError: # __file__ is not defined if running in an interactive interpreter or frozen
-            script_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
-        return os.path.join(script_dir, EVENTS_CACHE_FILE)
-
     def _load_event_from_cache(self, j_date):
-        cache_file = self._get_cache_file_path()
-        date_str = j_date.strftime("%Y-%m-%d")
-        try:
-            if not os.path.exists(cache_file):
-                return None
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-            return cache_data.get(date_str)
-        except (IOError, json.JSONDecodeError) as e:
-            print(f"Error loading from cache: {e}")
-            return None
-
-    def _save_event_to_cache(self, j_date, events_list):
-        cache_file = self._get_cache_file_path()
-        date_str = j_date.strftime("%Y-%m-%d")
-        try:
-            if not os.path.exists(os.path.dirname(cache_file)):
-                 os.makedirs(os.path.dirname(cache_file), exist_ok=True)
-            
-            cache_data = {}
-            if os.path.exists(cache_file):
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    try:
-                        cache_data = json.load(f)
-                    except json.JSONDecodeError:
-                        # Cache is corrupt, start fresh or handle error
-                        print(f"Warning: Cache file {cache_file} is corrupt. Starting fresh.") 
-                        pass # Will overwrite with new data
-            
-            cache_data[date_str] = events_list
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=4)
-        except IOError as e:
-            print(f"Error saving to cache: {e}")
+        return self.event_store.get(j_date)
+
+    def _schedule_cache_flush(self):
+        # Write-behind: coalesce everything saved in the next few seconds into one file write
+        if not self.cache_flush_timer.isActive():
+            self.cache_flush_timer.start()
+
+    def _flush_event_cache(self):
+        self.cache_flush_timer.stop()
+        self.event_store.flush()
 
     def __init__(self):
         super().__init__()
@@ -710,47 +690,75 @@ class CalendarWidget(QWidget):
         self.settings = QSettings("MyCompany", "ShamsiCalendar")
         self.DEFAULT_FONT_FAMILY = DEFAULT_FONT_FAMILY # Make accessible for child widgets
 
-        # Ensure the cache file exists, create if not
-        try:
-            cache_path = self._get_cache_file_path()
-            if not os.path.exists(cache_path):
-                # Create directory if it doesn't exist
-                cache_dir = os.path.dirname(cache_path)
-                if cache_dir and not os.path.exists(cache_dir): # Ensure cache_dir is not empty
-                    os.makedirs(cache_dir, exist_ok=True)
-                with open(cache_path, 'w', encoding='utf-8') as f:
-                    json.dump({}, f) # Initialize with an empty JSON object
-        except IOError as e:
-            # It's possible cache_path is not defined if _get_cache_file_path() fails early
-            print(f"Warning: Could not create/initialize cache file. Error: {e}") 
-        except Exception as e:
-            print(f"Unexpected error during cache file initialization: {e}")
-
-        saved_scheme_name = self.settings.value("color_scheme", "Dark")
-        self.active_scheme_key = saved_scheme_name if saved_scheme_name in color_schemes else "Dark"
-        self.boxed_style = self.settings.value("boxed", "yes") == "yes"
-        self.font_size_lbl = self.settings.value("font_size", "متوسط")
-        self.compact_mode = self.settings.value("compact", "no") == "yes"
-        self.font_pt = font_sizes.get(self.font_size_lbl, 15)
+        # Parsed once; lookups after this are dict hits until the file changes on disk
+        with startup_profiler.phase("event store load"):
+            self.event_store = open_event_store()
+        self.event_index = EventIndex(self.event_store) # Synced lazily; see _on_fetch_batch_finished
+        self.date_index = EventDateIndex(self.event_store) # Days with events by day number, for range queries
+        self.cache_flush_timer = QTimer(self)
+        self.cache_flush_timer.setSingleShot(True)
+        self.cache_flush_timer.setInterval(CACHE_FLUSH_DELAY_MS)
+        self.cache_flush_timer.timeout.connect(self._flush_event_cache)
+
+        with startup_profiler.phase("settings read"):
+            saved_scheme_name = self.settings.value("color_scheme", "Dark")
+            self.active_scheme_key = saved_scheme_name if saved_scheme_name in color_schemes else "Dark"
+            self.boxed_style = self.settings.value("boxed", "yes") == "yes"
+            self.font_size_lbl = self.settings.value("font_size", "متوسط")
+            self.compact_mode = self.settings.value("compact", "no") == "yes"
+            self.month_view = self.settings.value("month_view", "no") == "yes"
+            # Low-cost rendering: cached-pixmap text shadows instead of a QGraphicsDropShadowEffect per widget
+            self.low_cost_rendering = self.settings.value("low_cost_rendering", "no") == "yes"
+            self.font_pt = font_sizes.get(self.font_size_lbl, 15)
         self.offset = 0
         self.quote_widget = None # Initialize quote_widget
         self.rss_widget = None # Initialize rss_widget
-        self.is_background_caching_busy = False
-
-        self.init_quote_widget() # Create/show quote widget
-        self.init_rss_widget() # Create/show rss widget
+        self.displayed_date_key = None # "YYYY-MM-DD" of the day currently on screen
+        self.day_view_cache = DayViewCache()
+        self._rendered_offset = 0
+        self._prerender_offsets = []
+        self.day_view_prerender_timer = QTimer(self)
+        self.day_view_prerender_timer.setSingleShot(True)
+        self.day_view_prerender_timer.setInterval(0)
+        self.day_view_prerender_timer.timeout.connect(self._prerender_next_day_view)
+        self.event_fetcher = EventFetcher(
+            self,
+            concurrency=self.settings.value("events/prefetch_concurrency", DEFAULT_PREFETCH_CONCURRENCY, type=int),
+            requests_per_second=self.settings.value("events/requests_per_second", DEFAULT_REQUESTS_PER_SECOND, type=float),
+        )
+        self.event_fetcher.events_fetched.connect(self._on_events_fetched)
+        self.event_fetcher.events_failed.connect(self._on_events_failed)
+        self.event_fetcher.batch_progress.connect(self._on_fetch_batch_progress)
+        self.event_fetcher.batch_finished.connect(self._on_fetch_batch_finished)
+        self.event_retry_timer = QTimer(self)
+        self.event_retry_timer.setSingleShot(True)
+        self.event_retry_timer.timeout.connect(self._retry_failed_event_fetches)
+        self._schedule_event_retry() # Failures persisted by an earlier run heal in the background too
+        self.navigation = NavigationController(self.event_fetcher, self._show_offset, self)
+        self._today = jdatetime.date.today()
+        self.day_rollover_timer = WallClockTimer(self._next_day_rollover, self) # Keeps "today" current past midnight
+        self.day_rollover_timer.timeout.connect(self._on_day_rollover)
+        self.day_rollover_timer.start()
+
+        with startup_profiler.phase("quote widget"):
+            self.init_quote_widget() # Create/show quote widget
+        with startup_profiler.phase("rss widget"):
+            self.init_rss_widget() # Create/show rss widget
 
         # --- Note Manager Initialization ---
         self.note_manager = None
 
-        self.apply_theme_stylesheet()
+        with startup_profiler.phase("theme"):
+            self.apply_theme_stylesheet()
         
         # Load position and remember if it was successful
         self._position_loaded = self.load_position()
         
-        self.build_ui()
+        with startup_profiler.phase("build_ui"):
+            self.build_ui()
 
     def paintEvent(self, event: QPaintEvent):
+        startup_profiler.finish() # No-op after the first paint or when profiling is off
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         scheme = self.get_current_color_scheme()
@@ -804,7 +812,8 @@ class CalendarWidget(QWidget):
 
     def apply_theme_stylesheet(self):
         scheme = color_schemes[self.active_scheme_key]
-        self.setStyleSheet(f"QWidget {{ background-color: {scheme['widget_bg'].name(QColor.NameFormat.HexArgb)}; color: {scheme['widget_text'].name(QColor.NameFormat.HexArgb)}; }}")
+        apply_stylesheet(self, stylesheet(self.active_scheme_key, self.boxed_style, ROLE_WINDOW))
+        apply_application_theme(QApplication.instance(), self.active_scheme_key) # Context menus of every widget
         if hasattr(self, 'quote_widget') and self.quote_widget:
             self.quote_widget.apply_theme()
         if hasattr(self, 'rss_widget') and self.rss_widget:
@@ -837,43 +846,23 @@ class CalendarWidget(QWidget):
         self.settings.setValue("main_widget/pos", f"{pos.x()},{pos.y()}")
 
     def build_ui(self):
-        if self.layout() is not None:
-            self._clear_layout_widgets(self.layout()); QWidget().setLayout(self.layout())
-
+        """Creates the widget tree once. Appearance changes later go through restyle(), which reuses it."""
         main_layout = QVBoxLayout()
         main_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
         main_layout.setContentsMargins(10, 5, 10, 10)
 
-        secondary_font_size = self.font_pt - 2 if self.font_pt > 10 else (self.font_pt - 1 if self.font_pt > 8 else self.font_pt)
-        secondary_font_size = max(8, secondary_font_size) 
-
     # Top buttons (settings, today, center) have been removed and replaced by a context menu.
 
-        self.date_label = QLabel()
-        self.date_label.setFont(QFont(DEFAULT_FONT_FAMILY, self.font_pt))
+        self.date_label = ShadowTextLabel()
         self.date_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        
-        scheme = self.get_current_color_scheme()
-        if self.boxed_style:
-            # Boxed mode: transparent bg, box_text color, no shadow
-            label_style = f"background-color: transparent; color: {scheme['box_text'].name(QColor.NameFormat.HexArgb)}; padding: 0px;"
-            self.date_label.setStyleSheet(label_style)
-            self.date_label.setGraphicsEffect(None) # Explicitly remove shadow
-        else:
-            # Non-boxed mode: transparent bg, widget_text color, with shadow
-            label_style = f"background-color: transparent; color: {scheme['widget_text'].name(QColor.NameFormat.HexArgb)}; padding: 0px;"
-            self.date_label.setStyleSheet(label_style)
-            self.date_label.setGraphicsEffect(self.shadow())
 
         # --- Navigation Buttons - Icons set to standard visual direction ---
         self.nav_left_button = QPushButton("◀") # Left button, "previous" icon
         self.nav_right_button = QPushButton("▶") # Right button, "next" icon
 
-        nav_button_font_size = self.font_pt 
         for btn in [self.nav_left_button, self.nav_right_button]:
-            btn.setFont(QFont(DEFAULT_FONT_FAMILY, nav_button_font_size))
             btn.setFixedSize(30, 30) 
-            btn.setFlat(True) # Flat appearance, detailed style (including hover) in update_date
+            btn.setFlat(True) # Flat appearance, detailed style (including hover) in restyle
             btn.setGraphicsEffect(self.shadow())
         
         self.nav_right_button.clicked.connect(self.prev_day) 
@@ -886,45 +875,32 @@ class CalendarWidget(QWidget):
         date_row_layout.addWidget(self.nav_right_button) 
         main_layout.addLayout(date_row_layout)
 
-        if not self.compact_mode:
-            self.sub_label = QLabel()
-            self.sub_label.setFont(QFont(DEFAULT_FONT_FAMILY, secondary_font_size))
-            self.sub_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            # scheme is already available from date_label styling
-            if self.boxed_style:
-                # Boxed mode: transparent bg, box_text color, no shadow
-                label_style = f"background-color: transparent; color: {scheme['box_text'].name(QColor.NameFormat.HexArgb)}; padding: 0px;"
-                self.sub_label.setStyleSheet(label_style)
-                self.sub_label.setGraphicsEffect(None)
-            else:
-                # Non-boxed mode: transparent bg, widget_text color, with shadow
-                label_style = f"background-color: transparent; color: {scheme['widget_text'].name(QColor.NameFormat.HexArgb)}; padding: 0px;"
-                self.sub_label.setStyleSheet(label_style)
-                self.sub_label.setGraphicsEffect(self.shadow())
-            main_layout.addWidget(self.sub_label)
-
-            self.event_label = QLabel("مناسبت: ---")
-            self.event_label.setFont(QFont(DEFAULT_FONT_FAMILY, secondary_font_size))
-            self.event_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            # scheme is already available from date_label styling
-            if self.boxed_style:
-                # Boxed mode: transparent bg, box_text color, no shadow
-                label_style = f"background-color: transparent; color: {scheme['box_text'].name(QColor.NameFormat.HexArgb)}; padding: 0px;"
-                self.event_label.setStyleSheet(label_style)
-                self.event_label.setGraphicsEffect(None)
-            else:
-                # Non-boxed mode: transparent bg, widget_text color, with shadow
-                label_style = f"background-color: transparent; color: {scheme['widget_text'].name(QColor.NameFormat.HexArgb)}; padding: 0px;"
-                self.event_label.setStyleSheet(label_style)
-                self.event_label.setGraphicsEffect(self.shadow())
-            self.event_label.setWordWrap(True)
-            main_layout.addWidget(self.event_label)
+        # The secondary rows always exist; compact mode only hides them
+        self.sub_label = ShadowTextLabel()
+        self.sub_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        main_layout.addWidget(self.sub_label)
+
+        self.event_label = ShadowTextLabel("مناسبت: ---")
+        self.event_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.event_label.setWordWrap(True)
+        main_layout.addWidget(self.event_label)
+
+        self.holiday_label = ShadowTextLabel()
+        self.holiday_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        main_layout.addWidget(self.holiday_label)
+
+        # Shadows are created once and only enabled/disabled by restyle
+        for label in [self.date_label, self.sub_label, self.event_label, self.holiday_label]:
+            label.setGraphicsEffect(self.shadow())
 
-            # The old bottom_buttons_layout is intentionally omitted here as its functionality
-            # has been moved to the icon buttons in the top_right_layout.
+        self.month_grid = MonthGridWidget(self.date_index, self)
+        self.month_grid.date_clicked.connect(self._on_month_grid_date_clicked)
+        self.month_grid.setVisible(self.month_view)
+        main_layout.addWidget(self.month_grid, 0, Qt.AlignmentFlag.AlignHCenter)
 
         self.setLayout(main_layout)
-        self.update_date()
+        with startup_profiler.phase("restyle + first update_date"):
+            self.restyle(refresh_text=True)
         
         # Only center the widget if no position was loaded during initialization
         if not hasattr(self, '_position_loaded') or not self._position_loaded:
@@ -932,101 +908,193 @@ class CalendarWidget(QWidget):
             # Save this position as the default
             self.save_position()
 
+    def restyle(self, refresh_text=False):
+        """
+        Applies the current scheme, box style, font size and compact mode to the existing widgets.
+        The day's text is only re-rendered when `refresh_text` is set (e.g. compact mode changed what is shown).
+        """
+        secondary_font_size = self.font_pt - 2 if self.font_pt > 10 else (self.font_pt - 1 if self.font_pt > 8 else self.font_pt)
+        secondary_font_size = max(8, secondary_font_size) 
+
+        self.date_label.setFont(QFont(DEFAULT_FONT_FAMILY, self.font_pt))
+        self.sub_label.setFont(QFont(DEFAULT_FONT_FAMILY, secondary_font_size))
+        self.event_label.setFont(QFont(DEFAULT_FONT_FAMILY, secondary_font_size))
+        self.holiday_label.setFont(QFont(DEFAULT_FONT_FAMILY, max(8, secondary_font_size - 2)))
+        for btn in [self.nav_left_button, self.nav_right_button]:
+            btn.setFont(QFont(DEFAULT_FONT_FAMILY, self.font_pt))
+
+        # Style for QLabels: boxed mode uses box_text and no shadow, non-boxed widget_text with shadow
+        apply_stylesheet(self.date_label, self.get_element_style(element_should_have_own_box=self.boxed_style, is_button=False))
+        secondary_style = stylesheet(self.active_scheme_key, self.boxed_style, ROLE_TEXT)
+        apply_stylesheet(self.sub_label, secondary_style)
+        apply_stylesheet(self.event_label, secondary_style)
+        apply_stylesheet(self.holiday_label, secondary_style)
+        # Labels are shadowed only when not boxed; buttons always are, except in low-cost mode
+        for label in [self.date_label, self.sub_label, self.event_label, self.holiday_label]:
+            label.graphicsEffect().setEnabled(not self.boxed_style and not self.low_cost_rendering)
+            label.set_cached_shadow(not self.boxed_style and self.low_cost_rendering)
+        for btn in [self.nav_left_button, self.nav_right_button]:
+            btn.graphicsEffect().setEnabled(not self.low_cost_rendering)
+
+        # Nav buttons use the button style with hover
+        button_style_str = self.get_element_style(element_should_have_own_box=self.boxed_style, is_button=True)
+        apply_stylesheet(self.nav_left_button, button_style_str)
+        apply_stylesheet(self.nav_right_button, button_style_str)
+
+        self.sub_label.setVisible(not self.compact_mode)
+        self.event_label.setVisible(not self.compact_mode)
+        self.holiday_label.setVisible(not self.compact_mode)
+        self._style_month_grid()
+
+        if refresh_text:
+            self.update_date()
+        else:
+            self.adjustSize()
+
+    def _render_day_view(self, j_date):
+        """
+        Returns the formatted DayView of a day, reusing the LRU cache when possible.
+        Only reads the event store; fetching is left to update_date for the day actually shown.
+        """
+        key = (date_key(j_date), self.compact_mode, self.active_scheme_key, self.font_pt)
+        view = self.day_view_cache.get(key)
+        if view is None:
+            date_text = format_day(j_date)
+            sub_text = holiday_date = None
+            if not self.compact_mode:
+                sub_text = format_other_calendars(j_date)
+                holiday_date = next_holiday(j_date)
+            view = DayView(date_text, sub_text, holiday_date)
+            self.day_view_cache.put(key, view)
+
+        if not self.compact_mode:
+            store_version = self.event_store.version
+            # An offline day becomes fetchable again once its backoff passes, without any store change
+            if view.store_version != store_version or view.event_state == EVENTS_OFFLINE:
+                cached_events = self._load_event_from_cache(j_date)
+                if cached_events is not None:
+                    view.event_text, view.event_state = self._format_events_text(cached_events), EVENTS_READY
+                elif self.event_store.needs_fetch(j_date):
+                    view.event_text, view.event_state = "مناسبت: در حال دریافت...", EVENTS_MISSING
+                else:
+                    # Failed recently; the retry timer will try again once its backoff has passed
+                    view.event_text, view.event_state = "مناسبت: (آفلاین - بدون اطلاعات)", EVENTS_OFFLINE
+                view.holiday_text = self._format_next_holiday_text(j_date, view.holiday_date)
+                view.store_version = store_version
+        return view
+
+    def _schedule_day_view_prerender(self, direction):
+        """Queues the neighbours of the displayed day for rendering in idle time, mostly in the direction of travel."""
+        behind = -direction if direction else -1
+        ahead = direction if direction else 1
+        self._prerender_offsets = ([self.offset + ahead * i for i in range(1, DAY_VIEW_PRERENDER_AHEAD + 1)] +
+                                   [self.offset + behind * i for i in range(1, DAY_VIEW_PRERENDER_BEHIND + 1)])
+        self.day_view_prerender_timer.start()
+
+    def _prerender_next_day_view(self):
+        # One day per timer tick, so pending input is always handled first
+        while self._prerender_offsets:
+            offset = self._prerender_offsets.pop(0)
+            j_date = jdatetime.date.today() + jdatetime.timedelta(days=offset)
+            if (date_key(j_date), self.compact_mode, self.active_scheme_key, self.font_pt) not in self.day_view_cache:
+                self._render_day_view(j_date)
+                break
+        if self._prerender_offsets:
+            self.day_view_prerender_timer.start()
+
     def update_date(self):
         today = jdatetime.date.today() + jdatetime.timedelta(days=self.offset)
-        g = today.togregorian(); h = Gregorian(g.year, g.month, g.day).to_hijri()
-        scheme = color_schemes[self.active_scheme_key] # For hover colors
+        direction = (self.offset > self._rendered_offset) - (self.offset < self._rendered_offset)
+        self._rendered_offset = self.offset
 
-        if hasattr(self,'date_label'): self.date_label.setText(f"{weekday_fa[today.strftime('%A')]} {today.day} {months_fa[today.strftime('%B')]} {today.year}")
+        self.displayed_date_key = date_key(today)
+        view = self._render_day_view(today)
+
+        if hasattr(self,'date_label'): self.date_label.setText(view.date_text)
+
+        if self.month_view and hasattr(self, 'month_grid'):
+            previous_month = self.month_grid.displayed_month()
+            self.month_grid.set_selected_date(today, jdatetime.date.today())
+            if self.month_grid.displayed_month() != previous_month:
+                # One planned batch for the whole month (a ?year= request when most of it is missing).
+                # Planned before the day on screen, which it usually covers as well.
+                fetch_batch = self._fetch_and_cache_range_events(jdatetime.date(today.year, today.month, 1),
+                                                                 jdatetime.date(today.year, today.month, jalali_month_length(today.year, today.month)),
+                                                                 ON_SCREEN_PRIORITY)
+                self.navigation.track_fetch("month", self.month_grid.displayed_month(), fetch_batch)
 
         if hasattr(self,'compact_mode') and not self.compact_mode:
-            if hasattr(self,'sub_label'): self.sub_label.setText(f"میلادی: {g.strftime('%d %B %Y')}     ⬥     قمری: {h.day} {hijri_months_fa[h.month]} {h.year}")
+            if hasattr(self,'sub_label'): self.sub_label.setText(view.sub_text)
+            if hasattr(self,'holiday_label'): self.holiday_label.setText(view.holiday_text)
             if hasattr(self,'event_label'):
-                cached_events = self._load_event_from_cache(today)
-            if cached_events is not None:
-                self.event_label.setText("مناسبت: " + ", ".join(cached_events) if cached_events else "مناسبت: ---")
-            else:
-                try:
-                    # Use the new pnldev.com API for inline fetching
-                    url = f"https://pnldev.com/api/calender?year={today.year}&month={today.month}&day={today.day}"
-                    response = requests.get(url, timeout=10)
-                    response.raise_for_status()
-                    data = response.json()
-                    ev = [] # Default to empty list
-                    if data.get("status") is True and "result" in data and isinstance(data["result"], dict):
-                        ev = data["result"].get("event", [])
-                        if not isinstance(ev, list):
-                            print(f"  Events data for {today.strftime('%Y-%m-%d')} in update_date is not a list: {ev}. Treating as no events.")
-                            ev = []
-                    else: # This 'else' means data.get("status") was not True or 'result' was missing/not a dict
-                        current_status_val = "Unknown"
-                        current_error_msg = "Malformed API response or status not true."
-                        if isinstance(data, dict):
-                            current_status_val = str(data.get('status', 'N/A')) # Ensure string for printing
-                            raw_error_msg = data.get('result', 'No result field or API status not true')
-                            if isinstance(raw_error_msg, dict) and "message" in raw_error_msg:
-                                current_error_msg = str(raw_error_msg["message"])
-                            elif not isinstance(raw_error_msg, str):
-                                current_error_msg = str(raw_error_msg)
-                            else:
-                                current_error_msg = raw_error_msg # It's already a string
-                        else:
-                            current_error_msg = f"API response was not a dictionary: {str(data)[:100]}" # Log part of the unexpected data
-                        
-                        print(f"  Failed to parse events for {today.strftime('%Y-%m-%d')} in update_date. API Status: {current_status_val}. Message: '{current_error_msg}'")
-                    self.event_label.setText("مناسبت: " + ", ".join(ev) if ev else "مناسبت: ---")
-                    self._save_event_to_cache(today, ev)
-                    # --- Automatic background cache for surrounding days ---
-                    if not self.is_background_caching_busy:
-                        print(f"Online: Triggering background cache for {today.strftime('%Y-%m-%d')} +/- 7 days.")
-                        cache_start_date = today - jdatetime.timedelta(days=7)
-                        cache_end_date = today + jdatetime.timedelta(days=7)
-                        # This call will manage its own busy flag
-                        self._fetch_and_cache_range_events(cache_start_date, cache_end_date)
-                    else:
-                        print("Skipping automatic background cache: process already busy.")
-                except requests.exceptions.RequestException as e:
-                    # This catches network errors, timeout, HTTP errors, etc.
-                    print(f"API Request failed: {e}")
-                    self.event_label.setText("مناسبت: (آفلاین - بدون اطلاعات)")
-                except json.JSONDecodeError as e:
-                    print(f"JSON Decode Error: {e}")
-                    self.event_label.setText("مناسبت: (خطا در پاسخ API)")
-                except Exception as e: # Catch any other unexpected error during fetch
-                    print(f"Unexpected error during event fetch: {e}")
-                    self.event_label.setText("مناسبت: (خطای نامشخص)")
-        
-        # Style for QLabels
-        label_style_str = self.get_element_style(element_should_have_own_box=self.boxed_style, is_button=False)
-        # Style for QPushButtons (nav, today, center)
-        button_style_str = self.get_element_style(element_should_have_own_box=self.boxed_style, is_button=True)
-
-        if hasattr(self,'date_label'): self.date_label.setStyleSheet(label_style_str)
-        
-        # Nav buttons use the button style with hover
-        if hasattr(self,'nav_left_button'): self.nav_left_button.setStyleSheet(button_style_str)
-        if hasattr(self,'nav_right_button'): self.nav_right_button.setStyleSheet(button_style_str)
-        
+                self.event_label.setText(view.event_text)
+                fetch_batch = 0
+                if view.event_state == EVENTS_MISSING and not self.event_fetcher.is_fetching(today):
+                    # Fetched in the background; _on_events_fetched fills the label in if we are still on this day
+                    fetch_batch = self.event_fetcher.fetch_day(today)
+                # A day covered by another batch (e.g. the month's) is not tracked here, so moving on cannot cancel that batch
+                self.navigation.track_fetch("day", self.displayed_date_key, fetch_batch)
+
+        # Stylesheets only depend on the theme and are applied by restyle(), not per day
         self.adjustSize()
+        self._schedule_day_view_prerender(direction)
+
+    # All navigation goes through the controller, which coalesces it to one render per frame
+    def prev_day(self): self.navigation.step_days(-1)
+    def next_day(self): self.navigation.step_days(1)
+    def reset_today(self): self.navigation.go_today()
+    def go_today(self): self.navigation.go_today()
+    def next_month(self): self.navigation.step_months(1)
+    def prev_month(self): self.navigation.step_months(-1)
+    def next_year(self): self.navigation.step_months(12)
+    def prev_year(self): self.navigation.step_months(-12)
+
+    def _next_day_rollover(self):
+        # Due at once if the date moved while we were asleep or the clock was changed, otherwise at midnight
+        return 0 if jdatetime.date.today() != self._today else next_local_midnight()
+
+    def _on_day_rollover(self):
+        displayed_date = jdatetime.date(*parse_date_key(self.displayed_date_key))
+        self._today = jdatetime.date.today()
+        self.day_rollover_timer.start()
+        if self.navigation.target_offset == 0:
+            self.update_date() # Today's view moves on to the new day
+        else:
+            self.navigation.go_to_date(displayed_date) # Any other day stays on screen; only its offset changes
+
+    def _show_offset(self, offset):
+        self.offset = offset
+        self.update_date()
+
+    def _on_month_grid_date_clicked(self, year, month, day):
+        self.navigation.go_to_date(jdatetime.date(year, month, day))
 
-    def prev_day(self): self.offset -= 1; self.update_date()
-    def next_day(self): self.offset += 1; self.update_date()
-    def reset_today(self): self.offset = 0; self.update_date()
+    def _style_month_grid(self):
+        scheme = self.get_current_color_scheme()
+        self.month_grid.set_fonts(DEFAULT_FONT_FAMILY, self.font_pt)
+        self.month_grid.set_colors(scheme['box_text'] if self.boxed_style else scheme['widget_text'], scheme['menu_selected_bg'])
+
+    def toggle_low_cost_rendering(self):
+        self.low_cost_rendering = not self.low_cost_rendering
+        self.settings.setValue("low_cost_rendering", "yes" if self.low_cost_rendering else "no")
+        self.restyle()
+        if self.quote_widget:
+            self.quote_widget.apply_theme()
+        if self.rss_widget:
+            self.rss_widget.apply_theme()
+
+    def toggle_month_view(self):
+        self.month_view = not self.month_view
+        self.settings.setValue("month_view", "yes" if self.month_view else "no")
+        self.month_grid.setVisible(self.month_view)
+        self.update_date()
     def center_widget_action(self): self.center_on_screen()
 
     def _create_context_menu(self):
-        menu = QMenu(self)
-        scheme = color_schemes[self.active_scheme_key]
-        menu_style = f"""
-            QMenu {{background-color:{scheme['menu_bg'].name(QColor.NameFormat.HexArgb)};color:{scheme['menu_text'].name(QColor.NameFormat.HexArgb)};border:1px solid {scheme['menu_border'].name(QColor.NameFormat.HexArgb)};padding:4px;}}
-            QMenu::item {{padding:5px 20px;border-radius:4px;}} QMenu::item:selected {{background-color:{scheme['menu_selected_bg'].name(QColor.NameFormat.HexArgb)};color:{scheme['menu_selected_text'].name(QColor.NameFormat.HexArgb)};}}
-            QMenu::separator {{height:1px;background-color:{scheme['menu_border'].name(QColor.NameFormat.HexArgb)};margin:4px 5px;}}
-        """
-        menu.setStyleSheet(menu_style)
+        menu = QMenu(self) # Styled by the application-wide menu stylesheet (theme_engine.apply_application_theme)
 
         # Theme Menu
         theme_menu = QMenu("🎨 تغییر پوسته", menu)
-        theme_menu.setStyleSheet(menu_style)
         for k, v in color_schemes.items():
             a = QAction(v['name_fa'], self, checkable=True)
             a.setChecked(k == self.active_scheme_key)
@@ -1046,9 +1114,20 @@ class CalendarWidget(QWidget):
         compact_action.triggered.connect(self.toggle_compact)
         menu.addAction(compact_action)
 
+        # Low-Cost Rendering Toggle
+        low_cost_action = QAction("⚡ حالت کم‌مصرف (سایه ساده)", self, checkable=True)
+        low_cost_action.setChecked(self.low_cost_rendering)
+        low_cost_action.triggered.connect(self.toggle_low_cost_rendering)
+        menu.addAction(low_cost_action)
+
+        # Month Grid Toggle
+        month_view_action = QAction("📅 نمای ماهانه", self, checkable=True)
+        month_view_action.setChecked(self.month_view)
+        month_view_action.triggered.connect(self.toggle_month_view)
+        menu.addAction(month_view_action)
+
         # Font Size Menu
         font_menu = QMenu("🔠 اندازه فونت", menu)
-        font_menu.setStyleSheet(menu_style)
         for lbl in font_sizes:
             a = QAction(lbl, self, checkable=True)
             a.setChecked(lbl == self.font_size_lbl)
@@ -1063,12 +1142,20 @@ class CalendarWidget(QWidget):
         cache_surrounding_days_action.setToolTip("دانلود و ذخیره مناسبت‌های ۷ روز قبل و بعد از تاریخ امروز")
         cache_surrounding_days_action.triggered.connect(self._handle_cache_surrounding_days)
         menu.addAction(cache_surrounding_days_action)
+
+        cache_next_months_action = QAction("🗓️ به‌روزرسانی کش (سه ماه آینده)", menu)
+        cache_next_months_action.setToolTip("دانلود و ذخیره مناسبت‌های این ماه و دو ماه بعد")
+        cache_next_months_action.triggered.connect(lambda: self._handle_cache_next_months(3))
+        menu.addAction(cache_next_months_action)
+
+        search_events_action = QAction("🔍 جستجوی مناسبت‌ها (Ctrl+F)", menu)
+        search_events_action.triggered.connect(self._show_event_search_dialog)
+        menu.addAction(search_events_action)
         
         menu.addSeparator()
 
         # --- Quote Widget Settings Menu --- 
         quote_settings_menu = QMenu("💬 تنظیمات جعبه نقل قول", menu) # Changed icon for clarity
-        quote_settings_menu.setStyleSheet(menu_style)
 
         # Toggle Quote Widget Visibility Action
         toggle_quote_visibility_action = QAction("👁️ نمایش/مخفی کردن جعبه", quote_settings_menu, checkable=True)
@@ -1083,7 +1170,6 @@ class CalendarWidget(QWidget):
 
         # Frequency submenu
         frequency_menu = QMenu("⏱️ فرکانس بروزرسانی", quote_settings_menu)
-        frequency_menu.setStyleSheet(menu_style)
         
         self.frequency_action_group = QActionGroup(frequency_menu)
         self.frequency_action_group.setExclusive(True)
@@ -1112,7 +1198,6 @@ class CalendarWidget(QWidget):
 
         # --- Quote Box Width Submenu ---
         width_menu = QMenu("↔️ عرض جعبه نقل قول", quote_settings_menu)
-        width_menu.setStyleSheet(menu_style)
         self.quote_width_action_group = QActionGroup(width_menu)
         self.quote_width_action_group.setExclusive(True)
 
@@ -1137,11 +1222,14 @@ class CalendarWidget(QWidget):
         edit_quotes_action.triggered.connect(self._show_edit_quotes_dialog)
         quote_settings_menu.addAction(edit_quotes_action)
 
+        load_quotes_file_action = QAction("📂 بارگذاری نقل قول‌ها از فایل", quote_settings_menu)
+        load_quotes_file_action.triggered.connect(self._show_load_quotes_file_dialog)
+        quote_settings_menu.addAction(load_quotes_file_action)
+
         menu.addMenu(quote_settings_menu) # Add Quote Settings menu to main menu
 
         # --- RSS Widget Settings Menu --- 
         rss_settings_menu = QMenu("📰 تنظیمات RSS", menu) # Changed icon for clarity
-        rss_settings_menu.setStyleSheet(menu_style)
 
         # Toggle RSS Widget Visibility Action
         self.toggle_rss_action = QAction("👁️ نمایش/مخفی کردن RSS", rss_settings_menu, checkable=True)
@@ -1161,7 +1249,6 @@ class CalendarWidget(QWidget):
 
         # RSS Box Width Submenu
         rss_width_menu = QMenu("عرض جعبه RSS", rss_settings_menu)
-        rss_width_menu.setStyleSheet(menu_style)
         rss_width_group = QActionGroup(rss_width_menu)
         rss_width_group.setExclusive(True)
 
@@ -1211,23 +1298,8 @@ class CalendarWidget(QWidget):
     def set_color_scheme(self, k):
         self.active_scheme_key = k
         self.settings.setValue("color_scheme", k)
-        self.apply_theme_stylesheet()
-        self.update_date()
-        
-        # Get the current color scheme
-        scheme = color_schemes[self.active_scheme_key]
-        
-        # Update the quote widget if it exists
-        if hasattr(self, 'quote_widget') and self.quote_widget:
-            self.quote_widget.apply_theme()
-            
-        # Update the RSS widget if it exists
-        if hasattr(self, 'rss_widget') and self.rss_widget:
-            self.rss_widget.apply_theme()
-            
-        # Update the note manager if it exists
-        if hasattr(self, 'note_manager') and self.note_manager:
-            self.note_manager.apply_theme(scheme, self.boxed_style)
+        self.apply_theme_stylesheet() # Also re-themes the quote, RSS and note widgets
+        self.restyle()
 
     def get_current_color_scheme(self):
         """Returns the currently active color scheme dictionary."""
@@ -1237,66 +1309,29 @@ class CalendarWidget(QWidget):
         self.boxed_style = not self.boxed_style
         print(f"[CalendarWidget] Toggling box style to: {self.boxed_style}") # Debug
         self.settings.setValue("boxed", "yes" if self.boxed_style else "no")
-        self.build_ui()
+        self.restyle()
+        self.update() # paintEvent draws the box
         
         # Get the current color scheme
         scheme = color_schemes[self.active_scheme_key]
         
-        # Complete recreation of the quote widget when box style changes
+        # Quote and RSS boxes are restyled in place, keeping the quote on display and the fetched feeds
         if hasattr(self, 'quote_widget') and self.quote_widget:
-            print(f"[CalendarWidget] Recreating quote_widget with boxed_style = {self.boxed_style}") # Debug
-            
-            # Save current state
-            was_visible = self.quote_widget.isVisible()
-            last_pos = self.quote_widget.pos()
-            
-            # Close the current widget
-            self.quote_widget.close()
-            self.quote_widget.deleteLater()
-            
-            # Create a new one
-            self.quote_widget = QuoteWidget(self, self.settings, self.font_pt, self.boxed_style)
-            
-            # Restore state
-            if last_pos:
-                self.quote_widget.move(last_pos)
-            if was_visible:
-                self.quote_widget.show()
-                self.quote_widget.raise_()
-
-        # Complete recreation of the rss widget when box style changes
+            self.quote_widget.update_display_settings(boxed_style=self.boxed_style)
         if hasattr(self, 'rss_widget') and self.rss_widget:
-            print(f"[CalendarWidget] Recreating rss_widget with boxed_style = {self.boxed_style}")
-            
-            # Save current state
-            rss_was_visible = self.rss_widget.isVisible()
-            rss_last_pos = self.rss_widget.pos()
-            
-            # Close the current widget
-            self.rss_widget.close()
-            self.rss_widget.deleteLater()
-            
-            # Create a new one
-            self.rss_widget = RSSReaderWidget(self, self.settings, self.font_pt, self.boxed_style)
-            
-            # Restore state
-            if rss_last_pos:
-                self.rss_widget.move(rss_last_pos)
-            if rss_was_visible:
-                self.rss_widget.show()
-                self.rss_widget.raise_()
-                
+            self.rss_widget.update_display_settings(boxed_style=self.boxed_style)
+
         # Update the note manager theme if it exists
         if hasattr(self, 'note_manager') and self.note_manager:
             print(f"[CalendarWidget] Updating note_manager with boxed_style = {self.boxed_style}")
             self.note_manager.apply_theme(scheme, self.boxed_style)
 
-    def toggle_compact(self):self.compact_mode=not self.compact_mode;self.settings.setValue("compact","yes" if self.compact_mode else "no");self.build_ui() 
+    def toggle_compact(self):self.compact_mode=not self.compact_mode;self.settings.setValue("compact","yes" if self.compact_mode else "no");self.restyle(refresh_text=True)
     def set_font_size(self, lbl):
         self.font_size_lbl = lbl
         self.font_pt = font_sizes[lbl]
         self.settings.setValue("font_size", lbl)
-        self.build_ui()
+        self.restyle()
         
         # Get the current color scheme
         scheme = color_schemes[self.active_scheme_key]
@@ -1333,6 +1368,11 @@ class CalendarWidget(QWidget):
                 self.quote_widget.update_display_settings(width_key=new_width_key)
             # If quote_widget is None, it will pick up the new width_key from settings upon its initialization.
 
+    def _show_event_search_dialog(self):
+        dialog = EventSearchDialog(self.event_index, self.event_store, self.navigation.target_date(), self)
+        if dialog.exec() == QDialog.DialogCode.Accepted and dialog.selected_key:
+            self.navigation.go_to_date(jdatetime.date(*parse_date_key(dialog.selected_key)))
+
     def _show_edit_quotes_dialog(self):
         if hasattr(self, 'quote_widget') and self.quote_widget:
             initial_quotes = getattr(self.quote_widget, 'quotes_list', [])
@@ -1351,6 +1391,15 @@ class CalendarWidget(QWidget):
         else:
             print("Quote widget not available to edit quotes.")
 
+    def _show_load_quotes_file_dialog(self):
+        if not (hasattr(self, 'quote_widget') and self.quote_widget):
+            print("Quote widget not available to load quotes.")
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "بارگذاری نقل قول‌ها", "",
+                                              "Quotes (*.json *.jsonl *.txt);;All files (*)")
+        if path and not self.quote_widget.set_quote_corpus(path):
+            QMessageBox.warning(self, "بارگذاری نقل قول‌ها", "فایل نقل قول قابل خواندن نیست.")
+
     def toggle_quote_widget_visibility_action(self):
         if not hasattr(self, 'quote_widget') or not self.quote_widget:
             self.init_quote_widget() # Ensure it's created if called early
@@ -1428,60 +1477,8 @@ class CalendarWidget(QWidget):
             print(f"[CalendarWidget] RSS widget width key set to: {new_width_key}")
 
     def get_element_style(self, element_should_have_own_box, is_button=False):
-        scheme = self.get_current_color_scheme()
-        padding_str = "padding: 4px 6px;"  # Default for boxed elements or standalone flat buttons
-        border_radius_str = "border-radius: 6px;" # Default for boxed elements
-        hover_style_specifics = ""
-
-        if self.boxed_style:  # CalendarWidget itself is boxed
-            # Elements inside are flat relative to CalendarWidget's box
-            base_bg_color_str = "background-color: transparent;"
-            base_text_color_str = f"color: {scheme['box_text'].name(QColor.NameFormat.HexArgb)};"
-            border_style_str = "border: none;"
-            border_radius_str = "border-radius: 4px;" # Smaller radius for flat items within a box
-            if not is_button: # Label inside boxed CalendarWidget
-                padding_str = "padding: 0px;" # No padding for truly flat labels
-            # else: button padding remains "4px 6px" for clickability and visual balance
-            
-            if is_button:
-                hover_bg_color_str = f"background-color: {scheme.get('flat_element_hover_bg', scheme['flat_hover_bg']).name(QColor.NameFormat.HexArgb)};"
-                hover_style_specifics = f"{hover_bg_color_str}"
-
-        else:  # CalendarWidget itself is NOT boxed (flat)
-            if element_should_have_own_box: # Element wants its own box (and parent is flat)
-                base_bg_color_str = f"background-color: {scheme['box_bg'].name(QColor.NameFormat.HexArgb)};"
-                base_text_color_str = f"color: {scheme['box_text'].name(QColor.NameFormat.HexArgb)};"
-                base_border_color = scheme['box_border']
-                lighter_border = base_border_color.lighter(130).name(QColor.NameFormat.HexArgb)
-                darker_border = base_border_color.darker(130).name(QColor.NameFormat.HexArgb)
-                border_style_str = (f"border-width: 1px; border-style: solid;"
-                                   f"border-top-color: {lighter_border}; border-left-color: {lighter_border};"
-                                   f"border-bottom-color: {darker_border}; border-right-color: {darker_border};")
-                # padding_str and border_radius_str use their defaults for a boxed element
-                if is_button:
-                    hover_bg_color_str = f"background-color: {scheme['box_bg_hover'].name(QColor.NameFormat.HexArgb)};"
-                    hover_style_specifics = f"{hover_bg_color_str}"
-            else:  # Element is flat, and CalendarWidget is also flat
-                base_bg_color_str = "background-color: transparent;"
-                base_text_color_str = f"color: {scheme['widget_text'].name(QColor.NameFormat.HexArgb)};"
-                border_style_str = "border: none;"
-                border_radius_str = "border-radius: 4px;" # Smaller radius for flat items
-                if not is_button: # Flat label in flat parent
-                    padding_str = "padding: 1px;" # Minimal padding
-                # else: button padding remains "4px 6px" for clickability
-                
-                if is_button:
-                    hover_bg_color_str = f"background-color: {scheme['flat_hover_bg'].name(QColor.NameFormat.HexArgb)};"
-                    hover_style_specifics = f"{hover_bg_color_str}"
-        
-        base_style = f"{base_bg_color_str} {base_text_color_str} {border_style_str} {padding_str} {border_radius_str}"
-
-        if is_button:
-            selector = "QPushButton"
-            return f"{selector} {{ {base_style} }} {selector}:hover {{ {hover_style_specifics} }}"
-        else:  # For QLabels
-            selector = "QLabel"
-            return f"{selector} {{ {base_style} }}"
+        """Returns the cached stylesheet of a label or button inside the calendar (see theme_engine)."""
+        return stylesheet(self.active_scheme_key, self.boxed_style, element_role(element_should_have_own_box, is_button))
 
     def shadow(self): # Utility for shadow effect
         s = QGraphicsDropShadowEffect()
@@ -1521,6 +1518,9 @@ class CalendarWidget(QWidget):
 
     def closeEvent(self, event):
         self.save_position() # Use the correct method to save position
+        self.event_fetcher.shutdown()
+        close_session()
+        self._flush_event_cache()
         if hasattr(self, 'quote_widget') and self.quote_widget:
             self.quote_widget.save_settings()
         if hasattr(self, 'rss_widget') and self.rss_widget:
@@ -1549,6 +1549,8 @@ class CalendarWidget(QWidget):
             self.go_today()
         elif event.key() == Qt.Key.Key_M and (event.modifiers() & Qt.KeyboardModifier.ControlModifier):
             self._show_or_create_note_manager()
+        elif event.key() == Qt.Key.Key_F and (event.modifiers() & Qt.KeyboardModifier.ControlModifier):
+            self._show_event_search_dialog()
         else:
             super().keyPressEvent(event)
 
@@ -1644,7 +1646,8 @@ class CalendarWidget(QWidget):
         self.settings.endArray()
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    with startup_profiler.phase("QApplication"):
+        app = QApplication(sys.argv)
     # Set a fallback font for systems that don't have the primary one
     try:
         QFont(DEFAULT_FONT_FAMILY)
@@ -1652,6 +1655,8 @@ if __name__ == "__main__":
         print(f"Warning: Font '{DEFAULT_FONT_FAMILY}' not found. Falling back to system default.")
         # The system will use a default font, no explicit action needed for QApplication
     
-    main_widget = CalendarWidget()
+    with startup_profiler.phase("CalendarWidget"):
+        main_widget = CalendarWidget()
     main_widget.show()
+    startup_profiler.mark("window shown")
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,166 @@
+import builtins
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Startup timeline of the calendar: monotonic timestamps for every import and every
+# phase of CalendarWidget construction, from the moment this module is imported (the
+# first line of the main script) to the first paint of the calendar.
+#
+# Off unless the app is started with --profile-startup or SHAMSICAL_PROFILE_STARTUP
+# set; the env var's value labels the run ("cold", "warm", ...), "1" means "run".
+# When off, phase() hands back a shared null context and nothing else is hooked.
+# When on, finish() prints the timeline, appends it to a rolling history file and
+# compares it with the median of earlier runs that carry the same label.
+
+PROFILE_ENV_VAR = "SHAMSICAL_PROFILE_STARTUP"
+PROFILE_FLAG = "--profile-startup"
+HISTORY_FILE = "startup_profile_history.jsonl"
+HISTORY_SIZE = 50            # Runs kept in the history file
+REPORT_MIN_IMPORT_MS = 5.0   # Faster imports are summed up in the report instead of listed
+
+_t0 = time.monotonic()
+_label = os.environ.get(PROFILE_ENV_VAR, "").strip()
+enabled = bool(_label) or PROFILE_FLAG in sys.argv
+if enabled and _label in ("", "1"):
+    _label = "run"
+
+_imports = []       # (module name, start s, duration s), top-level imports only
+_phases = []        # (name, start s, duration s, depth)
+_marks = []         # (name, s)
+_phase_depth = 0
+_finished = not enabled
+_original_import = builtins.__import__
+_import_depth = 0
+_main_thread = threading.get_ident()
+_NULL_PHASE = nullcontext()
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """builtins.__import__ replacement that times imports of modules not loaded yet."""
+    global _import_depth
+    if level or name in sys.modules or threading.get_ident() != _main_thread:
+        return _original_import(name, globals, locals, fromlist, level)
+    start = time.monotonic()
+    _import_depth += 1
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _import_depth -= 1
+        if _import_depth == 0: # Nested imports are included in the outermost one
+            _imports.append((name, start - _t0, time.monotonic() - start))
+
+
+if enabled:
+    builtins.__import__ = _timed_import
+
+
+def phase(name):
+    """Context manager timing one startup phase. Phases may nest; ignored once startup is over."""
+    if _finished:
+        return _NULL_PHASE
+    return _phase(name)
+
+
+@contextmanager
+def _phase(name):
+    global _phase_depth
+    start = time.monotonic()
+    depth = _phase_depth
+    _phase_depth += 1
+    try:
+        yield
+    finally:
+        _phase_depth -= 1
+        _phases.append((name, start - _t0, time.monotonic() - start, depth))
+
+
+def mark(name):
+    """Records an instant on the timeline (e.g. "event loop started")."""
+    if not _finished:
+        _marks.append((name, time.monotonic() - _t0))
+
+
+def finish(name="first paint"):
+    """Ends the timeline at `name`, restores the import hook and dumps the report. Only the first call counts."""
+    global _finished
+    if _finished:
+        return
+    _finished = True
+    builtins.__import__ = _original_import
+    total = time.monotonic() - _t0
+    _marks.append((name, total))
+    run = {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "label": _label,
+        "frozen": bool(getattr(sys, "frozen", False)),
+        "total_ms": round(total * 1000, 1),
+        "phases": {phase_name: round(duration * 1000, 1) for phase_name, _, duration, _ in _phases},
+        "imports": {module: round(duration * 1000, 1) for module, _, duration in _imports},
+    }
+    history = _load_history()
+    print(_format_report(run, [past for past in history if past.get("label") == _label]))
+    _save_history(history + [run])
+
+
+def _history_path():
+    if getattr(sys, "frozen", False): # Next to the executable, not in the onefile unpack directory
+        return os.path.join(os.path.dirname(os.path.abspath(sys.executable)), HISTORY_FILE)
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), HISTORY_FILE)
+
+
+def _load_history():
+    try:
+        with open(_history_path(), "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"[StartupProfiler] Could not read history: {e}")
+        return []
+
+
+def _save_history(history):
+    try:
+        with open(_history_path(), "w", encoding="utf-8") as f:
+            for run in history[-HISTORY_SIZE:]:
+                f.write(json.dumps(run, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"[StartupProfiler] Could not write history: {e}")
+
+
+def _versus(value, past_values):
+    """Formats `value` against the median of earlier runs, or returns "" without history."""
+    if not past_values:
+        return ""
+    median = statistics.median(past_values)
+    return f"  (median {median:.1f} ms, {value - median:+.1f})"
+
+
+def _format_report(run, past_runs):
+    lines = [f"[StartupProfiler] {run['label']}: first paint after {run['total_ms']:.1f} ms"
+             f"{_versus(run['total_ms'], [past['total_ms'] for past in past_runs])}"
+             f"  ({len(past_runs)} earlier run(s) with this label)"]
+    lines.append("  Phases:")
+    for name, start, duration, depth in sorted(_phases, key=lambda p: p[1]):
+        ms = duration * 1000
+        past = [past["phases"][name] for past in past_runs if name in past.get("phases", {})]
+        lines.append(f"    {start * 1000:8.1f}  {'  ' * depth}{name}: {ms:.1f} ms{_versus(ms, past)}")
+    lines.append("  Imports:")
+    small_count, small_ms = 0, 0.0
+    for module, start, duration in _imports:
+        ms = duration * 1000
+        if ms < REPORT_MIN_IMPORT_MS:
+            small_count += 1
+            small_ms += ms
+            continue
+        past = [past["imports"][module] for past in past_runs if module in past.get("imports", {})]
+        lines.append(f"    {start * 1000:8.1f}  {module}: {ms:.1f} ms{_versus(ms, past)}")
+    if small_count:
+        lines.append(f"    {small_count} import(s) under {REPORT_MIN_IMPORT_MS:.0f} ms: {small_ms:.1f} ms")
+    for name, at in _marks:
+        lines.append(f"  {at * 1000:8.1f}  {name}")
+    return "\n".join(lines)
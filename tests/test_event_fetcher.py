@@ -0,0 +1,46 @@
+import os
+import sys
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jdatetime
+from PyQt6.QtCore import QCoreApplication, QEventLoop, QTimer
+
+import event_fetcher
+
+
+class EventFetcherTest(unittest.TestCase):
+    def setUp(self):
+        self.app = QCoreApplication.instance() or QCoreApplication([])
+        self.addCleanup(setattr, event_fetcher, 'fetch_year_events', event_fetcher.fetch_year_events)
+
+    def _run_batch(self, fetcher, j_dates):
+        fetched, failed = {}, []
+        fetcher.events_fetched.connect(fetched.update)
+        fetcher.events_failed.connect(lambda keys, message: failed.extend(keys))
+        loop = QEventLoop()
+        fetcher.batch_finished.connect(lambda batch_id: loop.quit())
+        QTimer.singleShot(5000, loop.quit)
+        self.assertTrue(fetcher.fetch_days(j_dates))
+        loop.exec()
+        return fetched, failed
+
+    def test_days_left_out_of_a_year_response_fail(self):
+        # Every planned day but the 2nd comes back; the 2nd must be retried, not cached as "no events"
+        days = [jdatetime.date(1390, 1, d) for d in range(1, 31)]
+        response = {f"1390-01-{d:02d}": [] for d in range(1, 31) if d != 2}
+        response["1390-01-05"] = ["event"]
+        event_fetcher.fetch_year_events = lambda year: dict(response)
+        fetcher = event_fetcher.EventFetcher()
+        self.addCleanup(fetcher.shutdown)
+        fetched, failed = self._run_batch(fetcher, days)
+        self.assertEqual(failed, ["1390-01-02"])
+        self.assertNotIn("1390-01-02", fetched)
+        self.assertEqual(fetched["1390-01-05"], ["event"])
+        self.assertFalse(fetcher.is_fetching(days[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
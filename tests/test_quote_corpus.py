@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quote_corpus import QuoteFile, ShuffleCursor
+
+
+class QuoteFileTest(unittest.TestCase):
+    def _quotes(self, text):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        quote_file = QuoteFile(path)
+        self.addCleanup(quote_file.close)
+        return [quote for quote in (quote_file[i] for i in range(len(quote_file))) if quote is not None]
+
+    def test_indented_array_of_objects(self):
+        data = [{"text": "اول", "author": "الف"}, {"quote": "دوم"}, {"text": "}"}]
+        self.assertEqual(self._quotes(json.dumps(data, ensure_ascii=False, indent=4)), ["اول — الف", "دوم", "}"])
+
+    def test_indented_array_of_strings(self):
+        self.assertEqual(self._quotes(json.dumps(["یک", "دو"], ensure_ascii=False, indent=2)), ["یک", "دو"])
+
+    def test_one_line_array(self):
+        self.assertEqual(self._quotes(json.dumps(["یک", {"text": "دو"}], ensure_ascii=False)), ["یک", "دو"])
+
+    def test_array_with_brackets_and_escapes_in_strings(self):
+        data = [{"text": 'a "b" [c], {d} \\', "tags": [1, {"k": "]"}]}, 'e \\" ],']
+        self.assertEqual(self._quotes(json.dumps(data, indent=2)), ['a "b" [c], {d} \\', 'e \\" ],'])
+
+    def test_plain_text_starting_with_a_bracket(self):
+        self.assertEqual(self._quotes('[یادداشت] یک\nدو\n'), ['[یادداشت] یک', 'دو'])
+
+    def test_json_lines_and_plain_text(self):
+        text = '{"text": "یک", "author": "الف"}\n"دو"\nسه\n\n}\n'
+        self.assertEqual(self._quotes(text), ["یک — الف", "دو", "سه"])
+
+
+class ShuffleCursorTest(unittest.TestCase):
+    def test_round_visits_every_index_once(self):
+        for size in (1, 2, 3, 7, 64, 1000, 4097):
+            cursor = ShuffleCursor(size, seed=12345)
+            self.assertEqual(sorted(cursor.next() for _ in range(size)), list(range(size)), size)
+
+    def test_new_round_reshuffles(self):
+        cursor = ShuffleCursor(500, seed=1)
+        first = [cursor.next() for _ in range(500)]
+        second = [cursor.next() for _ in range(500)]
+        self.assertEqual(sorted(second), list(range(500)))
+        self.assertNotEqual(first, second)
+
+    def test_resume_from_seed_and_position(self):
+        cursor = ShuffleCursor(300, seed=99)
+        shown = [cursor.next() for _ in range(120)]
+        resumed = ShuffleCursor(300, cursor.seed, cursor.position)
+        rest = [resumed.next() for _ in range(180)]
+        self.assertEqual(sorted(shown + rest), list(range(300)))
+
+    def test_invalid_position_starts_over(self):
+        cursor = ShuffleCursor(10, seed=5, position=11)
+        self.assertEqual(cursor.position, 0)
+
+    def test_empty(self):
+        self.assertIsNone(ShuffleCursor(0).next())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import importlib.machinery
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt6.QtCore import QSettings
+from PyQt6.QtWidgets import QApplication
+
+
+def _load_widget_module():
+    loader = importlib.machinery.SourceFileLoader("shamsi_calendar_widget", os.path.join(ROOT, "shamsi_calendar_widget.pyw"))
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+class QuoteWidgetSettingsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+        cls.scw = _load_widget_module()
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.settings = QSettings(os.path.join(self.temp_dir, "settings.ini"), QSettings.Format.IniFormat)
+        self.bundled = self._write_quotes("bundled.json", ["bundled 1", "bundled 2", "bundled 3"])
+        self.addCleanup(setattr, self.scw, 'bundled_quotes_path', self.scw.bundled_quotes_path)
+        self.scw.bundled_quotes_path = lambda: self.bundled
+
+    def _write_quotes(self, name, quotes):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(quotes, f, ensure_ascii=False, indent=2)
+        return path
+
+    def _launch(self):
+        """One run of the quote widget: load, show a quote, save on exit. Returns (quotes file in use, quote shown)."""
+        widget = self.scw.QuoteWidget(None, self.settings, 12, False)
+        try:
+            path = widget.quote_corpus.path if widget.quote_corpus is not None else None
+            return path, widget.quote_label.text()
+        finally:
+            widget.quote_timer.stop()
+            widget.save_settings()
+            widget.deleteLater()
+
+    def test_bundled_quotes_survive_restarts(self):
+        for _ in range(2):
+            path, text = self._launch()
+            self.assertEqual(path, self.bundled)
+            self.assertTrue(text.startswith("bundled"), text)
+
+    def test_saved_list_is_kept(self):
+        self.settings.setValue("quote_widget/quotes_list", ["mine"])
+        for _ in range(2):
+            self.assertEqual(self._launch(), (None, "mine"))
+
+    def test_cursor_restarts_for_another_file_of_the_same_length(self):
+        first = self._write_quotes("first.json", [f"first {i}" for i in range(4)])
+        second = self._write_quotes("second.json", [f"second {i:02d}" for i in range(4)])
+        widget = self.scw.QuoteWidget(None, self.settings, 12, False)
+        self.addCleanup(widget.deleteLater)
+        widget.quote_timer.stop()
+        widget.set_quote_corpus(first)
+        widget.save_settings() # A first-file cursor in the middle of its round
+        widget.set_quote_corpus(second)
+        self.assertEqual(widget.quote_cursor.position, 1) # A fresh round, not the saved one resumed
+        seen = {widget.quote_label.text()}
+        for _ in range(3):
+            widget._update_quote_text_display(initial_load=True)
+            seen.add(widget.quote_label.text())
+        self.assertEqual(seen, {f"second {i:02d}" for i in range(4)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,287 @@
+from PyQt6.QtGui import QColor
+
+# Shared theme engine for the calendar, quote, RSS and note widgets. Every
+# stylesheet is compiled once per (scheme, boxed, role) and served from a cache
+# afterwards, so switching schemes or toggling the box style costs one dict
+# lookup per widget instead of rebuilding long f-strings and hex colors.
+
+color_schemes = {
+    'Dark': {
+        'name_fa': 'تیره', 'widget_bg': QColor(30,30,30,210), 'widget_text': QColor("white"),
+        'box_bg': QColor(50,50,50,200), 'box_text': QColor(220,220,220), 'box_border': QColor(80,80,80),
+        'box_bg_hover': QColor(70,70,70,210), # Hover for boxed buttons
+        'flat_hover_bg': QColor(70,70,70,100), # Subtle hover for flat buttons/elements
+        'flat_element_hover_bg': QColor(80,80,80,120), # Hover for flat elements inside a boxed parent
+        'menu_bg': QColor(45,45,45,240), 'menu_text': QColor(220,220,220), 'menu_border': QColor(60,60,60), 
+        'menu_selected_bg': QColor(0, 120, 215, 200), 'menu_selected_text': QColor("white"),
+    },
+    'Light': {
+        'name_fa': 'روشن', 'widget_bg': QColor(245,245,245,220), 'widget_text': QColor(0,0,0), # Pure black text for contrast
+        'box_bg': QColor(220,220,220,200), 'box_text': QColor(0,0,0), # Pure black text for contrast
+        'box_border': QColor(180,180,180),
+        'box_bg_hover': QColor(200,200,200,210), # Darker hover for better visibility
+        'flat_hover_bg': QColor(200,200,200,100),
+        'flat_element_hover_bg': QColor(190,190,190,120), # Hover for flat elements inside a boxed parent
+        'menu_bg': QColor(240,240,240,240), 'menu_text': QColor(0,0,0), # Pure black text for contrast
+        'menu_border': QColor(200,200,200),
+        'menu_selected_bg': QColor(0, 120, 215, 200), 'menu_selected_text': QColor("white"),
+    },
+    'Nordic Blue': {
+        'name_fa':'آبی نوردیک','widget_bg':QColor(46,52,64,225),'widget_text':QColor(216,222,233),
+        'box_bg':QColor(59,66,82,210),'box_text':QColor(229,233,240),'box_border':QColor(76,86,106),
+        'box_bg_hover':QColor(76,86,106,220),
+        'flat_hover_bg':QColor(70,80,100,100),
+        'flat_element_hover_bg': QColor(80,90,110,120), # Hover for flat elements inside a boxed parent
+        'menu_bg':QColor(59,66,82,245),'menu_text':QColor(216,222,233),'menu_border':QColor(76,86,106),
+        'menu_selected_bg':QColor(94,129,172,200),'menu_selected_text':QColor(230,230,230),
+    },
+    'Forest Green': {
+        'name_fa':'سبز جنگلی','widget_bg':QColor(42,72,46,225),'widget_text':QColor(210,203,185),
+        'box_bg':QColor(52,82,56,210),'box_text':QColor(210,203,185),'box_border':QColor(80,110,80),
+        'box_bg_hover':QColor(62,92,66,220),
+        'flat_hover_bg':QColor(60,90,80,100),
+        'flat_element_hover_bg': QColor(70,100,90,120), # Hover for flat elements inside a boxed parent
+        'menu_bg':QColor(52,82,56,245),'menu_text':QColor(210,203,185),'menu_border':QColor(80,110,80),
+        'menu_selected_bg':QColor(100,130,100,200),'menu_selected_text':QColor(230,230,230),
+    },
+    'Warm Amber': {
+        'name_fa':'کهربایی گرم','widget_bg':QColor(70,40,0,225),'widget_text':QColor(255,210,150),
+        'box_bg':QColor(80,50,10,210),'box_text':QColor(255,220,180),'box_border':QColor(120,80,40),
+        'box_bg_hover':QColor(100,70,30,220),
+        'flat_hover_bg':QColor(90,60,30,100),
+        'flat_element_hover_bg': QColor(110,80,50,120), # Hover for flat elements inside a boxed parent
+        'menu_bg':QColor(80,50,10,245),'menu_text':QColor(255,210,150),'menu_border':QColor(120,80,40),
+        'menu_selected_bg':QColor(200,120,50,200),'menu_selected_text':QColor(255,230,200),
+    }
+}
+
+ROLE_WINDOW = "window"               # Top-level calendar widget background and text
+ROLE_LABEL = "label"                 # Calendar labels (get_element_style, flat)
+ROLE_BUTTON = "button"               # Calendar-style push buttons with hover (flat)
+ROLE_BOXED_LABEL = "boxed_label"     # Label that draws its own box when its parent is flat
+ROLE_BOXED_BUTTON = "boxed_button"   # Button that draws its own box when its parent is flat
+ROLE_TEXT = "text"                   # Transparent text label (secondary calendar rows, quote, RSS)
+ROLE_MENU = "menu"                   # QMenu, applied application-wide
+ROLE_NOTE_MANAGER = "note_manager"   # Note manager window (always drawn boxed)
+ROLE_NOTE_EDITOR = "note_editor"     # Note editor tabs
+
+_hex_cache = {}         # scheme key -> {color name: "#AARRGGBB"}
+_stylesheet_cache = {}  # (scheme key, boxed, role) -> stylesheet string
+
+
+def scheme_key_for(scheme):
+    """Returns the key of a scheme dict from color_schemes (or passes a key through)."""
+    if isinstance(scheme, str):
+        return scheme
+    for key, value in color_schemes.items():
+        if value is scheme:
+            return key
+    raise KeyError("Unknown color scheme")
+
+
+def scheme_hex(scheme_key):
+    """Returns the scheme's colors as HexArgb strings, converted once per scheme."""
+    colors = _hex_cache.get(scheme_key)
+    if colors is None:
+        colors = {name: value.name(QColor.NameFormat.HexArgb)
+                  for name, value in color_schemes[scheme_key].items() if isinstance(value, QColor)}
+        _hex_cache[scheme_key] = colors
+    return colors
+
+
+def _element_style(scheme_key, boxed, own_box, is_button):
+    # Moved from CalendarWidget.get_element_style; `boxed` is the calendar's box style
+    scheme = color_schemes[scheme_key]
+    colors = scheme_hex(scheme_key)
+    padding_str = "padding: 4px 6px;"  # Default for boxed elements or standalone flat buttons
+    border_radius_str = "border-radius: 6px;" # Default for boxed elements
+    hover_style_specifics = ""
+
+    if boxed:  # CalendarWidget itself is boxed
+        # Elements inside are flat relative to CalendarWidget's box
+        base_bg_color_str = "background-color: transparent;"
+        base_text_color_str = f"color: {colors['box_text']};"
+        border_style_str = "border: none;"
+        border_radius_str = "border-radius: 4px;" # Smaller radius for flat items within a box
+        if not is_button: # Label inside boxed CalendarWidget
+            padding_str = "padding: 0px;" # No padding for truly flat labels
+        # else: button padding remains "4px 6px" for clickability and visual balance
+        if is_button:
+            hover_style_specifics = f"background-color: {colors.get('flat_element_hover_bg', colors['flat_hover_bg'])};"
+
+    elif own_box: # Element wants its own box (and parent is flat)
+        base_bg_color_str = f"background-color: {colors['box_bg']};"
+        base_text_color_str = f"color: {colors['box_text']};"
+        lighter_border = scheme['box_border'].lighter(130).name(QColor.NameFormat.HexArgb)
+        darker_border = scheme['box_border'].darker(130).name(QColor.NameFormat.HexArgb)
+        border_style_str = (f"border-width: 1px; border-style: solid;"
+                            f"border-top-color: {lighter_border}; border-left-color: {lighter_border};"
+                            f"border-bottom-color: {darker_border}; border-right-color: {darker_border};")
+        # padding_str and border_radius_str use their defaults for a boxed element
+        if is_button:
+            hover_style_specifics = f"background-color: {colors['box_bg_hover']};"
+
+    else:  # Element is flat, and CalendarWidget is also flat
+        base_bg_color_str = "background-color: transparent;"
+        base_text_color_str = f"color: {colors['widget_text']};"
+        border_style_str = "border: none;"
+        border_radius_str = "border-radius: 4px;" # Smaller radius for flat items
+        if not is_button: # Flat label in flat parent
+            padding_str = "padding: 1px;" # Minimal padding
+        # else: button padding remains "4px 6px" for clickability
+        if is_button:
+            hover_style_specifics = f"background-color: {colors['flat_hover_bg']};"
+
+    base_style = f"{base_bg_color_str} {base_text_color_str} {border_style_str} {padding_str} {border_radius_str}"
+    if is_button:
+        return f"QPushButton {{ {base_style} }} QPushButton:hover {{ {hover_style_specifics} }}"
+    return f"QLabel {{ {base_style} }}"
+
+
+def _window_style(scheme_key, boxed):
+    colors = scheme_hex(scheme_key)
+    return f"QWidget {{ background-color: {colors['widget_bg']}; color: {colors['widget_text']}; }}"
+
+
+def _text_style(scheme_key, boxed):
+    colors = scheme_hex(scheme_key)
+    text_color = colors['box_text'] if boxed else colors['widget_text']
+    return f"color: {text_color}; background-color: transparent; border: none; padding: 0px;"
+
+
+def _menu_style(scheme_key, boxed):
+    colors = scheme_hex(scheme_key)
+    return f"""
+        QMenu {{background-color:{colors['menu_bg']};color:{colors['menu_text']};border:1px solid {colors['menu_border']};padding:4px;}}
+        QMenu::item {{padding:5px 20px;border-radius:4px;}} QMenu::item:selected {{background-color:{colors['menu_selected_bg']};color:{colors['menu_selected_text']};}}
+        QMenu::separator {{height:1px;background-color:{colors['menu_border']};margin:4px 5px;}}
+    """
+
+
+def _note_editor_style(scheme_key, boxed):
+    colors = scheme_hex(scheme_key)
+    return f"background-color: {colors['box_bg']}; color: {colors['box_text']};"
+
+
+def _note_manager_style(scheme_key, boxed):
+    # Note manager should always look 'boxed' as it's a floating panel.
+    colors = scheme_hex(scheme_key)
+    bg_color, border_color = colors['box_bg'], colors['box_border']
+    text_color, hover_color = colors['box_text'], colors['box_bg_hover']
+    return f"""
+        #background_frame {{
+            background-color: {bg_color};
+            border: 1px solid {border_color};
+            border-radius: 8px;
+        }}
+        
+        /* Text edit and tab pane styling */
+        QTextEdit, QTabWidget::pane {{
+            background-color: {bg_color};
+            color: {text_color};
+            border: none;
+        }}
+        
+        /* Tab bar styling */
+        QTabBar::tab {{
+            background-color: {bg_color};
+            color: {text_color};
+            border: 1px solid {border_color};
+            border-bottom: none;
+            border-top-left-radius: 4px;
+            border-top-right-radius: 4px;
+            padding: 5px 10px;
+            margin-right: 2px;
+        }}
+        
+        QTabBar::tab:selected {{
+            background-color: {hover_color};
+            border-bottom: none;
+        }}
+        
+        QTabBar::tab:hover:!selected {{
+            background-color: {hover_color};
+        }}
+        
+        /* Toolbar styling */
+        QToolBar {{
+            background-color: transparent;
+            border: none;
+        }}
+        
+        QToolBar QToolButton {{
+            background-color: transparent;
+            border: none;
+            color: {text_color};
+            padding: 3px;
+            border-radius: 3px;
+        }}
+        
+        QToolBar QToolButton:hover {{
+            background-color: {hover_color};
+        }}
+        
+        QToolBar QToolButton:checked {{
+            background-color: {hover_color};
+            border: 1px solid {border_color};
+        }}
+        
+        /* Button styling */
+        QPushButton {{
+            color: {text_color};
+            background-color: transparent;
+            border: 1px solid {border_color};
+            padding: 4px 8px;
+            border-radius: 4px;
+        }}
+        
+        QPushButton:hover {{
+            background-color: {hover_color};
+        }}
+        """
+
+
+_compilers = {
+    ROLE_WINDOW: _window_style,
+    ROLE_LABEL: lambda key, boxed: _element_style(key, boxed, False, False),
+    ROLE_BUTTON: lambda key, boxed: _element_style(key, boxed, False, True),
+    ROLE_BOXED_LABEL: lambda key, boxed: _element_style(key, boxed, True, False),
+    ROLE_BOXED_BUTTON: lambda key, boxed: _element_style(key, boxed, True, True),
+    ROLE_TEXT: _text_style,
+    ROLE_MENU: _menu_style,
+    ROLE_NOTE_MANAGER: _note_manager_style,
+    ROLE_NOTE_EDITOR: _note_editor_style,
+}
+
+
+def stylesheet(scheme, boxed, role):
+    """
+    Returns the compiled stylesheet of `role` for a scheme (key or dict from color_schemes)
+    and box style, compiling it on first use.
+    """
+    cache_key = (scheme_key_for(scheme), bool(boxed), role)
+    sheet = _stylesheet_cache.get(cache_key)
+    if sheet is None:
+        sheet = _compilers[role](cache_key[0], cache_key[1])
+        _stylesheet_cache[cache_key] = sheet
+    return sheet
+
+
+def element_role(own_box, is_button):
+    """Maps get_element_style()'s arguments to a role."""
+    if is_button:
+        return ROLE_BOXED_BUTTON if own_box else ROLE_BUTTON
+    return ROLE_BOXED_LABEL if own_box else ROLE_LABEL
+
+
+def apply_application_theme(app, scheme):
+    """Styles every QMenu of the application from one stylesheet, instead of one per menu."""
+    sheet = stylesheet(scheme, False, ROLE_MENU)
+    if app.styleSheet() != sheet:
+        app.setStyleSheet(sheet)
+
+
+def apply_stylesheet(widget, sheet):
+    """Sets a stylesheet only if it differs from the current one, sparing Qt a needless re-polish."""
+    if widget.styleSheet() != sheet:
+        widget.setStyleSheet(sheet)